@@ -0,0 +1,28 @@
+"""Runs all benchmarks one after another.
+
+Run from repository root:
+
+    python -m benchmarks
+"""
+
+import importlib
+
+BENCHMARKS = [
+    "bench_create",
+    "bench_artifact",
+    "bench_has_permission",
+    "bench_client",
+    "bench_principles",
+    "bench_filter_clients",
+    "bench_orm",
+]
+
+
+def main() -> None:
+    for name in BENCHMARKS:
+        print(f"\n{name}")
+        importlib.import_module(f"benchmarks.{name}").main()
+
+
+if __name__ == "__main__":
+    main()
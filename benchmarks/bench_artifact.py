@@ -0,0 +1,61 @@
+"""Compares loading respo model from pickle and from memory mapped artifact.
+
+Also measures has_permission latency on loaded models. Run from repository root:
+
+    python -m benchmarks.bench_artifact
+"""
+
+import tempfile
+import time
+import timeit
+
+import respo
+from respo import artifact, cli, core, fixture
+
+SIZES = [10_000, 100_000]
+CLIENT_ROLES = 5
+NUMBER = 10_000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        respo.config.RESPO_AUTO_FOLDER_NAME = f"{tmpdir}/auto"
+        for size in SIZES:
+            policy = fixture.generate_policy(permissions=size, roles=size // 100)
+            cli.save_respo_model(respo.RespoModel.parse_obj(policy))
+
+            start = time.perf_counter()
+            core.respo_model_cache.invalidate()
+            respo_model = respo.RespoModel.get_respo_model()
+            pickle_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            mapped_model = artifact.MappedRespoModel(respo.config.path_artifact_file)
+            mapped_model.has_permission(["role_0"], respo_model.permissions[0])
+            mapped_time = time.perf_counter() - start
+            print(
+                f"{size:>7} permissions: pickle load {pickle_time:.4f}s, "
+                f"artifact load and first check {mapped_time:.4f}s"
+            )
+
+            client = respo.RespoClient(
+                ",".join(f"role_{i}" for i in range(CLIENT_ROLES))
+            )
+            permission_name = respo_model.permissions[-1]
+            for name, model in [("pickle", respo_model), ("artifact", mapped_model)]:
+                seconds = min(
+                    timeit.repeat(
+                        lambda: client.has_permission(permission_name, model),
+                        number=NUMBER,
+                        repeat=5,
+                    )
+                )
+                print(
+                    f"{name:>17} has_permission: "
+                    f"{seconds / NUMBER * 1e6:.3f} us per check"
+                )
+            mapped_model.close()
+
+
+if __name__ == "__main__":
+    main()
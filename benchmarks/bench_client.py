@@ -0,0 +1,50 @@
+"""Measures RespoClient.add_role and remove_role with and without validation.
+
+Run from repository root:
+
+    python -m benchmarks.bench_client
+"""
+
+import timeit
+
+import respo
+from respo import fixture
+
+PERMISSIONS = 10_000
+ROLES = 500
+CLIENT_ROLES = 20
+NUMBER = 10_000
+
+
+def main() -> None:
+    respo_model = respo.RespoModel.parse_obj(
+        fixture.generate_policy(permissions=PERMISSIONS, roles=ROLES)
+    )
+    roles = list(respo_model.ROLES)
+    client = respo.RespoClient(",".join(roles[:CLIENT_ROLES]))
+    role_name = roles[-1]
+    print(f"{ROLES} roles in model, {CLIENT_ROLES} client roles, {NUMBER} pairs")
+
+    def add_remove_validated() -> None:
+        client.add_role(role_name, respo_model, validate_input=True)
+        client.remove_role(role_name, respo_model, validate_input=True)
+
+    def add_remove() -> None:
+        client.add_role(role_name, validate_input=False)
+        client.remove_role(role_name, validate_input=False)
+
+    def add_remove_unchecked() -> None:
+        client.add_role_unchecked(role_name)
+        client.remove_role_unchecked(role_name)
+
+    for name, func in [
+        ("validated", add_remove_validated),
+        ("not validated", add_remove),
+        ("unchecked", add_remove_unchecked),
+    ]:
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+        print(f"{name:>13}: {seconds / NUMBER * 1e6:.3f} us per add and remove")
+
+
+if __name__ == "__main__":
+    main()
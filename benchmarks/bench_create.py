@@ -0,0 +1,68 @@
+"""Measures how respo create scales with number of permissions.
+
+Reports total respo create time and its parse and validate phases.
+
+Run from repository root:
+
+    python -m benchmarks.bench_create
+"""
+
+import pathlib
+import tempfile
+import time
+
+import yaml
+from click import testing
+
+import respo
+from respo import cli, fixture
+
+SIZES = [12_500, 25_000, 50_000, 100_000]
+
+
+def synthetic_policy(permissions_count: int, seed: int = 0) -> dict:
+    """Policy with 1 principle per 10 and 1 role per 100 permissions."""
+    return fixture.generate_policy(
+        permissions=permissions_count,
+        roles=permissions_count // 100,
+        include_depth=3,
+        seed=seed,
+    )
+
+
+def main() -> None:
+    runner = testing.CliRunner()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        respo.config.RESPO_AUTO_FOLDER_NAME = f"{tmpdir}/auto"
+        respo.config.RESPO_FILE_NAME_RESPO_MODEL = f"{tmpdir}/respo_model.py"
+        respo.config.RESPO_FILE_NAME_ROLES_IDS = f"{tmpdir}/respo_roles_ids.json"
+        for size in SIZES:
+            policy = synthetic_policy(size)
+            policy_file = pathlib.Path(tmpdir, f"policy_{size}.yml")
+            policy_file.write_text(yaml.safe_dump(policy))
+
+            # every run starts without role ids left by the previous one
+            respo.config.path_roles_ids_file.unlink(missing_ok=True)
+            start = time.perf_counter()
+            result = runner.invoke(cli.app, ["create", str(policy_file)])
+            create_time = time.perf_counter() - start
+            assert result.exit_code == 0, result.stdout
+
+            start = time.perf_counter()
+            cli.parse_policy_file(str(policy_file), policy_file.read_text())
+            parse_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            respo.RespoModel.parse_obj(policy)
+            validate_time = time.perf_counter() - start
+            print(
+                f"{size:>7} permissions: create {create_time:.3f}s "
+                f"({create_time / size * 1e6:.2f} us per permission), "
+                f"parse {parse_time:.3f}s, "
+                f"validate {validate_time:.3f}s "
+                f"({validate_time / size * 1e6:.2f} us per permission)"
+            )
+
+
+if __name__ == "__main__":
+    main()
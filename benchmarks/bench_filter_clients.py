@@ -0,0 +1,65 @@
+"""Compares RespoModel.filter_clients with has_permission loop over clients.
+
+Requires numpy. Run from repository root:
+
+    python -m benchmarks.bench_filter_clients
+"""
+
+import random
+import time
+from typing import List
+
+import respo
+from benchmarks.bench_has_permission import synthetic_model
+
+CLIENTS = 100_000
+CLIENT_ROLES = 3
+ROLES_STRINGS = 100
+
+
+def bench(
+    respo_model: respo.RespoModel,
+    clients: List[respo.RespoClient],
+    permission_name: str,
+) -> None:
+    start = time.perf_counter()
+    loop_result = [
+        respo_client.has_permission(permission_name, respo_model)
+        for respo_client in clients
+    ]
+    print(f"has_permission loop: {time.perf_counter() - start:.4f}s")
+
+    start = time.perf_counter()
+    mask = respo_model.filter_clients(clients, permission_name)
+    print(f"     filter_clients: {time.perf_counter() - start:.4f}s")
+
+    assert mask.tolist() == loop_result
+
+
+def main() -> None:
+    respo_model = synthetic_model()
+    roles = list(respo_model.ROLES)
+    rng = random.Random(0)
+    permission_name = respo_model.permissions[len(respo_model.permissions) // 2]
+    # first call builds cached matrix
+    respo_model.filter_clients([], permission_name)
+
+    print(f"{CLIENTS} clients with {CLIENT_ROLES} roles, {len(roles)} roles in model")
+    clients = [
+        respo.RespoClient(",".join(rng.sample(roles, CLIENT_ROLES)))
+        for _ in range(CLIENTS)
+    ]
+    bench(respo_model, clients, permission_name)
+
+    print(f"{CLIENTS} clients loaded from {ROLES_STRINGS} distinct roles strings")
+    roles_strings = [
+        ",".join(rng.sample(roles, CLIENT_ROLES)) for _ in range(ROLES_STRINGS)
+    ]
+    clients = [
+        respo.RespoClient.from_cached(rng.choice(roles_strings)) for _ in range(CLIENTS)
+    ]
+    bench(respo_model, clients, permission_name)
+
+
+if __name__ == "__main__":
+    main()
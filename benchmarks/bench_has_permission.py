@@ -0,0 +1,72 @@
+"""Compares RespoClient.has_permission with the previous list scan.
+
+Run from repository root:
+
+    python -m benchmarks.bench_has_permission
+"""
+
+import timeit
+
+import respo
+from respo import core, fixture
+
+PERMISSIONS = 10_000
+ROLES = 500
+ROLE_PERMISSIONS = 100
+CLIENT_ROLES = 5
+NUMBER = 10_000
+
+
+def synthetic_model(seed: int = 0) -> respo.RespoModel:
+    return respo.RespoModel.parse_obj(
+        fixture.generate_policy(
+            permissions=PERMISSIONS,
+            roles=ROLES,
+            role_permissions=ROLE_PERMISSIONS,
+            include_depth=0,
+            principles=0,
+            seed=seed,
+        )
+    )
+
+
+def has_permission_list_scan(
+    client: respo.RespoClient, permission_name: str, respo_model: respo.RespoModel
+) -> bool:
+    """RespoClient.has_permission before compiling permissions to bitmasks."""
+    permission_label = core.PermissionLabel(permission_name)
+    for role in client.roles:
+        if permission_label.permission_name in respo_model.ROLES.permissions(role):
+            return True
+    return False
+
+
+def main() -> None:
+    respo_model = synthetic_model()
+    client = respo.RespoClient(",".join(f"role_{i}" for i in range(CLIENT_ROLES)))
+    # last permission is not granted to any of client roles, worst case for scan
+    permission_name = respo_model.permissions[-1]
+    assert has_permission_list_scan(
+        client, permission_name, respo_model
+    ) == client.has_permission(permission_name, respo_model)
+
+    print(
+        f"{PERMISSIONS} permissions, {ROLES} roles, "
+        f"{CLIENT_ROLES} client roles, {NUMBER} checks"
+    )
+    for name, func in [
+        ("list scan", has_permission_list_scan),
+        ("has_permission", respo.RespoClient.has_permission),
+    ]:
+        seconds = min(
+            timeit.repeat(
+                lambda: func(client, permission_name, respo_model),
+                number=NUMBER,
+                repeat=5,
+            )
+        )
+        print(f"{name:>14}: {seconds / NUMBER * 1e6:.3f} us per check")
+
+
+if __name__ == "__main__":
+    main()
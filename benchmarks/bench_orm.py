@@ -0,0 +1,222 @@
+"""Measures round trips of respo fields through SQLAlchemy and Django ORM.
+
+Rows with clients are inserted, loaded, checked with has_permission,
+updated with add_role and filtered by permission in database, all on
+in-memory SQLite. Rows of SQLAlchemyBitmaskRespoField are also loaded with
+respo model taken from cache for every row, pinned and passed to the type.
+Requires SQLAlchemy and django. Run from repository root:
+
+    python -m benchmarks.bench_orm
+"""
+
+import random
+import tempfile
+import time
+from typing import Callable, List
+
+import respo
+from respo import cli, core, fixture
+
+PERMISSIONS = 10_000
+ROLES = 200
+ROWS = 10_000
+CLIENT_ROLES = 3
+
+
+def timed(name: str, func: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    print(f"{name:>24}: {seconds:.4f}s ({seconds / ROWS * 1e6:.2f} us per row)")
+
+
+def synthetic_roles(respo_model: respo.RespoModel, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    roles = list(respo_model.ROLES)
+    return [",".join(rng.sample(roles, CLIENT_ROLES)) for _ in range(ROWS)]
+
+
+def granted_permission(respo_model: respo.RespoModel) -> str:
+    """Permission granted by first role, so filters return some rows."""
+    return min(
+        respo.RespoClient(list(respo_model.ROLES)[0]).effective_permissions(respo_model)
+    )
+
+
+def bench_sqlalchemy(respo_model: respo.RespoModel, clients_roles: List[str]) -> None:
+    from sqlalchemy import Column, Integer, create_engine, select
+    from sqlalchemy.orm import Session, declarative_base
+
+    from respo.fields.sqlalchemy import SQLAlchemyRespoField
+
+    Base = declarative_base()
+
+    class BenchModel(Base):  # type: ignore
+        __tablename__ = "bench_model"
+
+        id = Column(Integer, primary_key=True)
+        respo_field = Column(SQLAlchemyRespoField, nullable=False)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    permission_name = granted_permission(respo_model)
+    role_name = list(respo_model.ROLES)[0]
+
+    def insert() -> None:
+        with Session(engine) as session:
+            session.add_all(
+                BenchModel(respo_field=respo.RespoClient(roles))
+                for roles in clients_roles
+            )
+            session.commit()
+
+    def load_and_check() -> None:
+        with Session(engine) as session:
+            for row in session.scalars(select(BenchModel)):
+                row.respo_field.has_permission(permission_name, respo_model)
+
+    def update() -> None:
+        with Session(engine) as session:
+            for row in session.scalars(select(BenchModel)):
+                row.respo_field.add_role(role_name, respo_model)
+            session.commit()
+
+    def filter_in_database() -> None:
+        with Session(engine) as session:
+            session.scalars(
+                select(BenchModel).where(
+                    BenchModel.respo_field.has_permission_expr(
+                        permission_name, respo_model
+                    )
+                )
+            ).all()
+
+    print(f"SQLAlchemyRespoField, {ROWS} rows")
+    timed("insert", insert)
+    timed("load and has_permission", load_and_check)
+    timed("add_role and commit", update)
+    timed("filter by permission", filter_in_database)
+
+
+def bench_sqlalchemy_bitmask(
+    respo_model: respo.RespoModel, clients_roles: List[str]
+) -> None:
+    from sqlalchemy import Column, Integer, create_engine, select
+    from sqlalchemy.orm import Session, declarative_base
+
+    from respo.fields.sqlalchemy import (
+        BIGINTRespoField,
+        MutableRespoClient,
+        SQLAlchemyBitmaskRespoField,
+    )
+
+    Base = declarative_base()
+
+    class BenchModel(Base):  # type: ignore
+        __tablename__ = "bench_bitmask_model"
+
+        id = Column(Integer, primary_key=True)
+        respo_field = Column(SQLAlchemyBitmaskRespoField, nullable=False)
+        fixed_respo_field = Column(
+            MutableRespoClient.as_mutable(BIGINTRespoField(respo_model)),
+            nullable=False,
+        )
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    # bitmask holds at most 63 role ids
+    roles = list(respo_model.ROLES)[:63]
+    rng = random.Random(0)
+    with Session(engine) as session:
+        for _ in clients_roles:
+            client_roles = ",".join(rng.sample(roles, CLIENT_ROLES))
+            session.add(
+                BenchModel(
+                    respo_field=respo.RespoClient(client_roles),
+                    fixed_respo_field=respo.RespoClient(client_roles),
+                )
+            )
+        session.commit()
+
+    def load(column) -> None:
+        with Session(engine) as session:
+            session.execute(select(column)).scalars().all()
+
+    def load_pinned() -> None:
+        with core.respo_model_cache.pin():
+            load(BenchModel.respo_field)
+
+    print(f"SQLAlchemyBitmaskRespoField, {ROWS} rows")
+    timed("load, model from cache", lambda: load(BenchModel.respo_field))
+    timed("load, pinned model", load_pinned)
+    timed("load, model in type", lambda: load(BenchModel.fixed_respo_field))
+
+
+def bench_django(respo_model: respo.RespoModel, clients_roles: List[str]) -> None:
+    import django
+    from django.conf import settings
+    from django.db import connection, models, transaction
+
+    from respo.fields.django import DjangoRespoField
+
+    settings.configure(
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+        },
+        INSTALLED_APPS=[],
+    )
+    django.setup()
+
+    class BenchModel(models.Model):
+        respo_field = DjangoRespoField(default="", null=False)
+
+        class Meta:
+            app_label = "bench"
+
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(BenchModel)
+    permission_name = granted_permission(respo_model)
+    role_name = list(respo_model.ROLES)[0]
+
+    def insert() -> None:
+        BenchModel.objects.bulk_create(
+            BenchModel(respo_field=respo.RespoClient(roles)) for roles in clients_roles
+        )
+
+    def load_and_check() -> None:
+        for row in BenchModel.objects.all():
+            row.respo_field.has_permission(permission_name, respo_model)
+
+    def update() -> None:
+        with transaction.atomic():
+            for row in BenchModel.objects.all():
+                row.respo_field.add_role(role_name, respo_model)
+                row.save(update_fields=["respo_field"])
+
+    def filter_in_database() -> None:
+        list(BenchModel.objects.filter(respo_field__has_permission=permission_name))
+
+    print(f"DjangoRespoField, {ROWS} rows")
+    timed("insert", insert)
+    timed("load and has_permission", load_and_check)
+    timed("add_role and save", update)
+    timed("filter by permission", filter_in_database)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        respo.config.RESPO_AUTO_FOLDER_NAME = f"{tmpdir}/auto"
+        respo_model = respo.RespoModel.parse_obj(
+            fixture.generate_policy(permissions=PERMISSIONS, roles=ROLES)
+        )
+        # django has_permission lookup reads model saved by respo create
+        cli.save_respo_model(respo_model)
+        respo_model = respo.RespoModel.get_respo_model()
+        clients_roles = synthetic_roles(respo_model)
+        bench_sqlalchemy(respo_model, clients_roles)
+        bench_sqlalchemy_bitmask(respo_model, clients_roles)
+        bench_django(respo_model, clients_roles)
+
+
+if __name__ == "__main__":
+    main()
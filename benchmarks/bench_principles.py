@@ -0,0 +1,136 @@
+"""Compares resolving principles with transitive closures and previous fixpoint loop.
+
+Also measures whole respo create of policy of the same size, from yml and
+json file. Target of well under a second is for json file, yml parsing time
+is spent in PyYAML. Run from repository root:
+
+    python -m benchmarks.bench_principles
+"""
+
+import json
+import pathlib
+import random
+import tempfile
+import time
+from typing import List
+
+import yaml
+from click import testing
+
+import respo
+from respo import cli, core, fixture
+
+PERMISSIONS = 50_000
+PRINCIPLES = 5_000
+PRINCIPLE_FAN_OUT = 3
+ROLES = 50
+ROLE_PERMISSIONS = 20
+
+
+def synthetic_sections(seed: int = 0):
+    rng = random.Random(seed)
+    permissions = [f"coll_{i // 100}.perm_{i}" for i in range(PERMISSIONS)]
+    # every principle points to permissions with higher index, so chains are
+    # long but there are no cycles in principles, as in most real policies
+    principles = []
+    for when_index in sorted(rng.sample(range(PERMISSIONS - 1000), PRINCIPLES)):
+        then = rng.sample(range(when_index + 1, when_index + 1000), PRINCIPLE_FAN_OUT)
+        principles.append(
+            core.Principle(
+                when=permissions[when_index], then=[permissions[i] for i in then]
+            )
+        )
+    whens = [principle.when for principle in principles]
+
+    def roles() -> List[core.Role]:
+        role_rng = random.Random(seed)
+        return [
+            core.Role(
+                name=f"role_{i}", permissions=role_rng.sample(whens, ROLE_PERMISSIONS)
+            )
+            for i in range(ROLES)
+        ]
+
+    return principles, roles
+
+
+def apply_principles_fixpoint(
+    roles: List[core.Role], principles: List[core.Principle]
+) -> List[core.Role]:
+    """RespoModel._apply_principles_section_rules_to_roles before closures."""
+    for role in roles:
+        while True:
+            perms_after_resolve = []
+            for permission in role.permissions:
+                perms_after_resolve.append(permission)
+                for principle in principles:
+                    if principle.when != permission:
+                        continue
+                    for perm_to_add in principle.then:
+                        if perm_to_add not in role.permissions:
+                            perms_after_resolve.append(perm_to_add)
+
+            if role.permissions == perms_after_resolve:
+                break
+            role.permissions = perms_after_resolve
+    return roles
+
+
+def bench_create() -> None:
+    policy = fixture.generate_policy(
+        permissions=PERMISSIONS,
+        roles=ROLES,
+        role_permissions=ROLE_PERMISSIONS,
+        principles=PRINCIPLES,
+        principle_fan_out=PRINCIPLE_FAN_OUT,
+    )
+    runner = testing.CliRunner()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        respo.config.RESPO_AUTO_FOLDER_NAME = f"{tmpdir}/auto"
+        respo.config.RESPO_FILE_NAME_RESPO_MODEL = f"{tmpdir}/respo_model.py"
+        respo.config.RESPO_FILE_NAME_ROLES_IDS = f"{tmpdir}/respo_roles_ids.json"
+        for name, content in [
+            ("policy.yml", yaml.safe_dump(policy)),
+            ("policy.json", json.dumps(policy)),
+        ]:
+            policy_file = pathlib.Path(tmpdir, name)
+            policy_file.write_text(content)
+            # every run starts without role ids left by the previous one
+            respo.config.path_roles_ids_file.unlink(missing_ok=True)
+            start = time.perf_counter()
+            result = runner.invoke(cli.app, ["create", str(policy_file), "--force"])
+            create_time = time.perf_counter() - start
+            assert result.exit_code == 0, result.stdout
+            phases = next(
+                line for line in result.stdout.splitlines() if "Parsed in" in line
+            )
+            print(f"create {name:>11}: {create_time:.4f}s, {phases[6:]}")
+
+
+def main() -> None:
+    principles, roles = synthetic_sections()
+    print(
+        f"{PERMISSIONS} permissions, {PRINCIPLES} principles, "
+        f"{ROLES} roles with {ROLE_PERMISSIONS} permissions"
+    )
+
+    start = time.perf_counter()
+    closures_roles = core.RespoModel._apply_principles_section_rules_to_roles(
+        roles(), {"principles": principles}
+    )
+    print(f"   closures: {time.perf_counter() - start:.4f}s")
+
+    start = time.perf_counter()
+    fixpoint_roles = apply_principles_fixpoint(roles(), principles)
+    print(f"   fixpoint: {time.perf_counter() - start:.4f}s")
+
+    for closures_role, fixpoint_role in zip(closures_roles, fixpoint_roles):
+        assert sorted(closures_role.permissions) == sorted(
+            set(fixpoint_role.permissions)
+        )
+
+    bench_create()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,11 @@ autoflake --recursive --in-place  \
         --remove-unused-variables \
         --remove-all-unused-imports  \
         --ignore-init-module-imports \
-        respo tests docs
+        respo tests docs benchmarks
 echo "black"
-black respo tests docs
+black respo tests docs benchmarks
 echo "isort"
-isort respo tests docs
+isort respo tests docs benchmarks
 echo "flake8"
-flake8 respo tests docs --count --statistics
+flake8 respo tests docs benchmarks --count --statistics
 echo "OK"
\ No newline at end of file
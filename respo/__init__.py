@@ -1,17 +1,66 @@
 """File based RBAC in Python made easy."""
 
-from respo.client import RespoClient
-from respo.core import (
-    LabelsContainer,
-    PermissionLabel,
-    PERMSContainer,
-    RespoModel,
-    Role,
-    RoleLabel,
-    ROLESContainer,
-)
+import importlib
+import typing
+
 from respo.exceptions import RespoClientError, RespoModelError
-from respo.settings import config
 from respo.version import VERSION
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from respo.client import RespoClient
+    from respo.core import (
+        LabelsContainer,
+        PermissionLabel,
+        PERMSContainer,
+        RespoModel,
+        Role,
+        RoleLabel,
+        ROLESContainer,
+    )
+    from respo.settings import config
+
+# imported on first access, so respo.runtime does not import pydantic
+_LAZY_ATTRIBUTES = {
+    "RespoClient": "respo.client",
+    "LabelsContainer": "respo.core",
+    "PermissionLabel": "respo.core",
+    "PERMSContainer": "respo.core",
+    "RespoModel": "respo.core",
+    "Role": "respo.core",
+    "RoleLabel": "respo.core",
+    "ROLESContainer": "respo.core",
+    "config": "respo.settings",
+}
+_LAZY_SUBMODULES = ("client", "core", "settings")
+
+__all__ = [
+    "RespoClient",
+    "LabelsContainer",
+    "PermissionLabel",
+    "PERMSContainer",
+    "RespoModel",
+    "Role",
+    "RoleLabel",
+    "ROLESContainer",
+    "config",
+    "RespoClientError",
+    "RespoModelError",
+]
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in _LAZY_SUBMODULES:
+        value = importlib.import_module(f"respo.{name}")
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> typing.List[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES, *_LAZY_SUBMODULES})
+
+
 __version__ = VERSION
@@ -0,0 +1,346 @@
+import functools
+import mmap
+import os
+import struct
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from respo import exceptions
+
+if TYPE_CHECKING:  # pragma: no cover
+    from respo.core import RespoModel
+
+ARTIFACT_MAGIC = b"RESPOMAP"
+ARTIFACT_VERSION = 2
+# labels found by binary search are kept in LRU cache of every mapped model
+LABELS_CACHE_SIZE = 4096
+
+# magic, version, flags, permissions count, roles count, bytes of single role
+# bitmap, bytes of strings table, sha256 digest of respo model fingerprint
+_HEADER = struct.Struct("<8sHHIIII32s")
+_UINT32 = struct.Struct("<I")
+_UINT32_PAIR = struct.Struct("<II")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def dumps_artifact(respo_model: "RespoModel") -> bytes:
+    """Encodes respo model to compact binary artifact read by MappedRespoModel.
+
+    Layout (little endian, sections aligned to 8 bytes):
+        header: magic, version, counts and model fingerprint
+        strings offsets: uint32 array, permissions (by id) then roles
+        strings table: utf-8 encoded labels
+        roles ids: uint32 array, stable id of every role
+        labels order: uint32 array, permissions ids then roles indexes, both
+            sorted by encoded label, for binary search of labels
+        roles bitmaps: for every role, bitmap of its permissions closure,
+            bit n (byte n // 8, bit n % 8) is set for permission with id n
+    """
+    permissions: List[str] = [str(permission) for permission in respo_model.permissions]
+    roles: List[str] = list(respo_model.ROLES)
+    bitmap_size = (len(permissions) + 7) // 8
+
+    strings_offsets = [0]
+    encoded_strings: List[bytes] = []
+    for label in permissions + roles:
+        encoded_strings.append(label.encode())
+        strings_offsets.append(strings_offsets[-1] + len(encoded_strings[-1]))
+    strings = b"".join(encoded_strings)
+    encoded_permissions = encoded_strings[: len(permissions)]
+    encoded_roles = encoded_strings[len(permissions) :]
+    labels_order = sorted(
+        range(len(permissions)), key=encoded_permissions.__getitem__
+    ) + sorted(range(len(roles)), key=encoded_roles.__getitem__)
+
+    chunks = [
+        _HEADER.pack(
+            ARTIFACT_MAGIC,
+            ARTIFACT_VERSION,
+            0,
+            len(permissions),
+            len(roles),
+            bitmap_size,
+            len(strings),
+            bytes.fromhex(respo_model.fingerprint),
+        ),
+        struct.pack(f"<{len(strings_offsets)}I", *strings_offsets),
+        strings,
+    ]
+    size = sum(len(chunk) for chunk in chunks)
+    chunks.append(b"\0" * (_align(size) - size))
+    chunks.append(
+        struct.pack(f"<{len(roles)}I", *(respo_model.roles_ids[role] for role in roles))
+    )
+    size = sum(len(chunk) for chunk in chunks)
+    chunks.append(b"\0" * (_align(size) - size))
+    chunks.append(struct.pack(f"<{len(labels_order)}I", *labels_order))
+    size = sum(len(chunk) for chunk in chunks)
+    chunks.append(b"\0" * (_align(size) - size))
+    for role in roles:
+        chunks.append(respo_model.roles_bitmasks[role].to_bytes(bitmap_size, "little"))
+    return b"".join(chunks)
+
+
+class MappedLabels(Mapping[str, int]):
+    """Labels of MappedRespoModel, looked up in mapped strings table.
+
+    Mapping of labels (permissions or roles) to integers, for example
+    permissions ids. Labels are found by binary search over sorted labels
+    order section of artifact and decoded one by one when iterated, so they
+    are never all copied into process memory. Like RespoModel PERMS and
+    ROLES, labels are also accessible as attributes, upper cased with dots
+    replaced by "__".
+
+    Examples:
+        >>> respo_model.PERMS.USER__READ_ALL
+        "user.read_all"
+        >>> respo_model.permissions_ids["user.read_all"]
+        5
+    """
+
+    def __init__(
+        self,
+        count: int,
+        find: Callable[[str], int],
+        label: Callable[[int], str],
+        value: Callable[[int], int],
+    ) -> None:
+        self._count = count
+        self._find = find
+        self._label = label
+        self._value = value
+
+    def __getitem__(self, label: str) -> int:
+        position = self._find(label)
+        if position < 0:
+            raise KeyError(label)
+        return self._value(position)
+
+    def __contains__(self, label: object) -> bool:
+        return isinstance(label, str) and self._find(label) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self._label, range(self._count))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getattr__(self, name: str) -> str:
+        if not name.startswith("_"):
+            # labels are lower case, every "__" may stand for dot of permission
+            label = name.lower()
+            candidates = [label] + [
+                f"{label[:index]}.{label[index + 2:]}"
+                for index in range(len(label) - 1)
+                if label.startswith("__", index)
+            ]
+            for candidate in candidates:
+                if candidate.upper().replace(".", "__") == name and candidate in self:
+                    return candidate
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    def __str__(self) -> str:
+        return str(list(self))
+
+
+class MappedPermissions(Sequence[str]):
+    """Permissions of MappedRespoModel ordered by ids, decoded on access."""
+
+    def __init__(self, count: int, label: Callable[[int], str]) -> None:
+        self._count = count
+        self._label = label
+
+    def __getitem__(self, index):  # type: ignore
+        if isinstance(index, slice):
+            return [self._label(i) for i in range(self._count)[index]]
+        return self._label(range(self._count)[index])
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class MappedRespoModel:
+    """Read-only respo model served from memory mapped binary artifact.
+
+    File written by respo create (see dumps_artifact) is mapped read-only,
+    so all processes using the same file share its pages and loading does
+    not depend on policy size: labels are found by binary search in the
+    mapping (last LABELS_CACHE_SIZE of them are cached), decoded only when
+    returned, and roles bitmaps are read straight from the mapping. It
+    supports the part of RespoModel used by RespoClient to check permissions.
+
+    Raises:
+        RespoModelError: file is not respo artifact or has other version.
+
+    Examples:
+        >>> respo_model = MappedRespoModel(".respo_cache/__auto__respo_model.map")
+        >>> respo_model.has_permission(["admin"], "user.read_all")
+        True
+        >>> RespoClient("admin").has_permission("user.read_all", respo_model)
+        True
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]) -> None:
+        with open(path, "rb") as artifact_file:
+            if os.fstat(artifact_file.fileno()).st_size < _HEADER.size:
+                raise exceptions.RespoModelError(f"File {path} is not respo artifact.")
+            self._mmap = mmap.mmap(artifact_file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            _,
+            self._permissions_count,
+            self._roles_count,
+            self._bitmap_size,
+            strings_size,
+            fingerprint,
+        ) = _HEADER.unpack_from(self._mmap)
+        if magic != ARTIFACT_MAGIC:
+            raise exceptions.RespoModelError(f"File {path} is not respo artifact.")
+        if version != ARTIFACT_VERSION:
+            raise exceptions.RespoModelError(
+                f"Respo artifact {path} has version {version}, "
+                f"expected {ARTIFACT_VERSION}. Use command: respo create [OPTIONS] FILENAME"
+            )
+        self.fingerprint: str = fingerprint.hex()
+        labels_count = self._permissions_count + self._roles_count
+        self._strings_offsets_start = _HEADER.size
+        self._strings_start = self._strings_offsets_start + 4 * (labels_count + 1)
+        self._roles_ids_start = _align(self._strings_start + strings_size)
+        self._labels_order_start = _align(self._roles_ids_start + 4 * self._roles_count)
+        self._bitmaps_start = _align(self._labels_order_start + 4 * labels_count)
+        if (
+            len(self._mmap)
+            < self._bitmaps_start + self._roles_count * self._bitmap_size
+        ):
+            raise exceptions.RespoModelError(f"Respo artifact {path} is truncated.")
+        self._cached_effective_permissions = functools.lru_cache(maxsize=1024)(
+            self._effective_permissions
+        )
+        self._permission_id = functools.lru_cache(maxsize=LABELS_CACHE_SIZE)(
+            functools.partial(self._find, 0, self._permissions_count)
+        )
+        self._role_index = functools.lru_cache(maxsize=LABELS_CACHE_SIZE)(
+            functools.partial(self._find, self._permissions_count, self._roles_count)
+        )
+        self.permissions = MappedPermissions(self._permissions_count, self._label)
+        self.permissions_ids = self.PERMS = MappedLabels(
+            self._permissions_count, self._permission_id, self._label, int
+        )
+        self.ROLES = MappedLabels(
+            self._roles_count, self._role_index, self._role_label, int
+        )
+        self.roles_ids = MappedLabels(
+            self._roles_count, self._role_index, self._role_label, self._role_id
+        )
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def _encoded_label(self, index: int) -> bytes:
+        start, end = _UINT32_PAIR.unpack_from(
+            self._mmap, self._strings_offsets_start + 4 * index
+        )
+        return self._mmap[self._strings_start + start : self._strings_start + end]
+
+    def _label(self, index: int) -> str:
+        return self._encoded_label(index).decode()
+
+    def _role_label(self, role_index: int) -> str:
+        return self._label(self._permissions_count + role_index)
+
+    def _role_id(self, role_index: int) -> int:
+        return _UINT32.unpack_from(self._mmap, self._roles_ids_start + 4 * role_index)[
+            0
+        ]
+
+    def _find(self, first: int, count: int, label: str) -> int:
+        """Returns position of label among count labels from first, or -1."""
+        try:
+            encoded = label.encode()
+        except (AttributeError, UnicodeEncodeError):
+            return -1
+        order_start = self._labels_order_start + 4 * first
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            (position,) = _UINT32.unpack_from(self._mmap, order_start + 4 * middle)
+            middle_label = self._encoded_label(first + position)
+            if middle_label < encoded:
+                low = middle + 1
+            elif middle_label > encoded:
+                high = middle
+            else:
+                return position
+        return -1
+
+    def _role_bitmap_start(self, role_name: str) -> int:
+        role_index = self._role_index(role_name)
+        if role_index < 0:
+            raise exceptions.RespoModelError(
+                f"Role does not exist in respo model: {role_name}"
+            )
+        return self._bitmaps_start + role_index * self._bitmap_size
+
+    def roles_bitmask(self, roles: Iterable[str]) -> int:
+        """Returns union of compiled permissions bitmasks for given roles.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+        """
+        bitmask = 0
+        for role_name in roles:
+            start = self._role_bitmap_start(role_name)
+            bitmask |= int.from_bytes(
+                self._mmap[start : start + self._bitmap_size], "little"
+            )
+        return bitmask
+
+    def has_permission(self, roles: Iterable[str], permission_name: str) -> bool:
+        """Checks single bit of roles bitmaps, without decoding them.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+        """
+        permission_id = self._permission_id(permission_name)
+        granted = False
+        for role_name in roles:
+            start = self._role_bitmap_start(role_name)
+            if (
+                permission_id >= 0
+                and self._mmap[start + permission_id // 8] >> permission_id % 8 & 1
+            ):
+                granted = True
+        return granted
+
+    def effective_permissions(self, roles: Iterable[str]) -> FrozenSet[str]:
+        """Returns all permissions granted by given roles, cached in LRU cache.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+        """
+        return self._cached_effective_permissions(tuple(sorted(set(roles))))
+
+    def _effective_permissions(self, roles_key: Tuple[str, ...]) -> FrozenSet[str]:
+        bitmask = self.roles_bitmask(roles_key)
+        result: List[str] = []
+        while bitmask:
+            lowest_bit = bitmask & -bitmask
+            result.append(self._label(lowest_bit.bit_length() - 1))
+            bitmask ^= lowest_bit
+        return frozenset(result)
@@ -1,30 +1,128 @@
 import ast
-import io
+import concurrent.futures
+import contextlib
+import hashlib
+import json
 import os
 import pathlib
 import pickle
+import stat
+import tempfile
 import time
-from typing import List, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import click
 import pydantic
 import yaml
 
-from respo import core, settings
+from respo import artifact, core, fixture, settings, version
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None  # type: ignore
+try:
+    import toml
+except ImportError:  # pragma: no cover
+    toml = None  # type: ignore
+
+# libyaml bindings are many times faster, when PyYAML was built with them
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def write_file_atomically(path: pathlib.Path, data: bytes) -> None:
+    """Writes data to temporary file in the same folder and renames it to path.
+
+    Processes reading the file never see it partially written. Mode of
+    replaced file is kept.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o644
+    file_descriptor, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
 
 
 def save_respo_model(model: core.RespoModel) -> None:
     """Dumps respo model into bin and yml format files.
 
-    Pickle file is generated and saved to path specified
-    in settings. Path may be overwritten using environment variables.
+    Pickle file and memory mappable artifact (see respo.artifact) are
+    generated and saved to paths specified in settings. Paths may be
+    overwritten using environment variables. Files are replaced atomically,
+    artifact first, so processes reading them never see partially written
+    file.
     """
     pathlib.Path(settings.config.RESPO_AUTO_FOLDER_NAME).mkdir(
         parents=True, exist_ok=True
     )
 
-    with open(settings.config.path_bin_file, "wb") as file:
-        pickle.dump(model, file)
+    write_file_atomically(
+        settings.config.path_artifact_file, artifact.dumps_artifact(model)
+    )
+    write_file_atomically(settings.config.path_bin_file, pickle.dumps(model))
+
+
+def load_roles_ids() -> Dict[str, int]:
+    """Returns role ids from roles ids file written by previous respo create.
+
+    They are passed to the new model, so role ids (used for example by
+    bitmask database columns) do not shift between respo create runs. The
+    file is kept next to respo_model.py and should be committed with policy
+    files, unlike .respo_cache folder. Empty dict is returned when it does
+    not exist.
+
+    Raises:
+        PolicyFileError: file exists, but could not be read or is not json
+        object with role names and unique non-negative integer ids.
+    """
+    path = settings.config.path_roles_ids_file
+    try:
+        roles_ids = json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as read_error:
+        raise PolicyFileError(
+            f"Could not read roles ids file {path}\n{read_error}"
+        ) from None
+    if not isinstance(roles_ids, dict) or not all(
+        isinstance(role_id, int) and not isinstance(role_id, bool) and role_id >= 0
+        for role_id in roles_ids.values()
+    ):
+        raise PolicyFileError(
+            f"Roles ids file {path} must contain mapping of role names "
+            "to non-negative integer ids"
+        )
+    if len(set(roles_ids.values())) != len(roles_ids):
+        raise PolicyFileError(f"Roles ids file {path} contains duplicated ids")
+    return roles_ids
+
+
+def save_roles_ids(respo_model: core.RespoModel) -> None:
+    """Writes role ids of respo model, ordered by ids, to roles ids file.
+
+    Ids of removed roles are kept in the file, so they are never reused.
+    """
+    roles_ids = dict(sorted(respo_model.roles_ids.items(), key=lambda item: item[1]))
+    write_file_atomically(
+        settings.config.path_roles_ids_file,
+        f"{json.dumps(roles_ids, indent=2)}\n".encode(),
+    )
 
 
 def generate_respo_model_file(respo_model: core.RespoModel) -> None:
@@ -81,6 +179,273 @@ def generate_respo_model_file(respo_model: core.RespoModel) -> None:
         file.write("".join(output_text_lst))
 
 
+def generate_compiled_module(respo_model: core.RespoModel) -> None:
+    """Generates python module with respo model compiled to literals.
+
+    Module contains label constants in ROLES and PERMS classes, permission
+    ids, stable role ids and role to permissions tables, and creates
+    respo.compiled.CompiledRespoModel from them, so loading policy is
+    just import of the module. It is saved in
+    config.RESPO_FILE_NAME_COMPILED_MODULE.
+    """
+
+    def labels_class(
+        labels_container: Union[core.ROLESContainer, core.PERMSContainer],
+        class_name: str,
+    ) -> List[str]:
+        result_lst = [f"class {class_name}:\n"]
+        names = sorted(label for label in labels_container.__dict__ if label.isupper())
+        if not names:
+            result_lst.append("    pass\n")
+        for name in names:
+            result_lst.append(f'    {name} = "{labels_container.__dict__[name]}"\n')
+        result_lst.append("\n\n")
+        return result_lst
+
+    def dict_literal(name: str, items: List[Tuple[str, str]]) -> List[str]:
+        result_lst = [f"{name} = {{\n"]
+        for key, value in items:
+            result_lst.append(f'    "{key}": {value},\n')
+        result_lst.append("}\n")
+        return result_lst
+
+    roles = list(respo_model.ROLES)
+    output_text_lst: List[str] = []
+    output_text_lst.append('"""\nAuto generated using respo create --compile-module\n')
+    output_text_lst.append('Docs: https://rafsaf.github.io/respo/\n"""\n\n')
+    output_text_lst.append("from respo.compiled import CompiledRespoModel\n\n")
+    output_text_lst.append(f'FINGERPRINT = "{respo_model.fingerprint}"\n')
+    output_text_lst += dict_literal(
+        "PERMISSIONS_IDS",
+        [
+            (permission, str(respo_model.permissions_ids[permission]))
+            for permission in respo_model.PERMS
+        ],
+    )
+    output_text_lst += dict_literal(
+        "ROLES_IDS", [(role, str(respo_model.roles_ids[role])) for role in roles]
+    )
+    output_text_lst += dict_literal(
+        "ROLES_PERMISSIONS",
+        [
+            (
+                role,
+                "frozenset({%s})"
+                % ", ".join(
+                    f'"{permission}"'
+                    for permission in respo_model.roles_permissions[role]
+                )
+                if respo_model.roles_permissions[role]
+                else "frozenset()",
+            )
+            for role in roles
+        ],
+    )
+    output_text_lst += dict_literal(
+        "ROLES_BITMASKS",
+        [(role, hex(respo_model.roles_bitmasks[role])) for role in roles],
+    )
+    output_text_lst.append("\n\n")
+    output_text_lst += labels_class(respo_model.ROLES, "ROLES")
+    output_text_lst += labels_class(respo_model.PERMS, "PERMS")
+    output_text_lst.append(
+        "respo_model = CompiledRespoModel(\n"
+        "    permissions_ids=PERMISSIONS_IDS,\n"
+        "    roles_ids=ROLES_IDS,\n"
+        "    roles_permissions=ROLES_PERMISSIONS,\n"
+        "    roles_bitmasks=ROLES_BITMASKS,\n"
+        "    fingerprint=FINGERPRINT,\n"
+        ")\n\n\n"
+        "def get_respo_model() -> CompiledRespoModel:\n"
+        "    return respo_model\n"
+    )
+
+    write_file_atomically(
+        settings.config.path_compiled_module_file, "".join(output_text_lst).encode()
+    )
+
+
+POLICY_FILES_SUFFIXES = (".yml", ".yaml", ".json", ".toml")
+
+
+class PolicyFileError(Exception):
+    """Policy file could not be parsed or merged with other files."""
+
+
+def find_policy_files(paths: Sequence[pathlib.Path]) -> List[pathlib.Path]:
+    """Returns given files and policy files found recursively in given directories.
+
+    Files in directories are sorted by path and must have one of
+    POLICY_FILES_SUFFIXES.
+
+    Raises:
+        PolicyFileError: directory does not contain any policy file.
+    """
+    policy_files: List[pathlib.Path] = []
+    for path in paths:
+        if not path.is_dir():
+            policy_files.append(path)
+            continue
+        dir_files = sorted(
+            dir_file
+            for dir_file in path.rglob("*")
+            if dir_file.suffix in POLICY_FILES_SUFFIXES and dir_file.is_file()
+        )
+        if not dir_files:
+            raise PolicyFileError(
+                f"Directory {path} does not contain any "
+                f"{', '.join(POLICY_FILES_SUFFIXES)} file"
+            )
+        policy_files += dir_files
+    return policy_files
+
+
+def parse_policy_file(name: str, content: str) -> Any:
+    """Parses content of policy file, runs in worker processes.
+
+    Parser is chosen by file suffix: json files are parsed with standard
+    library, toml files with tomllib (python 3.11+), tomli or toml package,
+    whichever is installed, other files as yml with YAML_LOADER.
+
+    Raises:
+        PolicyFileError: file syntax is invalid.
+    """
+    suffix = pathlib.PurePath(name).suffix
+    try:
+        if suffix == ".json":
+            return json.loads(content)
+        if suffix == ".toml":
+            if tomllib is not None:
+                return tomllib.loads(content)
+            if toml is not None:
+                return toml.loads(content)
+            raise PolicyFileError(
+                f"{name}\ntoml files require python 3.11+, tomli or toml package"
+            )
+        return yaml.load(content, Loader=YAML_LOADER)
+    except (yaml.YAMLError, ValueError) as syntax_error:
+        raise PolicyFileError(f"{name}\n{syntax_error}") from None
+
+
+def parse_policy_files(names: Sequence[str], contents: Sequence[str]) -> List[Any]:
+    """Parses policy files, in parallel processes when there are many of them.
+
+    Raises:
+        PolicyFileError: file syntax is invalid.
+    """
+    max_workers = min(len(names), os.cpu_count() or 1)
+    if max_workers <= 1:
+        return [
+            parse_policy_file(*name_content) for name_content in zip(names, contents)
+        ]
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        return list(executor.map(parse_policy_file, names, contents))
+
+
+def merge_policy_files(names: Sequence[str], policies: Sequence[Any]) -> Any:
+    """Merges permissions, principles and roles sections of many policy files.
+
+    Sections are concatenated in files order. Permission, principle when
+    or role name declared in more than one file is an error, duplicates in
+    the same file are reported by RespoModel validation. Other sections
+    can be declared only in one file. Single policy is returned unchanged.
+
+    Raises:
+        PolicyFileError: file is not a mapping or labels are duplicated.
+    """
+    if len(policies) == 1:
+        return policies[0]
+
+    merged: Dict[str, Any] = {"permissions": [], "principles": [], "roles": []}
+    declared_in: Dict[Tuple[str, str], str] = {}
+
+    def declare(section: str, label: Any, name: str) -> None:
+        key = (section, str(label))
+        if key in declared_in and declared_in[key] != name:
+            raise PolicyFileError(
+                f"Error in {section} section: {label} is declared "
+                f"in {declared_in[key]} and {name}"
+            )
+        declared_in[key] = name
+
+    for name, policy in zip(names, policies):
+        if policy is None:
+            continue
+        if not isinstance(policy, dict):
+            raise PolicyFileError(f"Policy file {name} must contain mapping")
+        for section, section_items in policy.items():
+            if section not in ("permissions", "principles", "roles"):
+                declare("file", section, name)
+                merged[section] = section_items
+                continue
+            if not isinstance(section_items, list):
+                raise PolicyFileError(
+                    f"Error in {section} section: {name} must contain list"
+                )
+            for item in section_items:
+                if section == "permissions":
+                    declare(section, item, name)
+                elif isinstance(item, dict):
+                    declare(
+                        section,
+                        item.get("when" if section == "principles" else "name"),
+                        name,
+                    )
+                merged[section].append(item)
+    return merged
+
+
+def create_input_hash(
+    names: Sequence[str],
+    contents: Sequence[str],
+    no_python_file: bool,
+    compile_module: bool,
+    roles_ids: Dict[str, int],
+) -> str:
+    """Returns sha256 of respo create input, respo and artifact versions and options.
+
+    Role ids from roles ids file are part of input as well, so the file
+    changed or removed since last run is written again.
+    """
+    input_hash = hashlib.sha256()
+    for part in (
+        version.VERSION,
+        str(artifact.ARTIFACT_VERSION),
+        settings.config.json(sort_keys=True),
+        f"{no_python_file},{compile_module}",
+        json.dumps(roles_ids, sort_keys=True),
+        *(f"{name}\0{content}" for name, content in zip(names, contents)),
+    ):
+        input_hash.update(part.encode())
+        input_hash.update(b"\0")
+    return input_hash.hexdigest()
+
+
+def is_create_cache_hit(
+    input_hash: str, no_python_file: bool, compile_module: bool
+) -> bool:
+    """Checks if last respo create had the same input and its outputs still exist.
+
+    Input hash file is removed before outputs are written and saved after all
+    of them, so it exists only when last respo create finished.
+    """
+    outputs = [settings.config.path_bin_file, settings.config.path_artifact_file]
+    if not no_python_file:
+        outputs.append(settings.config.path_python_file)
+    if compile_module:
+        outputs.append(settings.config.path_compiled_module_file)
+    try:
+        previous_hash = settings.config.path_input_hash_file.read_text()
+    except OSError:
+        return False
+    return previous_hash == input_hash and all(path.exists() for path in outputs)
+
+
+def warn(text: str) -> str:
+    """Styles text to yellow."""
+    return click.style(f"WARNING: {text}", fg="yellow", bold=True)
+
+
 def good(text: str) -> str:
     """Styles text to green."""
     return click.style(f"INFO: {text}", fg="green", bold=True)
@@ -97,28 +462,91 @@ def app():
 
 
 @click.option("--no-python-file", is_flag=True, type=bool, default=False)
-@click.argument("file", type=click.File("r"))
+@click.option("--compile-module", is_flag=True, type=bool, default=False)
+@click.option("--force", is_flag=True, type=bool, default=False)
+@click.argument(
+    "files",
+    nargs=-1,
+    required=True,
+    type=click.Path(
+        exists=True, readable=True, allow_dash=True, path_type=pathlib.Path
+    ),
+)
 @app.command()
 def create(
-    file: io.TextIOWrapper,
+    files: Tuple[pathlib.Path, ...],
     no_python_file: bool,
+    compile_module: bool,
+    force: bool,
 ):
-    """Parses FILENAME with declared respo resource policies.
+    """Parses FILES with declared respo resource policies.
 
-    Creates pickled model representation by default in .respo_cache folder
-    and python file with generated model in respo_model.py to improve
-    typing support for end user.
+    FILES are yml, json or toml files or directories with them, - reads yml
+    from standard input. Sections permissions, principles and roles can be
+    split across many files. They are parsed
+    in parallel and merged. Creates pickled model representation by default
+    in .respo_cache folder and python file with generated model in
+    respo_model.py to improve typing support for end user. Stable role ids
+    are kept in respo_roles_ids.json, that should be committed. With
+    --compile-module, also python module with model compiled to literals in
+    respo_compiled.py, that can be imported instead of loading pickle. When
+    input, respo version and settings did not change since last run, nothing
+    is rebuilt, unless --force is used.
     """
 
-    click.echo(good(f"Validating respo model from {file.name}..."))
     start_time = time.time()
     try:
-        data = yaml.safe_load(file.read())
-        respo_model = core.RespoModel.parse_obj(data)
-    except yaml.YAMLError as yml_error:
-        click.echo(f"\n{yml_error}\n")
-        click.echo(bad("Could not process file, yml syntax is invalid"))
+        policy_files = find_policy_files(files)
+    except PolicyFileError as policy_error:
+        click.echo(bad(str(policy_error)))
+        raise click.Abort()
+    names = [str(policy_file) for policy_file in policy_files]
+    contents = [
+        click.get_text_stream("stdin").read()
+        if name == "-"
+        else policy_file.read_text()
+        for name, policy_file in zip(names, policy_files)
+    ]
+    input_name = names[0] if len(names) == 1 else f"{len(names)} files"
+    try:
+        roles_ids = load_roles_ids()
+    except PolicyFileError as policy_error:
+        click.echo(bad(str(policy_error)))
         raise click.Abort()
+
+    input_hash = create_input_hash(
+        names, contents, no_python_file, compile_module, roles_ids
+    )
+    if not force and is_create_cache_hit(input_hash, no_python_file, compile_module):
+        click.echo(
+            good(
+                f"Cache hit, {input_name} did not change since last respo create. "
+                "Use --force to rebuild."
+            )
+        )
+        click.echo(good("Success!"))
+        return
+
+    click.echo(good(f"Validating respo model from {input_name}..."))
+    phase_time = time.perf_counter()
+    try:
+        policies = parse_policy_files(names, contents)
+    except PolicyFileError as policy_error:
+        click.echo(f"\n{policy_error}\n")
+        click.echo(bad("Could not process file, syntax is invalid"))
+        raise click.Abort()
+    try:
+        data = merge_policy_files(names, policies)
+    except PolicyFileError as policy_error:
+        click.echo(bad("Could not merge policy files"))
+        click.echo(f"\n{policy_error}\n")
+        raise click.Abort()
+    parse_time = time.perf_counter() - phase_time
+    phase_time = time.perf_counter()
+    try:
+        if isinstance(data, dict) and "roles_ids" not in data:
+            data["roles_ids"] = roles_ids
+        respo_model = core.RespoModel.parse_obj(data)
     except pydantic.ValidationError as respo_errors:
         errors = [
             error
@@ -140,16 +568,113 @@ def create(
         )
         raise click.Abort()
 
+    validate_time = time.perf_counter() - phase_time
+    phase_time = time.perf_counter()
+    # outputs are rewritten one by one, input hash written last marks them
+    # complete, so interrupted run is never taken for cache hit
+    try:
+        os.remove(settings.config.path_input_hash_file)
+    except FileNotFoundError:
+        pass
     save_respo_model(respo_model)
     if not no_python_file:
         generate_respo_model_file(respo_model=respo_model)
 
     click.echo(good(f"Saved binary file to {settings.config.path_bin_file}"))
     click.echo(good(f"Saved python file to {settings.config.path_python_file}"))
+    if compile_module:
+        generate_compiled_module(respo_model=respo_model)
+        click.echo(
+            good(
+                "Saved compiled module to "
+                f"{settings.config.path_compiled_module_file}"
+            )
+        )
+
+    save_roles_ids(respo_model)
+    click.echo(good(f"Saved roles ids to {settings.config.path_roles_ids_file}"))
+    roles_over_limit = [
+        role for role in respo_model.ROLES if respo_model.roles_ids[role] >= 63
+    ]
+    if roles_over_limit:
+        click.echo(
+            warn(
+                f"Roles {', '.join(roles_over_limit)} have ids 63 or greater and "
+                "cannot be stored in SQLAlchemyBitmaskRespoField columns, "
+                "see respo.fields.sqlalchemy.BIGINTRespoField"
+            )
+        )
+
+    input_hash = create_input_hash(
+        names, contents, no_python_file, compile_module, respo_model.roles_ids
+    )
+    write_file_atomically(settings.config.path_input_hash_file, input_hash.encode())
+    serialize_time = time.perf_counter() - phase_time
 
     process_time = round(time.time() - start_time, 4)
     bin_file_size = round(os.path.getsize(settings.config.path_bin_file) / 1048576, 4)
+    click.echo(
+        good(
+            f"Parsed in {round(parse_time, 4)}s, "
+            f"validated in {round(validate_time, 4)}s, "
+            f"serialized in {round(serialize_time, 4)}s."
+        )
+    )
     click.echo(
         good(f"Processed in {process_time}s. Bin file size: {bin_file_size} mb.")
     )
     click.echo(good("Success!"))
+
+
+@click.option("--permissions", type=click.IntRange(min=1), default=1000)
+@click.option("--roles", type=click.IntRange(min=0), default=100)
+@click.option("--role-permissions", type=click.IntRange(min=0), default=20)
+@click.option("--include-depth", type=click.IntRange(min=0), default=2)
+@click.option("--principles", type=click.IntRange(min=0), default=None)
+@click.option("--principle-fan-out", type=click.IntRange(min=0), default=3)
+@click.option("--seed", type=int, default=0)
+@click.argument(
+    "file", type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path)
+)
+@app.command("generate-fixture")
+def generate_fixture(
+    file: pathlib.Path,
+    permissions: int,
+    roles: int,
+    role_permissions: int,
+    include_depth: int,
+    principles: Optional[int],
+    principle_fan_out: int,
+    seed: int,
+):
+    """Writes synthetic policy to FILE, for benchmarks and tests.
+
+    Policy is the same for the same options, see respo.fixture.generate_policy.
+    FILE with .json suffix is written as json, any other as yml. By default
+    there is 1 principle per 10 permissions.
+    """
+
+    policy = fixture.generate_policy(
+        permissions=permissions,
+        roles=roles,
+        role_permissions=role_permissions,
+        include_depth=include_depth,
+        principles=principles,
+        principle_fan_out=principle_fan_out,
+        seed=seed,
+    )
+    if file.suffix == ".json":
+        content = json.dumps(policy, indent=2)
+    else:
+        content = yaml.dump(
+            policy,
+            Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+            sort_keys=False,
+        )
+    write_file_atomically(file, content.encode())
+    click.echo(
+        good(
+            f"Saved policy with {permissions} permissions, "
+            f"{len(policy['principles'])} principles and {roles} roles to {file}"
+        )
+    )
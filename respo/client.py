@@ -1,7 +1,115 @@
-from typing import List, Optional
+import functools
+import sys
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from respo import core, exceptions, settings
 
+RespoClientT = TypeVar("RespoClientT", bound="RespoClient")
+
+
+@functools.lru_cache(maxsize=settings.config.RESPO_CLIENT_ROLES_CACHE_SIZE)
+def _shared_roles(raw_roles: str) -> Tuple[str, Dict[str, None]]:
+    """Returns first seen equal raw roles string and its parsed, interned roles.
+
+    Returned dict is shared by many clients and must never be changed,
+    see RespoClient.from_cached.
+    """
+    if not raw_roles:
+        return raw_roles, {}
+    return raw_roles, dict.fromkeys(sys.intern(role) for role in raw_roles.split(","))
+
+
+class RolesView(MutableSequence[str]):
+    """Live list-like view of RespoClient roles.
+
+    Changes made through the view change the client, so code written for
+    roles stored in plain list keeps working. append and remove go through
+    RespoClient add_role_unchecked and remove_role_unchecked, other changes
+    replace all roles at once with RespoClient _replace_roles, so subclasses
+    (like MutableRespoClient) validate new roles before they are set. Roles
+    are ordered set, so role that is already there is not added again.
+    Compares equal to list or tuple with the same roles.
+
+    Examples:
+        >>> client = RespoClient("abc")
+        >>> client.roles.append("def")
+        >>> str(client)
+        "abc,def"
+    """
+
+    __slots__ = ("_client",)
+
+    def __init__(self, respo_client: "RespoClient") -> None:
+        self._client = respo_client
+
+    def __len__(self) -> int:
+        return len(self._client._roles_set())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._client._roles_set())
+
+    def __contains__(self, role_name: object) -> bool:
+        return role_name in self._client._roles_set()
+
+    def __getitem__(self, index):
+        return list(self._client._roles_set())[index]
+
+    def __setitem__(self, index, value) -> None:
+        roles = list(self)
+        roles[index] = value
+        self._replace(roles)
+
+    def __delitem__(self, index) -> None:
+        roles = list(self)
+        del roles[index]
+        self._replace(roles)
+
+    def insert(self, index: int, value: str) -> None:
+        roles = list(self)
+        roles.insert(index, value)
+        self._replace(roles)
+
+    def append(self, value: str) -> None:
+        self._client.add_role_unchecked(value)
+
+    def remove(self, value: str) -> None:
+        if not self._client.remove_role_unchecked(value):
+            raise ValueError(f"{value} not in roles")
+
+    def extend(self, values: Iterable[str]) -> None:
+        self._replace([*self, *values])
+
+    def clear(self) -> None:
+        self._replace([])
+
+    def copy(self) -> List[str]:
+        return list(self)
+
+    def _replace(self, roles: List[str]) -> None:
+        self._client._replace_roles(list(dict.fromkeys(roles)))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, tuple, RolesView)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
 
 class RespoClient:
     """Entity that can be given a role.
@@ -10,25 +118,114 @@ class RespoClient:
     has_permission() for checking them using respo.RespoModel instance.
 
     Args:
-        roles: string with roles separated by comma
+        roles: string with roles separated by comma, it is parsed on first
+        access to roles, so clients loaded from database that are never
+        checked don't pay for it
+
+    Roles are kept in insertion ordered dict used as set, so adding, removing
+    and checking roles is O(1). Instances use __slots__ to stay small when
+    many of them are kept in memory.
 
     Examples:
         >>> RespoClient(None).roles
         []
         >>> RespoClient("abc,def").roles
         ["abc", "def"]
+        >>> "abc" in RespoClient("abc,def")
+        True
         >>> str(RespoClient("abc,def"))
         "abc,def"
     """
 
+    __slots__ = (
+        "_raw_roles",
+        "_roles",
+        "_roles_shared",
+        "_effective_permissions_cache",
+    )
+
     def __init__(self, roles: str = "") -> None:
-        if not roles:
-            self.roles: List[str] = []
-        else:
-            self.roles: List[str] = roles.split(",")
+        self._raw_roles: Optional[str] = roles or ""
+        self._roles: Optional[Dict[str, None]] = None
+        self._roles_shared = False
+        # roles, fingerprint of respo model and permissions, model itself is
+        # not referenced, so it is not pickled with client nor kept alive
+        self._effective_permissions_cache: Optional[
+            Tuple[Tuple[str, ...], str, FrozenSet[str]]
+        ] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(getattr(self, "__dict__", {}))
+        state["_raw_roles"] = str(self)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state = dict(state)
+        self._raw_roles = state.pop("_raw_roles", "")
+        self._roles = None
+        self._roles_shared = False
+        self._effective_permissions_cache = None
+        if state:
+            self.__dict__.update(state)
+
+    def _roles_set(self) -> Dict[str, None]:
+        if self._roles is None:
+            raw_roles: str = self._raw_roles  # type: ignore
+            self._roles = dict.fromkeys(raw_roles.split(",")) if raw_roles else {}
+            if len(self._roles) == raw_roles.count(",") + 1:
+                # no duplicates, so __str__ can rebuild raw roles byte by byte
+                self._raw_roles = None
+        return self._roles
+
+    @classmethod
+    def from_cached(cls: Type[RespoClientT], roles: Optional[str]) -> RespoClientT:
+        """Creates client sharing parsed roles with clients from equal string.
+
+        Meant for loading rows from database, where the same few roles
+        strings repeat in millions of rows. Parsed roles (with interned role
+        names) and raw string are taken from process-wide LRU cache keyed by
+        the string, with size respo.config.RESPO_CLIENT_ROLES_CACHE_SIZE.
+        Shared roles are copied only when add_role or remove_role changes them.
+
+        Examples:
+            >>> RespoClient.from_cached("admin")._roles is RespoClient.from_cached("admin")._roles
+            True
+        """
+        respo_client = cls()
+        respo_client._raw_roles, respo_client._roles = _shared_roles(roles or "")
+        respo_client._roles_shared = True
+        return respo_client
+
+    def _owned_roles(self) -> Dict[str, None]:
+        roles = self._roles_set()
+        if self._roles_shared:
+            roles = self._roles = dict(roles)
+            self._roles_shared = False
+        return roles
+
+    @property
+    def roles(self) -> RolesView:
+        """Live view of client roles in order they were added."""
+        return RolesView(self)
+
+    @roles.setter
+    def roles(self, roles: Iterable[str]) -> None:
+        self._roles = dict.fromkeys(roles)
+        self._roles_shared = False
+        self._raw_roles = None
+        self._effective_permissions_cache = None
+
+    def _replace_roles(self, roles: List[str]) -> None:
+        """Replaces all roles, used by RolesView, subclasses validate them here."""
+        self.roles = roles
+
+    def __contains__(self, role_name: str) -> bool:
+        return role_name in self._roles_set()
 
     def __str__(self) -> str:
-        return ",".join(self.roles)
+        if self._raw_roles is not None:
+            return self._raw_roles
+        return ",".join(self._roles_set())
 
     @staticmethod
     def validate_role(role_name: str, respo_model: core.RespoModel) -> core.RoleLabel:
@@ -46,6 +243,29 @@ class RespoClient:
             )
         return role_label
 
+    @classmethod
+    def _checked_role_name(
+        cls,
+        role_name: str,
+        respo_model: Optional[core.RespoModel],
+        validate_input: bool,
+    ) -> str:
+        """Returns role_name after validation used in add_role and remove_role.
+
+        Every role in respo model was already validated, so when role_name
+        is found there, regex is skipped. It runs only for names outside of
+        the model, to raise proper error or validate label without model.
+        """
+        if validate_input and respo_model is None:
+            raise TypeError("respo_model cannot be None when validate_input is True")
+        if respo_model is not None and role_name in respo_model.ROLES:
+            return role_name
+        if validate_input:
+            return cls.validate_role(
+                role_name=role_name, respo_model=respo_model  # type: ignore
+            ).role_label
+        return core.RoleLabel(role_name=role_name).role_label
+
     def add_role(
         self,
         role_name: str,
@@ -80,19 +300,27 @@ class RespoClient:
                 )
             False
         """
-        if validate_input and respo_model is not None:
-            role_label = self.validate_role(
-                role_name=role_name, respo_model=respo_model
-            )
-        elif validate_input and respo_model is None:
-            raise TypeError("respo_model cannot be None when validate_input is True")
-        else:
-            role_label = core.RoleLabel(role_name=role_name)
+        return self.add_role_unchecked(
+            self._checked_role_name(role_name, respo_model, validate_input)
+        )
+
+    def add_role_unchecked(self, role_name: str) -> bool:
+        """Adds role to this client without any validation.
 
-        if role_label.role_label in self.roles:
+        Meant for trusted, hot code paths where role_name is known to be
+        valid, for example taken from respo_model.ROLES. Invalid role_name
+        will be saved as is.
+
+        Return:
+            True: role was added.
+            False: role already exists in the client.
+        """
+        if role_name in self._roles_set():
             return False
         else:
-            self.roles.append(role_label.role_label)
+            self._owned_roles()[role_name] = None
+            self._raw_roles = None
+            self._effective_permissions_cache = None
             return True
 
     def remove_role(
@@ -129,29 +357,81 @@ class RespoClient:
                 )
             False
         """
-        if validate_input and respo_model is not None:
-            role_label = self.validate_role(
-                role_name=role_name, respo_model=respo_model
-            )
-        elif validate_input and respo_model is None:
-            raise TypeError("respo_model cannot be None when validate_input is True")
-        else:
-            role_label = core.RoleLabel(role_name=role_name)
+        return self.remove_role_unchecked(
+            self._checked_role_name(role_name, respo_model, validate_input)
+        )
+
+    def remove_role_unchecked(self, role_name: str) -> bool:
+        """Removes role from this client without any validation.
 
-        if role_label.role_label in self.roles:
-            self.roles.remove(role_label.role_label)
+        Meant for trusted, hot code paths where role_name is known to be valid.
+
+        Return:
+            True: role was removed.
+            False: role does not exists in the client.
+        """
+        if role_name in self._roles_set():
+            del self._owned_roles()[role_name]
+            self._raw_roles = None
+            self._effective_permissions_cache = None
             return True
         else:
             return False
 
+    def effective_permissions(self, respo_model: core.RespoModel) -> FrozenSet[str]:
+        """Returns all permissions granted to *this* client by its roles.
+
+        Result is cached on the client, cache key is tuple of client roles
+        and respo_model fingerprint. It is invalidated by add_role and
+        remove_role, so subsequent calls with the same model are just a tuple
+        comparison. Cache is not pickled or copied with the client.
+        On cache miss, permissions are taken from respo_model roles cache
+        shared by all clients.
+
+        Raises:
+            RespoModelError: one of client roles does not exist in model.
+
+        Examples:
+            >>> RespoClient("default").effective_permissions(respo_model)
+            frozenset({"book.list", "book.read", "user.read_all", "user.read_basic"})
+        """
+        roles_key = tuple(self._roles_set())
+        cache = self._effective_permissions_cache
+        fingerprint = respo_model.fingerprint
+        if cache is not None and cache[1] == fingerprint and cache[0] == roles_key:
+            return cache[2]
+
+        permissions = respo_model.effective_permissions(roles_key)
+        self._effective_permissions_cache = (roles_key, fingerprint, permissions)
+        return permissions
+
+    @staticmethod
+    def validate_permission(permission_name: str, respo_model: core.RespoModel) -> None:
+        """Validates permission name, skipping regex for permissions in model.
+
+        Permission is not required to exist in the model, it is used before
+        checking permissions and building permission filters.
+
+        Raises:
+            ValueError: permission_name doesn't match double label regex.
+
+        Examples:
+            >>> RespoClient.validate_permission("user.read_all", respo_model)
+            >>> RespoClient.validate_permission("invalid", respo_model)
+            ValueError
+        """
+        if permission_name not in respo_model.PERMS:
+            core.PermissionLabel(permission_name)
+
     def has_permission(
         self, permission_name: str, respo_model: core.RespoModel
     ) -> bool:
         """Checks if *this* client does have specific permission.
 
-        Under the hood searches through prepared role-permissions dict to
-        speed this up (after resolving the complex nested rules logic etc).
-        For very large self.roles this can be pretty slow anyway.
+        Under the hood checks client's effective permissions (after resolving
+        the complex nested rules logic etc), that are cached on the client
+        and invalidated only when its roles change. Permissions found in
+        respo_model are not validated against regex again.
 
         Return:
             True: client has permission.
@@ -159,6 +439,7 @@ class RespoClient:
 
         Raises:
             ValueError: permission_name doesn't match double label regex.
+            RespoModelError: one of client roles does not exist in model.
 
         Examples:
             >>> respo_client.has_permission("users.read", respo_model)
@@ -168,8 +449,78 @@ class RespoClient:
                 )
             True
         """
-        permission_label = core.PermissionLabel(permission_name)
-        for role in self.roles:
-            if permission_label.permission_name in respo_model.ROLES.permissions(role):
-                return True
-        return False
+        self.validate_permission(permission_name, respo_model)
+        return permission_name in self.effective_permissions(respo_model)
+
+    def has_permission_unchecked(
+        self, permission_name: str, respo_model: core.RespoModel
+    ) -> bool:
+        """Checks if *this* client does have specific permission, without validation.
+
+        Meant for trusted, hot code paths, for example with permission_name
+        taken from respo_model.PERMS. Invalid permission_name gives False.
+
+        Raises:
+            RespoModelError: one of client roles does not exist in model.
+        """
+        return permission_name in self.effective_permissions(respo_model)
+
+    def check_many(
+        self, permission_names: Iterable[str], respo_model: core.RespoModel
+    ) -> Dict[str, bool]:
+        """Checks if *this* client does have each of given permissions.
+
+        Client's effective permissions are resolved once and every permission
+        is validated and checked in a single pass.
+
+        Return:
+            Dict with permission names as keys and results as values.
+
+        Raises:
+            ValueError: one of permission_names doesn't match double label regex.
+            RespoModelError: one of client roles does not exist in model.
+
+        Examples:
+            >>> respo_client.check_many(["book.read", "book.sell"], respo_model)
+            {"book.read": True, "book.sell": False}
+        """
+        permissions = self.effective_permissions(respo_model)
+        result: Dict[str, bool] = {}
+        for permission_name in permission_names:
+            self.validate_permission(permission_name, respo_model)
+            result[permission_name] = permission_name in permissions
+        return result
+
+    def has_all(
+        self, permission_names: Iterable[str], respo_model: core.RespoModel
+    ) -> bool:
+        """Checks if *this* client does have all of given permissions.
+
+        All permission_names are validated, True for empty permission_names.
+
+        Raises:
+            ValueError: one of permission_names doesn't match double label regex.
+            RespoModelError: one of client roles does not exist in model.
+
+        Examples:
+            >>> respo_client.has_all(["book.read", "book.sell"], respo_model)
+            False
+        """
+        return all(self.check_many(permission_names, respo_model).values())
+
+    def has_any(
+        self, permission_names: Iterable[str], respo_model: core.RespoModel
+    ) -> bool:
+        """Checks if *this* client does have at least one of given permissions.
+
+        All permission_names are validated, False for empty permission_names.
+
+        Raises:
+            ValueError: one of permission_names doesn't match double label regex.
+            RespoModelError: one of client roles does not exist in model.
+
+        Examples:
+            >>> respo_client.has_any(["book.read", "book.sell"], respo_model)
+            True
+        """
+        return any(self.check_many(permission_names, respo_model).values())
@@ -0,0 +1,193 @@
+import functools
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from respo import exceptions
+
+
+class CompiledLabelsContainer:
+    """Labels of CompiledRespoModel accessible as attributes.
+
+    Works like RespoModel PERMS and ROLES: attribute name is label upper
+    cased with dots replaced by "__". Names are built on first attribute
+    access, so importing compiled module stays cheap.
+
+    Examples:
+        >>> respo_model.PERMS.USER__READ_ALL
+        "user.read_all"
+        >>> "user.read_all" in respo_model.PERMS
+        True
+    """
+
+    def __init__(self, respo_model: "CompiledRespoModel", labels: Dict[str, Any]):
+        self.respo_model = respo_model
+        self._labels = labels
+        self._attributes: Optional[Dict[str, str]] = None
+
+    def _labels_attributes(self) -> Dict[str, str]:
+        if self._attributes is None:
+            self._attributes = {
+                label.upper().replace(".", "__"): label for label in self._labels
+            }
+        return self._attributes
+
+    def __getattr__(self, name: str) -> str:
+        if not name.startswith("_"):
+            label = self._labels_attributes().get(name)
+            if label is not None:
+                return label
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    def __dir__(self) -> List[str]:
+        return sorted({*super().__dir__(), *self._labels_attributes()})
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._labels)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._labels
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __str__(self) -> str:
+        return str(list(self._labels))
+
+
+class CompiledPERMSContainer(CompiledLabelsContainer):
+    """CompiledLabelsContainer variation for PERMS"""
+
+    def bitmask(self, permission_name: str) -> int:
+        if permission_name in self:
+            return 1 << self.respo_model.permissions_ids[permission_name]
+        raise exceptions.RespoModelError(
+            "Could not get bitmask for permission\n"
+            f"Permission does not exist in respo model: {permission_name}"
+        )
+
+    def roles(self, permission_name: str) -> List[str]:
+        if permission_name in self:
+            return [
+                role_name
+                for role_name, role_permissions in (
+                    self.respo_model.roles_permissions.items()
+                )
+                if permission_name in role_permissions
+            ]
+        raise exceptions.RespoModelError(
+            "Could not get roles for permission\n"
+            f"Permission does not exist in respo model: {permission_name}"
+        )
+
+
+class CompiledROLESContainer(CompiledLabelsContainer):
+    """CompiledLabelsContainer variation for ROLES"""
+
+    def permissions(self, role_name: str) -> List[str]:
+        if role_name in self:
+            return sorted(self.respo_model.roles_permissions[role_name])
+        raise exceptions.RespoModelError(
+            "Could not get permissions for role\n"
+            f"Role does not exist in respo model: {role_name}"
+        )
+
+    def bitmask(self, role_name: str) -> int:
+        if role_name in self:
+            return self.respo_model.roles_bitmasks[role_name]
+        raise exceptions.RespoModelError(
+            "Could not get bitmask for role\n"
+            f"Role does not exist in respo model: {role_name}"
+        )
+
+
+class CompiledRespoModel:
+    """Read-only respo model built from precompiled tables, without pydantic.
+
+    Instances are created by python module generated with command
+    respo create --compile-module FILENAME, so loading policy is a normal
+    import of literals served from .pyc file, without pickle and pydantic
+    validation. It supports the part of RespoModel used by RespoClient to
+    check permissions.
+
+    Args:
+        permissions_ids: permissions with their ids, ordered by ids
+        roles_ids: roles with their stable ids
+        roles_permissions: roles with all permissions they grant
+        roles_bitmasks: roles with bitmasks of permissions they grant
+        fingerprint: fingerprint of compiled RespoModel
+
+    Examples:
+        >>> from respo_compiled import respo_model
+        >>> respo_model.has_permission(["admin"], "user.read_all")
+        True
+        >>> respo_model.PERMS.USER__READ_ALL
+        "user.read_all"
+        >>> RespoClient("admin").has_permission("user.read_all", respo_model)
+        True
+    """
+
+    def __init__(
+        self,
+        permissions_ids: Dict[str, int],
+        roles_ids: Dict[str, int],
+        roles_permissions: Dict[str, FrozenSet[str]],
+        roles_bitmasks: Dict[str, int],
+        fingerprint: str,
+    ) -> None:
+        self.permissions: Tuple[str, ...] = tuple(permissions_ids)
+        self.permissions_ids = permissions_ids
+        self.roles_ids = roles_ids
+        self.roles_permissions = roles_permissions
+        self.roles_bitmasks = roles_bitmasks
+        self.fingerprint = fingerprint
+        self.PERMS = CompiledPERMSContainer(self, permissions_ids)
+        self.ROLES = CompiledROLESContainer(self, roles_permissions)
+        self._cached_effective_permissions = functools.lru_cache(maxsize=1024)(
+            self._effective_permissions
+        )
+
+    def _role_permissions(self, role_name: str) -> FrozenSet[str]:
+        role_permissions = self.roles_permissions.get(role_name)
+        if role_permissions is None:
+            raise exceptions.RespoModelError(
+                f"Role does not exist in respo model: {role_name}"
+            )
+        return role_permissions
+
+    def roles_bitmask(self, roles: Iterable[str]) -> int:
+        """Returns union of compiled permissions bitmasks for given roles.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+        """
+        bitmask = 0
+        for role_name in roles:
+            self._role_permissions(role_name)
+            bitmask |= self.roles_bitmasks[role_name]
+        return bitmask
+
+    def has_permission(self, roles: Iterable[str], permission_name: str) -> bool:
+        """Checks if any of given roles grants permission.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+        """
+        granted = False
+        for role_name in roles:
+            if permission_name in self._role_permissions(role_name):
+                granted = True
+        return granted
+
+    def effective_permissions(self, roles: Iterable[str]) -> FrozenSet[str]:
+        """Returns all permissions granted by given roles, cached in LRU cache.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+        """
+        return self._cached_effective_permissions(tuple(sorted(set(roles))))
+
+    def _effective_permissions(self, roles_key: Tuple[str, ...]) -> FrozenSet[str]:
+        return frozenset().union(
+            *(self._role_permissions(role_name) for role_name in roles_key)
+        )
@@ -1,11 +1,37 @@
+import collections
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
 import pickle
 import re
-from typing import Dict, Iterator, List, Optional, Set
+import sys
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import pydantic
 
 from respo import exceptions, settings
 
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy
+
+    from respo.client import RespoClient
+
 SINGLE_LABEL_REGEX = re.compile(r"^[a-z_0-9]{1,}$")
 DOUBLE_LABEL_REGEX = re.compile(r"^[a-z_0-9]{1,}\.[a-z_0-9]{1,}$")
 
@@ -14,11 +40,45 @@ class SingleLabel(pydantic.ConstrainedStr):
     regex = SINGLE_LABEL_REGEX
     max_length = 128
 
+    @classmethod
+    def __get_validators__(cls):
+        # one validator instead of pydantic constr chain, labels are validated
+        # tens of thousands of times in big policies
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value: str) -> str:
+        value = pydantic.validators.str_validator(value)
+        if len(value) > cls.max_length:
+            raise pydantic.errors.AnyStrMaxLengthError(limit_value=cls.max_length)
+        # compiled pattern is matched directly, re.match would look it up in
+        # re module cache for every label
+        if SINGLE_LABEL_REGEX.match(value) is None:
+            raise pydantic.errors.StrRegexError(pattern=SINGLE_LABEL_REGEX.pattern)
+        return value
+
 
 class DoubleDotLabel(pydantic.ConstrainedStr):
     regex = DOUBLE_LABEL_REGEX
     max_length = 128
 
+    @classmethod
+    def __get_validators__(cls):
+        # one validator instead of pydantic constr chain, labels are validated
+        # tens of thousands of times in big policies
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value: str) -> str:
+        value = pydantic.validators.str_validator(value)
+        if len(value) > cls.max_length:
+            raise pydantic.errors.AnyStrMaxLengthError(limit_value=cls.max_length)
+        # compiled pattern is matched directly, re.match would look it up in
+        # re module cache for every label
+        if DOUBLE_LABEL_REGEX.match(value) is None:
+            raise pydantic.errors.StrRegexError(pattern=DOUBLE_LABEL_REGEX.pattern)
+        return value
+
 
 class PermissionLabel:
     """Helper class for double (permission) labels validation.
@@ -90,6 +150,11 @@ class LabelsContainer:
     def _add_item(self, label: str) -> None:
         self.__dict__[label.upper().replace(".", "__")] = label
 
+    def _add_items(self, labels: Iterable[str]) -> None:
+        self.__dict__.update(
+            {label.upper().replace(".", "__"): label for label in labels}
+        )
+
 
 class PERMSContainer(LabelsContainer):
     """LabelsContainer variation for PERMS"""
@@ -101,11 +166,27 @@ class PERMSContainer(LabelsContainer):
         return str(self.respo_model.permissions)
 
     def __contains__(self, key: str) -> bool:
-        return key in self.respo_model.permissions
+        return key in self.respo_model.permissions_ids
 
     def __len__(self):
         return len(self.respo_model.permissions)
 
+    def bitmask(self, permission_name: str) -> int:
+        if permission_name in self:
+            return 1 << self.respo_model.permissions_ids[permission_name]
+        raise exceptions.RespoModelError(
+            "Could not get bitmask for permission\n"
+            f"Permission does not exist in respo model: {permission_name}"
+        )
+
+    def roles(self, permission_name: str) -> List[str]:
+        if permission_name in self:
+            return self.respo_model.permissions_roles[permission_name]
+        raise exceptions.RespoModelError(
+            "Could not get roles for permission\n"
+            f"Permission does not exist in respo model: {permission_name}"
+        )
+
     def __eq__(self, other: object):
         if not isinstance(other, PERMSContainer):
             raise ValueError(f"Cannot comapre to other instance: {other}")
@@ -132,6 +213,14 @@ class ROLESContainer(LabelsContainer):
             f"Role does not exist in respo model: {role_name}"
         )
 
+    def bitmask(self, role_name: str) -> int:
+        if role_name in self:
+            return self.respo_model.roles_bitmasks[role_name]
+        raise exceptions.RespoModelError(
+            "Could not get bitmask for role\n"
+            f"Role does not exist in respo model: {role_name}"
+        )
+
     def __eq__(self, other: object):
         if not isinstance(other, ROLESContainer):
             raise ValueError(f"Cannot comapre to other instance: {other}")
@@ -141,6 +230,163 @@ class ROLESContainer(LabelsContainer):
         return len(self.respo_model.roles_permissions)
 
 
+class RolesCacheInfo(NamedTuple):
+    """Statistics of RolesCache, similar to functools.lru_cache cache_info()."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class RolesCache:
+    """Thread-safe LRU cache of roles combinations and their permissions.
+
+    Keys are canonical (sorted, deduplicated) tuples of role names. Cache is
+    never pickled with respo model, after loading the model it starts empty
+    with maxsize taken from settings.
+
+    Examples:
+        >>> roles_cache = RolesCache(maxsize=2)
+        >>> roles_cache.put(("admin", "default"), frozenset({"user.read"}))
+        >>> roles_cache.get(("admin", "default"))
+        frozenset({"user.read"})
+        >>> roles_cache.info()
+        RolesCacheInfo(hits=1, misses=0, evictions=0, maxsize=2, currsize=1)
+    """
+
+    def __init__(self, maxsize: Optional[int] = None) -> None:
+        if maxsize is None:
+            maxsize = settings.config.RESPO_ROLES_CACHE_SIZE
+        self.maxsize = max(maxsize, 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "collections.OrderedDict[Tuple[str, ...], FrozenSet[str]]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return (self.__class__, ())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, roles_key: Tuple[str, ...]) -> Optional[FrozenSet[str]]:
+        with self._lock:
+            permissions = self._data.get(roles_key)
+            if permissions is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(roles_key)
+            return permissions
+
+    def put(self, roles_key: Tuple[str, ...], permissions: FrozenSet[str]) -> None:
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[roles_key] = permissions
+            self._data.move_to_end(roles_key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> RolesCacheInfo:
+        with self._lock:
+            return RolesCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                maxsize=self.maxsize,
+                currsize=len(self._data),
+            )
+
+
+def _strongly_connected_components(
+    graph: Dict[str, List[str]], roots: Optional[Iterable[str]] = None
+) -> List[List[str]]:
+    """Finds strongly connected components of directed graph.
+
+    Iterative version of Tarjan's algorithm, works in O(V+E) time. Components
+    are returned in reverse topological order, that is every component comes
+    after all components reachable from it. Nodes that appear only as
+    successors are treated as nodes without outgoing edges. With roots given,
+    only nodes reachable from roots are visited.
+    """
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+
+    for root in graph if roots is None else roots:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component: List[str] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def _transitive_closures(
+    graph: Dict[str, List[str]], roots: Optional[Iterable[str]] = None
+) -> Dict[str, FrozenSet[str]]:
+    """Computes set of nodes reachable from every node of graph (node included).
+
+    Closure is computed once per strongly connected component, in reverse
+    topological order, so closures of successors are always ready to be reused.
+    Nodes in the same component share one frozenset. With roots given, only
+    closures of nodes reachable from roots are computed.
+    """
+    closures: Dict[str, FrozenSet[str]] = {}
+    for component in _strongly_connected_components(graph, roots):
+        closure: Set[str] = set(component)
+        for node in component:
+            for successor in graph.get(node, ()):
+                if successor not in closure:
+                    closure |= closures[successor]
+        component_closure = frozenset(closure)
+        for node in component:
+            closures[node] = component_closure
+    return closures
+
+
 class Role(pydantic.BaseModel):
     """Represents single role in yml file."""
 
@@ -173,6 +419,10 @@ class RespoModel(pydantic.BaseModel):
         True
         >>> "default" in respo_model.ROLES
         True
+        >>> respo_model.PERMS.roles("users.delete")
+        ["admin", "superadmin"]
+        >>> respo_model.fingerprint  # changes when permissions or roles change
+        <sha256 hexdigest of compiled permissions and roles>
         >>> for role in respo_model.ROLES:
         >>>     ...
         >>> for perm in respo_model.PERMS:
@@ -183,8 +433,16 @@ class RespoModel(pydantic.BaseModel):
     principles: List[Principle] = []
     roles: List[Role]
     roles_permissions: Dict[str, List[str]] = {}
+    permissions_ids: Dict[str, int] = {}
+    roles_bitmasks: Dict[str, int] = {}
+    permissions_roles: Dict[str, List[str]] = {}
+    roles_ids: Dict[str, int] = {}
+    fingerprint: str = ""
     ROLES: ROLESContainer = None  # type: ignore
     PERMS: PERMSContainer = None  # type: ignore
+    _roles_cache: RolesCache = pydantic.PrivateAttr(default_factory=RolesCache)
+    _roles_by_id: Dict[int, str] = pydantic.PrivateAttr(default_factory=dict)
+    _packed_matrix: Optional["numpy.ndarray"] = pydantic.PrivateAttr(default=None)
 
     class Config:
         arbitrary_types_allowed = True
@@ -194,66 +452,284 @@ class RespoModel(pydantic.BaseModel):
         self.ROLES = ROLESContainer(self)
         self.PERMS = PERMSContainer(self)
         for role in self.roles:
-            self.ROLES._add_item(str(role.name))
-            self.roles_permissions[str(role.name)] = []
-            for permission in role.permissions:
-                self.roles_permissions[str(role.name)].append(str(permission))
-        for permission in self.permissions:
-            self.PERMS._add_item(str(permission))
+            role_name = sys.intern(str(role.name))
+            self.roles_permissions[role_name] = [
+                sys.intern(str(permission)) for permission in role.permissions
+            ]
+        self.ROLES._add_items(self.roles_permissions)
+        self.permissions_ids = {
+            sys.intern(str(permission)): permission_id
+            for permission_id, permission in enumerate(self.permissions)
+        }
+        self.PERMS._add_items(self.permissions_ids)
+        self.permissions_roles = {permission: [] for permission in self.permissions_ids}
+        for role_name, role_permissions in self.roles_permissions.items():
+            for permission in role_permissions:
+                self.permissions_roles[permission].append(role_name)
+        for role_name, role_permissions in self.roles_permissions.items():
+            bitmask = 0
+            for permission in role_permissions:
+                bitmask |= 1 << self.permissions_ids[permission]
+            self.roles_bitmasks[role_name] = bitmask
+        self.roles_ids = {
+            sys.intern(role_name): role_id
+            for role_name, role_id in self.roles_ids.items()
+        }
+        next_role_id = max(self.roles_ids.values(), default=-1) + 1
+        for role_name in self.roles_permissions:
+            if role_name not in self.roles_ids:
+                self.roles_ids[role_name] = next_role_id
+                next_role_id += 1
+        self._roles_by_id = {
+            role_id: role_name for role_name, role_id in self.roles_ids.items()
+        }
+        self.fingerprint = hashlib.sha256(
+            json.dumps(
+                [
+                    self.permissions,
+                    {
+                        str(role.name): self.roles_permissions[str(role.name)]
+                        for role in self.roles
+                    },
+                ],
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        # cached matrix would require numpy to unpickle respo model
+        state["__private_attribute_values__"].pop("_packed_matrix", None)
+        return state
+
+    def __setstate__(self, state) -> None:
+        super().__setstate__(state)
+        self._packed_matrix = None
+        self._intern_labels()
+
+    def _intern_labels(self) -> None:
+        """Interns labels in roles and permissions tables after unpickling.
+
+        Lookups of labels that are interned as well (for example constants
+        from ROLES and PERMS) can then be resolved by identity. __init__
+        interns labels while building tables, but pickle does not keep
+        strings interned, so it is done again after loading.
+        """
+        self.roles_permissions = {
+            sys.intern(role_name): [
+                sys.intern(permission) for permission in role_permissions
+            ]
+            for role_name, role_permissions in self.roles_permissions.items()
+        }
+        self.permissions_ids = {
+            sys.intern(permission): permission_id
+            for permission, permission_id in self.permissions_ids.items()
+        }
+        self.permissions_roles = {
+            sys.intern(permission): [sys.intern(role_name) for role_name in roles]
+            for permission, roles in self.permissions_roles.items()
+        }
+        self.roles_bitmasks = {
+            sys.intern(role_name): bitmask
+            for role_name, bitmask in self.roles_bitmasks.items()
+        }
+        self.roles_ids = {
+            sys.intern(role_name): role_id
+            for role_name, role_id in self.roles_ids.items()
+        }
+        self._roles_by_id = {
+            role_id: sys.intern(role_name)
+            for role_id, role_name in self._roles_by_id.items()
+        }
+        for labels_container in (self.ROLES, self.PERMS):
+            for name, label in labels_container.__dict__.items():
+                if isinstance(label, str):
+                    labels_container.__dict__[name] = sys.intern(label)
+
+    def roles_bitmask(self, roles: Iterable[str]) -> int:
+        """Returns union of compiled permissions bitmasks for given roles.
+
+        Every permission has an integer id (its index in sorted permissions
+        list) and n-th bit of bitmask is set when permission with id n is granted.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+
+        Examples:
+            >>> respo_model.roles_bitmask(["default", "admin"])
+            95
+        """
+        bitmask = 0
+        for role_name in roles:
+            bitmask |= self.ROLES.bitmask(role_name)
+        return bitmask
+
+    def roles_ids_bitmask(self, roles: Iterable[str]) -> int:
+        """Returns bitmask with bits set at ids of given roles.
+
+        Role ids are stable between respo create runs: ids from previous
+        model are kept (also for removed roles, so they are never reused)
+        and new roles get next free ids, see roles_ids.
+
+        Raises:
+            RespoModelError: one of roles does not have id in model.
+
+        Examples:
+            >>> respo_model.roles_ids_bitmask(["default", "admin"])
+            3
+        """
+        bitmask = 0
+        for role_name in roles:
+            if role_name not in self.roles_ids:
+                raise exceptions.RespoModelError(
+                    "Could not get id for role\n"
+                    f"Role does not exist in respo model: {role_name}"
+                )
+            bitmask |= 1 << self.roles_ids[role_name]
+        return bitmask
+
+    def roles_from_ids_bitmask(self, bitmask: int) -> List[str]:
+        """Returns roles with ids set in bitmask, ordered by id.
+
+        Raises:
+            RespoModelError: bitmask has bit set for unknown role id.
+
+        Examples:
+            >>> respo_model.roles_from_ids_bitmask(3)
+            ["admin", "default"]
+        """
+        roles: List[str] = []
+        while bitmask:
+            lowest_bit = bitmask & -bitmask
+            role_id = lowest_bit.bit_length() - 1
+            if role_id not in self._roles_by_id:
+                raise exceptions.RespoModelError(
+                    "Could not get role for id\n"
+                    f"Role id does not exist in respo model: {role_id}"
+                )
+            roles.append(self._roles_by_id[role_id])
+            bitmask ^= lowest_bit
+        return roles
+
+    def effective_permissions(self, roles: Iterable[str]) -> FrozenSet[str]:
+        """Returns all permissions granted by given roles.
+
+        Results are stored in LRU cache keyed by sorted, deduplicated roles,
+        so clients sharing the same roles combination share one frozenset.
+        Size of the cache can be changed with RESPO_ROLES_CACHE_SIZE.
+
+        Raises:
+            RespoModelError: one of roles does not exist in model.
+
+        Examples:
+            >>> respo_model.effective_permissions(["pro_user", "default"])
+            frozenset({"book.list", "book.read", "book.sell", ...})
+        """
+        roles_key = tuple(sorted(set(roles)))
+        permissions = self._roles_cache.get(roles_key)
+        if permissions is None:
+            permissions = frozenset().union(
+                *(self.ROLES.permissions(role) for role in roles_key)
+            )
+            self._roles_cache.put(roles_key, permissions)
+        return permissions
+
+    def roles_cache_info(self) -> RolesCacheInfo:
+        """Returns hits, misses and evictions of effective permissions cache."""
+        return self._roles_cache.info()
+
+    def matrix(self, packed: bool = False) -> "numpy.ndarray":
+        """Returns compiled roles x permissions table as numpy boolean array.
+
+        Rows are roles in order of ROLES, columns are permissions in order of
+        their ids. Requires numpy, see respo.matrix.roles_permissions_matrix.
+        Packed table is computed once and cached in the model, so with
+        packed=True the same read-only array is returned every time.
+        """
+        from respo import matrix
+
+        if self._packed_matrix is None:
+            packed_matrix = matrix.roles_permissions_matrix(self, packed=True)
+            packed_matrix.setflags(write=False)
+            self._packed_matrix = packed_matrix
+        if packed:
+            return self._packed_matrix
+        return matrix.unpack_matrix(self._packed_matrix, len(self.permissions_ids))
+
+    def filter_clients(
+        self, clients: Sequence["RespoClient"], permission_name: str
+    ) -> "numpy.ndarray":
+        """Returns boolean mask of clients that have given permission.
+
+        Whole batch is evaluated with vectorized numpy operations. Requires
+        numpy, see respo.matrix.filter_clients.
+        """
+        from respo import matrix
+
+        return matrix.filter_clients(self, clients, permission_name)
 
     @staticmethod
     def get_respo_model() -> "RespoModel":
         """Loads respo model from already generated pickle or yml file.
 
         Paths to be used can be specified using environment variables or changed in respo.confg.
+        Loaded model is cached in the process (see respo_model_cache), so later
+        calls only stat the file and unpickle it again when it was rebuilt.
 
         Raises:
             RespoModelError: pickle file does not exist.
         """
-        if not settings.config.path_bin_file.exists():
-            raise exceptions.RespoModelError(
-                f"Respo bin file does not exist in {settings.config.path_bin_file}."
-                " Use command: respo create [OPTIONS] FILENAME"
-            )
-        with open(settings.config.path_bin_file, "rb") as respo_model_file:
-            return pickle.load(respo_model_file)
+        return respo_model_cache.get()
 
     @pydantic.validator("permissions")
     def _permissions_are_unique_and_add_all(cls, permissions: List[DoubleDotLabel]):
         permissions_set: Set[DoubleDotLabel] = set(permissions)
-        if not len(permissions) == permissions_set:
+        if len(permissions) != len(permissions_set):
+            seen_permissions: Set[DoubleDotLabel] = set()
             for perm_name in permissions:
-                try:
-                    permissions_set.remove(perm_name)
-                    pydantic.ValidationError
-                except KeyError:
+                if perm_name in seen_permissions:
                     raise exceptions.RespoModelError(
                         f"('permissions','{perm_name}')|"
                         "Error in permissions section.\n  "
                         f"Found duplicates for permission: {perm_name}\n  "
                     )
+                seen_permissions.add(perm_name)
 
-        perm_collections = set(
-            [PermissionLabel(name).collection for name in permissions]
-        )
-        for collection_name in perm_collections:
+        # labels are already validated against regex, no need for PermissionLabel
+        perm_collections = set(name.partition(".")[0] for name in permissions)
+        for collection_name in sorted(perm_collections):
             all_perm = DoubleDotLabel(f"{collection_name}.all")
             if all_perm not in permissions_set:
+                permissions_set.add(all_perm)
                 permissions.append(all_perm)
 
         permissions.sort()
         return permissions
 
+    @pydantic.validator("roles_ids")
+    def _roles_ids_are_unique(cls, roles_ids: Dict[str, int]):
+        roles_ids_set: Set[int] = set()
+        for role_name, role_id in roles_ids.items():
+            if role_id < 0 or role_id in roles_ids_set:
+                raise exceptions.RespoModelError(
+                    f"('roles_ids','{role_name}')|"
+                    "Error in roles_ids section.\n  "
+                    f"Role id must be unique, non negative integer: {role_name}: {role_id}\n  "
+                )
+            roles_ids_set.add(role_id)
+        return roles_ids
+
     @pydantic.validator("principles")
     def _principles_are_valid_and_not_duplicate(
         cls, principles: List[Principle], values: Dict
     ):
         permissions: Optional[List[DoubleDotLabel]] = values.get("permissions")
         assert permissions is not None
+        permissions_set: Set[DoubleDotLabel] = set(permissions)
 
         principles_set: Set[DoubleDotLabel] = set()
         for principle in principles:
-            if principle.when not in permissions:
+            if principle.when not in permissions_set:
                 raise exceptions.RespoModelError(
                     f"('principles','{principle.when}','when')|"
                     "Error in Principles section.\n  "
@@ -269,7 +745,7 @@ class RespoModel(pydantic.BaseModel):
 
             then_permission_set: Set[DoubleDotLabel] = set()
             for then_permission in principle.then:
-                if then_permission not in permissions:
+                if then_permission not in permissions_set:
                     raise exceptions.RespoModelError(
                         f"('principles','{principle.when}','then','{then_permission}')|"
                         "Error in principles section.\n  "
@@ -290,6 +766,7 @@ class RespoModel(pydantic.BaseModel):
     def _roles_are_valid_and_not_duplicated(cls, roles: List[Role], values: Dict):
         permissions: Optional[List[DoubleDotLabel]] = values.get("permissions")
         assert permissions is not None
+        permissions_set: Set[DoubleDotLabel] = set(permissions)
 
         roles_include_map: Dict[SingleLabel, List[SingleLabel]] = {}
         for role in roles:
@@ -306,7 +783,7 @@ class RespoModel(pydantic.BaseModel):
 
             role_permission_set: Set[DoubleDotLabel] = set()
             for role_permission in role.permissions:
-                if role_permission not in permissions:
+                if role_permission not in permissions_set:
                     raise exceptions.RespoModelError(
                         f"('roles','{role.name}','permissions','{role_permission}')|"
                         "Error in Roles section.\n  "
@@ -331,26 +808,37 @@ class RespoModel(pydantic.BaseModel):
                         f"Error in 'include' section in role: {role_name}\n  "
                         f"Included role name is not declared in Role section: {included_role_name}\n  "
                     )
-                for parent_included_role_name in roles_include_map[included_role_name]:
-                    if parent_included_role_name == role_name:
-                        raise exceptions.RespoModelError(
-                            f"('roles','{role_name}','include','{included_role_name}')|"
-                            "Error in Roles section.\n  "
-                            f"Error in 'include' section in two roles: {role_name},{included_role_name}\n  "
-                            f"Included roles are reffering to each other, remove it from one of them\n  "
-                        )
+
+        for component in _strongly_connected_components(roles_include_map):  # type: ignore
+            role_name = min(component)
+            if len(component) == 1 and role_name not in roles_include_map[role_name]:
+                continue
+            included_role_name = next(
+                name for name in roles_include_map[role_name] if name in component
+            )
+            raise exceptions.RespoModelError(
+                f"('roles','{role_name}','include','{included_role_name}')|"
+                "Error in Roles section.\n  "
+                f"Error in 'include' section in roles: {','.join(sorted(component))}\n  "
+                f"Included roles are reffering to each other, remove it from one of them\n  "
+            )
         return roles
 
     @pydantic.validator("roles")
     def _add_permissions_to_roles_from_included(cls, roles: List[Role]):
-        for role_to_update in roles:
-            if not role_to_update.include:
-                continue
-            for role in roles:
-                if role.name not in role_to_update.include:
-                    continue
-                for permission in role.permissions:
-                    if permission not in role_to_update.permissions:
+        roles_map: Dict[str, Role] = {role.name: role for role in roles}
+        roles_include_map: Dict[str, List[str]] = {
+            role.name: role.include or [] for role in roles  # type: ignore
+        }
+        # cycles are rejected earlier, so every component is a single role and
+        # included roles always come before roles that include them
+        for (role_name,) in _strongly_connected_components(roles_include_map):
+            role_to_update = roles_map[role_name]
+            role_permissions_set: Set[str] = set(role_to_update.permissions)
+            for included_role_name in roles_include_map[role_name]:
+                for permission in roles_map[included_role_name].permissions:
+                    if permission not in role_permissions_set:
+                        role_permissions_set.add(permission)
                         role_to_update.permissions.append(permission)
         return roles
 
@@ -359,21 +847,23 @@ class RespoModel(pydantic.BaseModel):
         principles: Optional[List[Principle]] = values.get("principles")
         assert principles is not None
 
+        principles_graph: Dict[str, List[str]] = {
+            principle.when: principle.then for principle in principles  # type: ignore
+        }
+        # only permissions reachable from roles matter, in big policies most
+        # of principles graph is never used by any role
+        closures = _transitive_closures(
+            principles_graph,
+            roots={permission for role in roles for permission in role.permissions},
+        )
         for role in roles:
-            while True:
-                perms_after_resolve: List[DoubleDotLabel] = []
-                for permission in role.permissions:
-                    perms_after_resolve.append(permission)
-                    for principle in principles:
-                        if principle.when != permission:
-                            continue
-                        for perm_to_add in principle.then:
-                            if perm_to_add not in role.permissions:
-                                perms_after_resolve.append(perm_to_add)
-
-                if role.permissions == perms_after_resolve:
-                    break
-                role.permissions = perms_after_resolve
+            role_permissions: Set[str] = set()
+            for permission in role.permissions:
+                if permission in closures:
+                    role_permissions |= closures[permission]
+                else:
+                    role_permissions.add(permission)
+            role.permissions = list(role_permissions)  # type: ignore
         return roles
 
     @pydantic.validator("roles")
@@ -387,3 +877,134 @@ class RespoModel(pydantic.BaseModel):
             role.permissions.sort()
 
         return roles
+
+
+class _CachedRespoModel(NamedTuple):
+    respo_model: RespoModel
+    file_key: Tuple[str, int, int, int]
+    checked_at: float
+
+
+_pinned_respo_model: "contextvars.ContextVar[Optional[RespoModel]]" = (
+    contextvars.ContextVar("respo_pinned_respo_model", default=None)
+)
+
+
+class RespoModelCache:
+    """Process-wide cache of respo model loaded from pickle file.
+
+    File is identified by its path, mtime, size and inode, so rebuilt file
+    (also replaced by rename) is detected with single os.stat() call. With
+    respo.config.RESPO_MODEL_CHECK_INTERVAL greater than 0, the file is
+    checked at most once per that many seconds, then reload() (for example
+    called by respo.reload.RespoModelWatcher) picks up new model off the hot
+    path. New model replaces the old one atomically, use pin() to keep one
+    model for the whole request. Use invalidate() to force loading the file
+    again, for example in tests.
+
+    Examples:
+        >>> respo_model_cache.get() is respo_model_cache.get()
+        True
+        >>> with respo_model_cache.pin() as respo_model:
+                ...  # RespoModel.get_respo_model() returns respo_model here
+        >>> respo_model_cache.invalidate()
+    """
+
+    def __init__(self) -> None:
+        self._cached: Optional[_CachedRespoModel] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> RespoModel:
+        """Returns pinned or cached respo model, loading it when file has changed.
+
+        Raises:
+            RespoModelError: pickle file does not exist or is not respo model.
+        """
+        pinned = _pinned_respo_model.get()
+        if pinned is not None:
+            return pinned
+        cached = self._cached
+        now = time.monotonic()
+        if (
+            cached is not None
+            and now - cached.checked_at < settings.config.RESPO_MODEL_CHECK_INTERVAL
+        ):
+            return cached.respo_model
+        return self._refresh(cached, now)
+
+    def reload(self) -> bool:
+        """Checks the file regardless of check interval, loads it when rebuilt.
+
+        Return:
+            True: new model was loaded and is used from now on.
+            False: file did not change.
+
+        Raises:
+            RespoModelError: pickle file does not exist or is not respo model.
+        """
+        cached = self._cached
+        respo_model = self._refresh(cached, time.monotonic())
+        return cached is None or respo_model is not cached.respo_model
+
+    @contextlib.contextmanager
+    def pin(self) -> Iterator[RespoModel]:
+        """Keeps current model in this context, also when the file is reloaded.
+
+        Pinned model is stored in context variable, so it is separate for
+        every thread and asyncio task.
+
+        Raises:
+            RespoModelError: pickle file does not exist or is not respo model.
+        """
+        respo_model = self.get()
+        token = _pinned_respo_model.set(respo_model)
+        try:
+            yield respo_model
+        finally:
+            _pinned_respo_model.reset(token)
+
+    def invalidate(self) -> None:
+        """Drops cached respo model, next get() loads the file again."""
+        with self._lock:
+            self._cached = None
+
+    def _refresh(self, cached: Optional[_CachedRespoModel], now: float) -> RespoModel:
+        path = settings.config.path_bin_file
+        try:
+            file_key = self._file_key(str(path), os.stat(path))
+        except FileNotFoundError:
+            raise exceptions.RespoModelError(
+                f"Respo bin file does not exist in {path}."
+                " Use command: respo create [OPTIONS] FILENAME"
+            )
+        if cached is not None and cached.file_key == file_key:
+            if settings.config.RESPO_MODEL_CHECK_INTERVAL > 0:
+                with self._lock:
+                    # reload() may have replaced cached model since it was read
+                    if self._cached is cached:
+                        self._cached = cached._replace(checked_at=now)
+            return cached.respo_model
+
+        with self._lock:
+            cached = self._cached
+            if cached is not None and cached.file_key == file_key:
+                return cached.respo_model
+            with open(path, "rb") as respo_model_file:
+                # key of opened file, it may be replaced after os.stat() above
+                file_key = self._file_key(
+                    str(path), os.fstat(respo_model_file.fileno())
+                )
+                respo_model = pickle.load(respo_model_file)
+            if not isinstance(respo_model, RespoModel):
+                raise exceptions.RespoModelError(
+                    f"Respo bin file {path} does not contain respo model."
+                )
+            self._cached = _CachedRespoModel(respo_model, file_key, now)
+            return respo_model
+
+    @staticmethod
+    def _file_key(path: str, stat_result: os.stat_result) -> Tuple[str, int, int, int]:
+        return (path, stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+
+respo_model_cache = RespoModelCache()
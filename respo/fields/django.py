@@ -1,8 +1,12 @@
-from typing import Optional
+from typing import List, Optional
 
-from django.db.models import TextField
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Lookup, TextField
+from django.db.models.lookups import Contains, EndsWith, Exact, StartsWith
+from django.db.models.sql.where import OR, WhereNode
 
 from respo.client import RespoClient
+from respo.core import RespoModel
 
 
 class DjangoRespoField(TextField, RespoClient):
@@ -32,9 +36,7 @@ class DjangoRespoField(TextField, RespoClient):
     """
 
     def from_db_value(self, value: Optional[str], expression, connection):
-        if value is None:  # pragma: no cover
-            value = ""
-        return RespoClient(value)
+        return RespoClient.from_cached(value)
 
     def to_python(self, value):  # pragma: no cover
         if isinstance(value, RespoClient):
@@ -43,3 +45,42 @@ class DjangoRespoField(TextField, RespoClient):
 
     def get_prep_value(self, value: RespoClient):
         return str(value)
+
+
+@DjangoRespoField.register_lookup
+class HasPermission(Lookup):
+    """Lookup that filters rows by permission in database.
+
+    Permission is resolved to roles granting it at query-build time using
+    respo model from RespoModel.get_respo_model(), then compiled to SQL
+    predicate on serialized roles. Exact and prefix matches can use index.
+
+    Examples:
+        >>> MyModel.objects.filter(respo_field__has_permission="user.read_all")
+        <QuerySet [<MyModel: MyModel object (1)>]>
+    """
+
+    lookup_name = "has_permission"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        respo_model = RespoModel.get_respo_model()
+        permission_name: str = self.rhs
+        RespoClient.validate_permission(permission_name, respo_model)
+        if permission_name not in respo_model.PERMS:
+            raise EmptyResultSet
+        roles = respo_model.PERMS.roles(permission_name)
+        if not roles:
+            raise EmptyResultSet
+
+        children: List[Lookup] = []
+        for role in roles:
+            children.extend(
+                [
+                    Exact(self.lhs, role),
+                    StartsWith(self.lhs, f"{role},"),
+                    EndsWith(self.lhs, f",{role}"),
+                    Contains(self.lhs, f",{role},"),
+                ]
+            )
+        return compiler.compile(WhereNode(children, connector=OR))
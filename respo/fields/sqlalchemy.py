@@ -1,9 +1,26 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import (
+    Column,
+    bindparam,
+    event,
+    false,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.mutable import Mutable
-from sqlalchemy.types import TEXT, TypeDecorator
+from sqlalchemy.orm import Mapper
+from sqlalchemy.orm.attributes import QueryableAttribute
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.types import TEXT, BigInteger, Boolean, LargeBinary, TypeDecorator
 
-from respo import client, core, settings
+from respo import client, core, exceptions
 
 
 class TEXTRespoField(TypeDecorator):
@@ -12,27 +29,535 @@ class TEXTRespoField(TypeDecorator):
     impl = TEXT
     cache_ok = True
 
+    class comparator_factory(TEXT.Comparator):
+        def has_permission_expr(
+            self, permission_name: str, respo_model: core.RespoModel
+        ) -> ColumnElement:
+            """Builds SQL expression true for rows with given permission.
+
+            Roles granting the permission are taken from respo model reverse
+            index, so the database filters serialized roles lists and rows
+            don't have to be loaded to call has_permission on each of them.
+
+            Raises:
+                ValueError: permission_name doesn't match double label regex.
+
+            Examples:
+                >>> select(User).where(
+                        User.respo_field.has_permission_expr(
+                            respo_model.PERMS.BOOK__SELL, respo_model
+                        )
+                    )
+            """
+            client.RespoClient.validate_permission(permission_name, respo_model)
+            if permission_name not in respo_model.PERMS:
+                return false()
+            roles = respo_model.PERMS.roles(permission_name)
+            if not roles:
+                return false()
+            return or_(
+                *(
+                    or_(
+                        self.expr == role,
+                        self.expr.startswith(f"{role},", autoescape=True),
+                        self.expr.endswith(f",{role}", autoescape=True),
+                        self.expr.contains(f",{role},", autoescape=True),
+                    )
+                    for role in roles
+                )
+            )
+
     def process_bind_param(self, value: "MutableRespoClient", dialect) -> str:
         return str(value)
 
     def process_result_value(
         self, value: Optional[str], dialect
+    ) -> "MutableRespoClient":
+        return MutableRespoClient.from_cached(value)
+
+
+class BIGINTRespoField(TypeDecorator):
+    """Custom Type to store Respo model as bitmask of role ids based on BigInteger type.
+
+    Bit n of stored integer is set when client has role with id n in respo
+    model (see RespoModel.roles_ids). Roles are loaded ordered by their ids.
+
+    Args:
+        respo_model: model used to encode and decode every value. When None,
+        model is taken from RespoModel.get_respo_model() cache for every
+        value, so rebuilt model is picked up, but with
+        respo.config.RESPO_MODEL_CHECK_INTERVAL equal 0 that is os.stat() per
+        row. Pass the model, set the interval or load rows inside
+        respo_model_cache.pin() to resolve it once.
+
+    Examples:
+        >>> class User(Base):
+                roles = Column(SQLAlchemyBitmaskRespoField)
+                fixed_roles = Column(
+                    MutableRespoClient.as_mutable(BIGINTRespoField(respo_model))
+                )
+
+    Role ids are stable between respo create runs, they are kept in roles
+    ids file (respo.config.RESPO_FILE_NAME_ROLES_IDS) that must be committed
+    with policy files. Ids of removed roles are never reused, so stored
+    values keep their meaning. BigInteger is signed, so role ids must be
+    lower than 63, which limits number of roles that ever existed in the
+    policy to 63. respo create warns about roles over the limit and storing
+    them raises RespoModelError. To free ids, move stored values to TEXT
+    column, renumber roles in roles ids file, run respo create and migrate
+    them back with migrate_text_to_bitmask.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def __init__(
+        self, respo_model: Optional[core.RespoModel] = None, *args: Any, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        # underscore keeps unhashable model out of statement cache key, type
+        # instance (and so the model) is bound to its column anyway
+        self._respo_model = respo_model
+
+    class comparator_factory(BigInteger.Comparator):
+        def has_permission_expr(
+            self, permission_name: str, respo_model: core.RespoModel
+        ) -> ColumnElement:
+            """Builds SQL expression true for rows with given permission.
+
+            Roles granting the permission are taken from respo model reverse
+            index and compiled to single bitwise AND on stored bitmask.
+
+            Raises:
+                ValueError: permission_name doesn't match double label regex.
+            """
+            client.RespoClient.validate_permission(permission_name, respo_model)
+            if permission_name not in respo_model.PERMS:
+                return false()
+            # roles with ids 63 or greater can't be stored, see roles_to_bitmask
+            roles_ids_bitmask = respo_model.roles_ids_bitmask(
+                respo_model.PERMS.roles(permission_name)
+            ) & ((1 << 63) - 1)
+            if not roles_ids_bitmask:
+                return false()
+            return (
+                self.expr.op("&", return_type=BigInteger())(
+                    literal(roles_ids_bitmask, BigInteger())
+                )
+                != 0
+            )
+
+    @property
+    def respo_model(self) -> core.RespoModel:
+        if self._respo_model is not None:
+            return self._respo_model
+        return core.RespoModel.get_respo_model()
+
+    def process_bind_param(
+        self, value: Optional["MutableRespoClient"], dialect
+    ) -> Optional[int]:
+        if value is None:  # pragma: no cover
+            return None
+        return roles_to_bitmask(value.roles, self.respo_model)
+
+    def process_result_value(
+        self, value: Optional[int], dialect
     ) -> "MutableRespoClient":
         if value is None:  # pragma: no cover
-            value = ""
-        return MutableRespoClient(roles=value)
+            value = 0
+        return MutableRespoClient.from_cached(
+            ",".join(self.respo_model.roles_from_ids_bitmask(value))
+        )
+
+
+def roles_to_bitmask(roles: List[str], respo_model: core.RespoModel) -> int:
+    """Encodes roles as role ids bitmask that fits in BigInteger column.
+
+    Raises:
+        RespoModelError: role does not exist in model or its id is too big.
+    """
+    bitmask = respo_model.roles_ids_bitmask(roles)
+    if bitmask.bit_length() > 63:
+        raise exceptions.RespoModelError(
+            "Could not store roles in BigInteger column\n"
+            f"Role ids must be lower than 63, got roles: {','.join(roles)}"
+        )
+    return bitmask
+
+
+def migrate_text_to_bitmask(
+    connection: Connection,
+    text_column: Column,
+    bitmask_column: Column,
+    respo_model: core.RespoModel,
+    batch_size: int = 1000,
+) -> int:
+    """Copies roles from TEXT column to role ids bitmask column in batches.
+
+    Both columns must be in the same table with single column primary key.
+    Rows are read in primary key order, batch_size rows at time and every
+    batch is written with one executemany UPDATE. Transaction is controlled
+    by the caller.
+
+    Return:
+        Number of migrated rows.
+
+    Examples:
+        >>> with engine.begin() as connection:
+                migrate_text_to_bitmask(
+                    connection, User.__table__.c.roles, User.__table__.c.roles_bitmask, respo_model
+                )
+        1000000
+    """
+    table = text_column.table
+    (primary_key,) = table.primary_key.columns
+    update_stmt = (
+        update(table)
+        .where(primary_key == bindparam("respo_primary_key"))
+        .values({bitmask_column.name: bindparam("respo_bitmask", type_=BigInteger())})
+    )
+
+    migrated = 0
+    last_primary_key = None
+    while True:
+        select_stmt = (
+            select(primary_key, text_column).order_by(primary_key).limit(batch_size)
+        )
+        if last_primary_key is not None:
+            select_stmt = select_stmt.where(primary_key > last_primary_key)
+        rows = connection.execute(select_stmt).all()
+        if not rows:
+            return migrated
+        connection.execute(
+            update_stmt,
+            [
+                {
+                    "respo_primary_key": row_primary_key,
+                    "respo_bitmask": roles_to_bitmask(
+                        client.RespoClient(str(roles or "")).roles, respo_model
+                    ),
+                }
+                for row_primary_key, roles in rows
+            ],
+        )
+        migrated += len(rows)
+        last_primary_key = rows[-1][0]
+
+
+class BLOBPermissionsField(TypeDecorator):
+    """Custom Type to store effective permissions bitmask based on LargeBinary type.
+
+    Bit n of stored bytes (byte n // 8, bit n % 8, little endian) is set when
+    client roles grant permission with id n in respo model (see
+    RespoModel.permissions_ids). Column is written by materialize_permissions
+    listeners and rematerialize_permissions job, it should not be set directly.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    class comparator_factory(LargeBinary.Comparator):
+        def has_permission_expr(
+            self, permission_name: str, respo_model: core.RespoModel
+        ) -> ColumnElement:
+            """Builds SQL expression true for rows with given permission.
+
+            Compiles to test of single bit n of stored bitmask, so no roles
+            lookup is needed. Bitwise operators on binary values differ
+            between databases: PostgreSQL uses get_bit(column, n), MySQL
+            ASCII(SUBSTRING(column, n // 8 + 1, 1)) & mask and SQLite looks
+            up value of the byte with instr() in table of all bytes. Other
+            databases compare the byte with all bytes that have the bit set.
+            Rows must be materialized with the same respo model, see
+            rematerialize_permissions.
+
+            Raises:
+                ValueError: permission_name doesn't match double label regex.
+
+            Examples:
+                >>> select(User).where(
+                        User.permissions.has_permission_expr(
+                            respo_model.PERMS.BOOK__SELL, respo_model
+                        )
+                    )
+            """
+            client.RespoClient.validate_permission(permission_name, respo_model)
+            if permission_name not in respo_model.PERMS:
+                return false()
+            return PermissionBit(
+                self.expr, respo_model.permissions_ids[permission_name]
+            )
+
+
+class PermissionBit(ColumnElement):
+    """SQL expression true when bit of permission is set in stored bitmask.
+
+    Built by BLOBPermissionsField has_permission_expr, compiled differently
+    for every database.
+    """
+
+    inherit_cache = True
+    type = Boolean()
+    _traverse_internals = [
+        ("expr", InternalTraversal.dp_clauseelement),
+        ("permission_id", InternalTraversal.dp_plain_obj),
+    ]
+
+    def __init__(self, expr: ColumnElement, permission_id: int) -> None:
+        self.expr = expr
+        self.permission_id = permission_id
+
+
+@compiles(PermissionBit)
+def _compile_permission_bit(element: PermissionBit, compiler, **kw) -> str:
+    bit = 1 << element.permission_id % 8
+    return compiler.process(
+        func.substr(
+            element.expr, element.permission_id // 8 + 1, 1, type_=LargeBinary()
+        ).in_([bytes([byte]) for byte in range(256) if byte & bit]),
+        **kw,
+    )
+
+
+_ALL_BYTES_HEX = bytes(range(256)).hex().upper()
+
+
+@compiles(PermissionBit, "sqlite")
+def _compile_permission_bit_sqlite(element: PermissionBit, compiler, **kw) -> str:
+    # substr() of too short value is empty blob, found at position 1 (byte 0)
+    byte = (
+        f"(instr(X'{_ALL_BYTES_HEX}', substr({compiler.process(element.expr, **kw)}, "
+        f"{element.permission_id // 8 + 1}, 1)) - 1)"
+    )
+    return f"(({byte} & {1 << element.permission_id % 8}) != 0)"
+
+
+@compiles(PermissionBit, "postgresql")
+def _compile_permission_bit_postgresql(element: PermissionBit, compiler, **kw) -> str:
+    # get_bit() numbers bits from least significant bit of first byte, like
+    # permissions_to_bytes, but it raises for bit out of value
+    column = compiler.process(element.expr, **kw)
+    return (
+        f"(CASE WHEN length({column}) > {element.permission_id // 8} "
+        f"THEN get_bit({column}, {element.permission_id}) = 1 ELSE false END)"
+    )
+
+
+@compiles(PermissionBit, "mysql")
+@compiles(PermissionBit, "mariadb")
+def _compile_permission_bit_mysql(element: PermissionBit, compiler, **kw) -> str:
+    # ASCII() returns value of first byte of binary string, 0 for empty one
+    return (
+        f"((ASCII(SUBSTRING({compiler.process(element.expr, **kw)}, "
+        f"{element.permission_id // 8 + 1}, 1)) & {1 << element.permission_id % 8})"
+        " != 0)"
+    )
+
+
+def permissions_to_bytes(roles: List[str], respo_model: core.RespoModel) -> bytes:
+    """Encodes effective permissions of roles as little endian bitmask bytes.
+
+    Raises:
+        RespoModelError: role does not exist in model.
+    """
+    return respo_model.roles_bitmask(roles).to_bytes(
+        (len(respo_model.permissions_ids) + 7) // 8, "little"
+    )
+
+
+_materialized_permissions: Dict[
+    Tuple[type, str], Tuple[str, Optional[str], Optional[core.RespoModel]]
+] = {}
+
+
+def _materialized(
+    instance: Any, key: str, roles: Optional[List[str]]
+) -> List[Tuple[str, Any]]:
+    """Returns attributes of instance with permissions materialized from roles.
+
+    Raises:
+        RespoModelError: role does not exist in model.
+    """
+    for cls in type(instance).__mro__:
+        if (cls, key) in _materialized_permissions:
+            break
+    else:
+        return []
+    permissions_key, fingerprint_key, respo_model = _materialized_permissions[
+        (cls, key)
+    ]
+    if respo_model is None:
+        respo_model = core.RespoModel.get_respo_model()
+    materialized: List[Tuple[str, Any]] = [
+        (
+            permissions_key,
+            None if roles is None else permissions_to_bytes(roles, respo_model),
+        )
+    ]
+    if fingerprint_key is not None:
+        materialized.append((fingerprint_key, respo_model.fingerprint))
+    return materialized
+
+
+def _materialize(instance: Any, key: str, respo_client: Any) -> None:
+    # all values are computed before any attribute is set
+    for attribute_key, value in _materialized(
+        instance, key, None if respo_client is None else list(respo_client.roles)
+    ):
+        setattr(instance, attribute_key, value)
+
+
+def materialize_permissions(
+    respo_attribute: QueryableAttribute,
+    permissions_attribute: QueryableAttribute,
+    fingerprint_attribute: Optional[QueryableAttribute] = None,
+    respo_model: Optional[core.RespoModel] = None,
+) -> None:
+    """Keeps effective permissions column in sync with respo field on write.
+
+    Opt-in companion for SQLAlchemyRespoField or SQLAlchemyBitmaskRespoField
+    attribute. Permissions attribute (BLOBPermissionsField) is recomputed when
+    respo attribute is set, when its roles are changed in place
+    (MutableRespoClient.changed()) and before every insert and update of the
+    row, so reads and has_permission_expr queries don't resolve roles at all.
+    Respo attribute that is not set on insert is set to python side column
+    default first. Optional fingerprint attribute (String column) is set to
+    respo_model.fingerprint to find rows for rematerialize_permissions.
+    When respo_model is None, RespoModel.get_respo_model() is used on write.
+
+    Examples:
+        >>> class User(Base):
+                roles = Column(SQLAlchemyRespoField, default=RespoClient)
+                permissions = Column(BLOBPermissionsField)
+                permissions_fingerprint = Column(String(64))
+        >>> materialize_permissions(User.roles, User.permissions, User.permissions_fingerprint)
+    """
+    _materialized_permissions[(respo_attribute.class_, respo_attribute.key)] = (
+        permissions_attribute.key,
+        None if fingerprint_attribute is None else fingerprint_attribute.key,
+        respo_model,
+    )
+
+    key = respo_attribute.key
+
+    @event.listens_for(respo_attribute, "set")
+    def materialize_on_set(target, value, oldvalue, initiator):
+        _materialize(target, key, value)
+
+    @event.listens_for(respo_attribute.class_, "before_insert", propagate=True)
+    def materialize_before_insert(mapper: Mapper, connection, target):
+        if target.__dict__.get(key) is None:
+            default = mapper.columns[key].default
+            if default is not None and default.is_scalar:
+                setattr(target, key, default.arg)
+            elif default is not None and default.is_callable:
+                setattr(target, key, default.arg(None))
+        _materialize(target, key, target.__dict__.get(key))
+
+    @event.listens_for(respo_attribute.class_, "before_update", propagate=True)
+    def materialize_before_update(mapper: Mapper, connection, target):
+        # respo attribute that is expired or not loaded did not change
+        if key in target.__dict__:
+            _materialize(target, key, target.__dict__[key])
+
+
+def rematerialize_permissions(
+    connection: Connection,
+    respo_column: Column,
+    permissions_column: Column,
+    respo_model: core.RespoModel,
+    fingerprint_column: Optional[Column] = None,
+    chunk_size: int = 1000,
+) -> int:
+    """Rewrites materialized permissions of rows compiled with other respo model.
+
+    Rows with fingerprint other than respo_model.fingerprint (all rows when
+    fingerprint_column is None) are read in primary key order, chunk_size rows
+    at time (each chunk is separate SELECT after last primary key, so no
+    cursor is open while rows are updated) and rewritten with executemany
+    UPDATE, so memory use does not depend on table size. Run it after every
+    respo create that changes the model. Columns must be in the same table
+    with single column primary key. Transaction is controlled by the caller.
+
+    Return:
+        Number of rewritten rows.
+
+    Examples:
+        >>> with engine.begin() as connection:
+                rematerialize_permissions(
+                    connection,
+                    User.__table__.c.roles,
+                    User.__table__.c.permissions,
+                    respo_model,
+                    User.__table__.c.permissions_fingerprint,
+                )
+        1000000
+    """
+    table = respo_column.table
+    (primary_key,) = table.primary_key.columns
+    select_stmt = select(primary_key, respo_column)
+    values: Dict[str, Any] = {
+        permissions_column.name: bindparam("respo_permissions", type_=LargeBinary())
+    }
+    if fingerprint_column is not None:
+        select_stmt = select_stmt.where(
+            or_(
+                fingerprint_column.is_(None),
+                fingerprint_column != respo_model.fingerprint,
+            )
+        )
+        values[fingerprint_column.name] = respo_model.fingerprint
+    update_stmt = (
+        update(table)
+        .where(primary_key == bindparam("respo_primary_key"))
+        .values(values)
+    )
+
+    rewritten = 0
+    last_primary_key = None
+    while True:
+        chunk_stmt = select_stmt.order_by(primary_key).limit(chunk_size)
+        if last_primary_key is not None:
+            chunk_stmt = chunk_stmt.where(primary_key > last_primary_key)
+        rows = connection.execute(chunk_stmt).all()
+        if not rows:
+            return rewritten
+        connection.execute(
+            update_stmt,
+            [
+                {
+                    "respo_primary_key": row_primary_key,
+                    "respo_permissions": permissions_to_bytes(
+                        roles.roles
+                        if isinstance(roles, client.RespoClient)
+                        else client.RespoClient(str(roles or "")).roles,
+                        respo_model,
+                    ),
+                }
+                for row_primary_key, roles in rows
+            ],
+        )
+        rewritten += len(rows)
+        last_primary_key = rows[-1][0]
 
 
 class MutableRespoClient(Mutable, client.RespoClient):
     """SQLAlchemy field that represent RespoClient instance, based on Mutable.
 
     Wrapper around RespoClient instance that triggers changed() on
-    add_role and remove_role. Overwrittes ORM that use fancy mechanisms
-    that won't detect mutable objects changes (and won't be commited to database).
+    add_role and remove_role (and their unchecked variants). Overwrittes ORM that
+    use fancy mechanisms that won't detect mutable objects changes (and won't be
+    commited to database).
 
     https://docs.sqlalchemy.org/en/14/orm/extensions/mutable.html
     """
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # parents are weak references restored by SQLAlchemy on load
+        state = super().__getstate__()
+        state.pop("_parents", None)
+        return state
+
     @classmethod
     def coerce(cls, key, value):
         """Transforms Python object to MutableRespoClient Field."""
@@ -43,25 +568,35 @@ class MutableRespoClient(Mutable, client.RespoClient):
             return cls(str(value))
         raise ValueError("Field must be instance of RespoClient or MutableRespoClient.")
 
-    def add_role(
-        self,
-        role_name: str,
-        respo_model: Optional[core.RespoModel] = None,
-        validate_input: bool = settings.config.RESPO_CHECK_FORCE,
-    ) -> bool:
-        res = super().add_role(role_name, respo_model, validate_input)
+    def changed(self) -> None:
+        """Flags parents as modified and recomputes materialized permissions."""
+        super().changed()
+        for parent_state, key in self._parents.items():
+            _materialize(parent_state.obj(), key, self)
+
+    def _validate_materialized(self, roles: List[str]) -> None:
+        # raises RespoModelError for role missing in respo model before roles
+        # change, so instance is never left half updated
+        for parent_state, key in self._parents.items():
+            _materialized(parent_state.obj(), key, roles)
+
+    def _replace_roles(self, roles: List[str]) -> None:
+        self._validate_materialized(roles)
+        super()._replace_roles(roles)
+        self.changed()
+
+    def add_role_unchecked(self, role_name: str) -> bool:
+        self._validate_materialized(list(self.roles) + [role_name])
+        res = super().add_role_unchecked(role_name)
         self.changed()
         return res
 
-    def remove_role(
-        self,
-        role_name: str,
-        respo_model: Optional[core.RespoModel] = None,
-        validate_input: bool = settings.config.RESPO_CHECK_FORCE,
-    ) -> bool:
-        res = super().remove_role(role_name, respo_model, validate_input)
+    def remove_role_unchecked(self, role_name: str) -> bool:
+        self._validate_materialized([role for role in self.roles if role != role_name])
+        res = super().remove_role_unchecked(role_name)
         self.changed()
         return res
 
 
 SQLAlchemyRespoField = MutableRespoClient.as_mutable(TEXTRespoField)
+SQLAlchemyBitmaskRespoField = MutableRespoClient.as_mutable(BIGINTRespoField)
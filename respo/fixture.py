@@ -0,0 +1,91 @@
+import random
+from typing import Any, Dict, List, Optional
+
+# then permissions of principle are chosen from permissions declared right
+# after its when permission, so principles form long chains without cycles
+PRINCIPLE_WINDOW = 100
+ROLE_INCLUDES = 2
+
+
+def generate_policy(
+    permissions: int = 1000,
+    roles: int = 100,
+    role_permissions: int = 20,
+    include_depth: int = 2,
+    principles: Optional[int] = None,
+    principle_fan_out: int = 3,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Generates synthetic policy, the same for the same arguments.
+
+    Permissions are split into collections of 100. Roles are split into
+    include_depth + 1 levels, every role above first level includes up to
+    ROLE_INCLUDES roles from level below, so includes are nested up to
+    include_depth levels deep. Every principle grants up to principle_fan_out
+    permissions, by default there is 1 principle per 10 permissions.
+
+    Raises:
+        ValueError: permissions is lower than 1 or other counts are negative.
+
+    Examples:
+        >>> policy = generate_policy(permissions=50, roles=5, include_depth=1)
+        >>> respo_model = RespoModel.parse_obj(policy)
+        >>> len(respo_model.permissions), len(respo_model.ROLES)  # with coll_0.all
+        (51, 5)
+    """
+    if principles is None:
+        principles = permissions // 10
+    if permissions < 1:
+        raise ValueError(f"Policy must have at least 1 permission, got {permissions}")
+    for name, value in [
+        ("roles", roles),
+        ("role_permissions", role_permissions),
+        ("include_depth", include_depth),
+        ("principles", principles),
+        ("principle_fan_out", principle_fan_out),
+    ]:
+        if value < 0:
+            raise ValueError(f"{name} must not be negative, got {value}")
+
+    rng = random.Random(seed)
+    permissions_lst = [f"coll_{i // 100}.perm_{i}" for i in range(permissions)]
+
+    principles_lst: List[Dict[str, Any]] = []
+    for when_index in sorted(
+        rng.sample(range(permissions - 1), min(principles, permissions - 1))
+    ):
+        then_indexes = range(
+            when_index + 1, min(when_index + 1 + PRINCIPLE_WINDOW, permissions)
+        )
+        then = rng.sample(then_indexes, min(principle_fan_out, len(then_indexes)))
+        principles_lst.append(
+            {
+                "when": permissions_lst[when_index],
+                "then": [permissions_lst[i] for i in sorted(then)],
+            }
+        )
+
+    levels = min(include_depth + 1, roles) or 1
+    roles_levels: List[List[str]] = [[] for _ in range(levels)]
+    roles_lst: List[Dict[str, Any]] = []
+    for i in range(roles):
+        level = i * levels // roles
+        role: Dict[str, Any] = {
+            "name": f"role_{i}",
+            "permissions": rng.sample(
+                permissions_lst, min(role_permissions, permissions)
+            ),
+        }
+        if level:
+            lower_roles = roles_levels[level - 1]
+            role["include"] = rng.sample(
+                lower_roles, min(ROLE_INCLUDES, len(lower_roles))
+            )
+        roles_levels[level].append(role["name"])
+        roles_lst.append(role)
+
+    return {
+        "permissions": permissions_lst,
+        "principles": principles_lst,
+        "roles": roles_lst,
+    }
@@ -0,0 +1,117 @@
+from typing import Dict, Sequence
+
+import numpy
+
+from respo import client, core, exceptions
+
+
+def roles_permissions_matrix(
+    respo_model: core.RespoModel, packed: bool = False
+) -> numpy.ndarray:
+    """Encodes compiled roles x permissions table as numpy array.
+
+    Rows are roles in order of respo_model.ROLES, columns are permissions
+    in order of their ids (respo_model.permissions). When packed is True,
+    every row is bit-packed into uint8 array in little bit order, that is
+    bit n of row is at column n // 8, bit n % 8. Unlike
+    respo_model.matrix(), table is built again on every call.
+
+    Examples:
+        >>> matrix = roles_permissions_matrix(respo_model)
+        >>> matrix.shape
+        (4, 10)
+        >>> matrix[list(respo_model.ROLES).index("admin"), respo_model.permissions_ids["user.update"]]
+        False
+    """
+    permissions_count = len(respo_model.permissions_ids)
+    bytes_count = (permissions_count + 7) // 8
+    packed_matrix = numpy.frombuffer(
+        b"".join(
+            respo_model.roles_bitmasks[role].to_bytes(bytes_count, "little")
+            for role in respo_model.ROLES
+        ),
+        dtype=numpy.uint8,
+    ).reshape(len(respo_model.ROLES), bytes_count)
+    if packed:
+        return packed_matrix.copy()
+    return unpack_matrix(packed_matrix, permissions_count)
+
+
+def unpack_matrix(
+    packed_matrix: numpy.ndarray, permissions_count: int
+) -> numpy.ndarray:
+    """Unpacks bit-packed roles x permissions table to boolean array."""
+    return numpy.unpackbits(
+        packed_matrix, axis=1, count=permissions_count, bitorder="little"
+    ).astype(bool)
+
+
+def filter_clients(
+    respo_model: core.RespoModel,
+    clients: Sequence[client.RespoClient],
+    permission_name: str,
+) -> numpy.ndarray:
+    """Checks permission for many clients at once.
+
+    Clients are grouped by their roles string, so clients loaded from
+    database, that share few distinct strings, are parsed once per string.
+    Roles of distinct strings are gathered into flat index arrays and
+    evaluated against column of cached respo_model.matrix(packed=True)
+    with vectorized operations, without calling has_permission per client.
+
+    Return:
+        Boolean array with True for clients that have the permission.
+
+    Raises:
+        ValueError: permission_name doesn't match double label regex.
+        RespoModelError: one of clients roles does not exist in model.
+
+    Examples:
+        >>> filter_clients(respo_model, [RespoClient("admin"), RespoClient()], "user.read_all")
+        array([ True, False])
+    """
+    client.RespoClient.validate_permission(permission_name, respo_model)
+
+    roles_strings: Dict[str, int] = {}
+    clients_strings = numpy.fromiter(
+        (
+            roles_strings.setdefault(str(respo_client), len(roles_strings))
+            for respo_client in clients
+        ),
+        dtype=numpy.intp,
+        count=len(clients),
+    )
+
+    roles_index: Dict[str, int] = {
+        role: role_index for role_index, role in enumerate(respo_model.ROLES)
+    }
+    roles_counts = [
+        roles_string.count(",") + 1 if roles_string else 0
+        for roles_string in roles_strings
+    ]
+    all_roles = ",".join(filter(None, roles_strings)).split(",")
+    try:
+        roles_indexes = numpy.fromiter(
+            map(roles_index.__getitem__, all_roles) if any(roles_counts) else (),
+            dtype=numpy.intp,
+        )
+    except KeyError as unknown_role:
+        raise exceptions.RespoModelError(
+            "Could not filter clients\n"
+            f"Role does not exist in respo model: {unknown_role.args[0]}"
+        ) from None
+    strings_indexes = numpy.repeat(
+        numpy.arange(len(roles_strings), dtype=numpy.intp), roles_counts
+    )
+
+    if permission_name not in respo_model.PERMS:
+        return numpy.zeros(len(clients), dtype=bool)
+
+    permission_id = respo_model.permissions_ids[permission_name]
+    permission_column = (
+        respo_model.matrix(packed=True)[:, permission_id // 8] >> permission_id % 8
+    ) & 1
+    granted = permission_column[roles_indexes] == 1
+    strings_granted = numpy.zeros(len(roles_strings), dtype=bool)
+    strings_granted[strings_indexes[granted]] = True
+    return strings_granted[clients_strings]
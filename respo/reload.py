@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from respo import core
+
+logger = logging.getLogger(__name__)
+
+
+class RespoModelWatcher:
+    """Reloads respo model in background when its pickle file is rebuilt.
+
+    Every interval seconds calls respo_model_cache.reload(), which loads and
+    validates new model and swaps it atomically, so RespoModel.get_respo_model()
+    never waits for unpickling. When the file is missing or invalid, error
+    is logged and previous model is kept. Works best with
+    respo.config.RESPO_MODEL_CHECK_INTERVAL set high, then requests don't
+    even stat the file.
+
+    Args:
+        interval: seconds between checks
+        respo_model_cache: cache to reload, respo.core.respo_model_cache by default
+
+    Examples:
+        >>> watcher = RespoModelWatcher(interval=5)
+        >>> watcher.start()  # thread, stopped with watcher.stop()
+        >>> with RespoModelWatcher(interval=5):
+                ...
+        >>> @app.on_event("startup")
+            async def startup():
+                asyncio.create_task(RespoModelWatcher(interval=5).watch_async())
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        respo_model_cache: Optional[core.RespoModelCache] = None,
+    ) -> None:
+        self.interval = interval
+        self.respo_model_cache = respo_model_cache or core.respo_model_cache
+        self.last_error: Optional[Exception] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Reloads respo model if the file was rebuilt, never raises.
+
+        Return:
+            True: new model was loaded.
+            False: file did not change or new model could not be loaded.
+        """
+        try:
+            reloaded = self.respo_model_cache.reload()
+        except Exception as exc:
+            self.last_error = exc
+            logger.exception("Could not reload respo model, keeping previous one")
+            return False
+        self.last_error = None
+        return reloaded
+
+    def start(self) -> None:
+        """Starts checking the file in background daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError("RespoModelWatcher is already started")
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="RespoModelWatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops background thread started with start()."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "RespoModelWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    async def watch_async(self) -> None:
+        """Checks the file every interval seconds until cancelled.
+
+        Meant to be run as asyncio task in ASGI apps, loading is done in
+        default executor, so event loop is not blocked by unpickling.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            await loop.run_in_executor(None, self.check)
@@ -0,0 +1,115 @@
+"""Lightweight entry point for checking permissions with compiled respo model.
+
+It imports only standard library and stdlib-only parts of respo (no pydantic,
+no respo.settings), so it is cheap to import for example in serverless
+functions. Respo model is loaded from memory mapped artifact written by
+respo create (see respo.artifact) or from module generated with
+respo create --compile-module (see respo.compiled).
+
+Examples:
+    >>> from respo import runtime
+    >>> runtime.has_permission("admin,default", "user.read_all")
+    True
+    >>> respo_model = runtime.get_respo_model()
+    >>> respo_model.has_permission(["admin"], "user.read_all")
+    True
+"""
+
+import importlib
+import os
+import pathlib
+from typing import Dict, Optional, Tuple, Union
+
+from respo import artifact, compiled, exceptions
+
+# the same defaults and environment variables as in respo.settings.Config
+DEFAULT_AUTO_FOLDER_NAME = ".respo_cache"
+DEFAULT_AUTO_ARTIFACT_FILE_NAME = "__auto__respo_model.map"
+DEFAULT_COMPILED_MODULE_NAME = "respo_compiled"
+
+
+def path_artifact_file() -> pathlib.Path:
+    """Path to artifact from RESPO_AUTO_FOLDER_NAME and RESPO_AUTO_ARTIFACT_FILE_NAME."""
+    return pathlib.Path(
+        os.environ.get("RESPO_AUTO_FOLDER_NAME", DEFAULT_AUTO_FOLDER_NAME),
+        os.environ.get(
+            "RESPO_AUTO_ARTIFACT_FILE_NAME", DEFAULT_AUTO_ARTIFACT_FILE_NAME
+        ),
+    )
+
+
+# path: (mtime, size, inode) of mapped file and its model, only the latest
+# mapping of every path is kept, so replaced files are unmapped (and their
+# descriptors closed) as soon as callers drop old models
+_artifacts: Dict[str, Tuple[Tuple[int, int, int], artifact.MappedRespoModel]] = {}
+
+
+def _load_artifact(
+    path: str, mtime_ns: int, size: int, inode: int
+) -> artifact.MappedRespoModel:
+    file_key = (mtime_ns, size, inode)
+    cached = _artifacts.get(path)
+    if cached is not None and cached[0] == file_key:
+        return cached[1]
+    respo_model = artifact.MappedRespoModel(path)
+    _artifacts[path] = (file_key, respo_model)
+    return respo_model
+
+
+def get_respo_model(
+    path: Union[str, "os.PathLike[str]", None] = None
+) -> artifact.MappedRespoModel:
+    """Returns respo model mapped from artifact, by default from path_artifact_file().
+
+    Mapped model is cached in the process and mapped again only when the
+    file was rebuilt, checked with single os.stat() call. Only the latest
+    model of every path is cached.
+
+    Raises:
+        RespoModelError: artifact does not exist or is invalid.
+    """
+    if path is None:
+        path = path_artifact_file()
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise exceptions.RespoModelError(
+            f"Respo artifact file does not exist in {path}."
+            " Use command: respo create [OPTIONS] FILENAME"
+        )
+    return _load_artifact(
+        str(path), stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+    )
+
+
+def get_compiled_respo_model(
+    module_name: str = DEFAULT_COMPILED_MODULE_NAME,
+) -> compiled.CompiledRespoModel:
+    """Imports module generated with respo create --compile-module.
+
+    Raises:
+        ModuleNotFoundError: module does not exist.
+    """
+    return importlib.import_module(module_name).get_respo_model()
+
+
+def has_permission(
+    roles: Optional[str],
+    permission_name: str,
+    respo_model: Union[
+        artifact.MappedRespoModel, compiled.CompiledRespoModel, None
+    ] = None,
+) -> bool:
+    """Checks if roles separated by comma (as stored by respo fields) grant permission.
+
+    Permission name is not validated, unknown permission gives False.
+    When respo_model is None, get_respo_model() is used.
+
+    Raises:
+        RespoModelError: one of roles does not exist in model.
+    """
+    if respo_model is None:
+        respo_model = get_respo_model()
+    if not roles:
+        return False
+    return respo_model.has_permission(roles.split(","), permission_name)
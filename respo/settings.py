@@ -9,15 +9,37 @@ class Config(pydantic.BaseSettings):
     Args:
         RESPO_AUTO_FOLDER_NAME (str): folder with pickled respo model
         RESPO_AUTO_BINARY_FILE_NAME (str): file name of pickled model in auto folder
+        RESPO_AUTO_ARTIFACT_FILE_NAME (str): file name of memory mappable model
+            in auto folder, see respo.artifact
+        RESPO_AUTO_INPUT_HASH_FILE_NAME (str): file name of hash of last respo
+            create input in auto folder, used to skip unchanged rebuilds
         RESPO_CHECK_FORCE (bool): require strict validation in respo.RespoClient methods
         RESPO_FILE_NAME_RESPO_MODEL (str): name of exported python file
+        RESPO_FILE_NAME_COMPILED_MODULE (str): name of python module generated
+            with respo create --compile-module
+        RESPO_FILE_NAME_ROLES_IDS (str): name of json file with stable role ids
+            written by respo create, it should be committed with policy files
+        RESPO_ROLES_CACHE_SIZE (int): max number of roles combinations with
+            resolved permissions cached in respo model, 0 disables cache
+        RESPO_CLIENT_ROLES_CACHE_SIZE (int): max number of distinct roles strings
+            with parsed roles shared by clients loaded from database, 0 disables cache
+        RESPO_MODEL_CHECK_INTERVAL (float): min number of seconds between checks
+            if pickled model file was rebuilt in RespoModel.get_respo_model(),
+            0 checks on every call
     """
 
     RESPO_AUTO_FOLDER_NAME: str = ".respo_cache"
     RESPO_AUTO_BINARY_FILE_NAME: str = "__auto__respo_model.bin"
+    RESPO_AUTO_ARTIFACT_FILE_NAME: str = "__auto__respo_model.map"
+    RESPO_AUTO_INPUT_HASH_FILE_NAME: str = "__auto__respo_input.sha256"
 
     RESPO_CHECK_FORCE: bool = True
     RESPO_FILE_NAME_RESPO_MODEL: str = "respo_model.py"
+    RESPO_FILE_NAME_COMPILED_MODULE: str = "respo_compiled.py"
+    RESPO_FILE_NAME_ROLES_IDS: str = "respo_roles_ids.json"
+    RESPO_ROLES_CACHE_SIZE: int = 1024
+    RESPO_CLIENT_ROLES_CACHE_SIZE: int = 4096
+    RESPO_MODEL_CHECK_INTERVAL: float = 0.0
 
     @property
     def path_bin_file(self):
@@ -26,10 +48,34 @@ class Config(pydantic.BaseSettings):
             f"{self.RESPO_AUTO_FOLDER_NAME}/{self.RESPO_AUTO_BINARY_FILE_NAME}"
         )
 
+    @property
+    def path_artifact_file(self):
+        """Get pathlib path to memory mappable artifact file"""
+        return pathlib.Path(
+            f"{self.RESPO_AUTO_FOLDER_NAME}/{self.RESPO_AUTO_ARTIFACT_FILE_NAME}"
+        )
+
+    @property
+    def path_input_hash_file(self):
+        """Get pathlib path to hash of last respo create input"""
+        return pathlib.Path(
+            f"{self.RESPO_AUTO_FOLDER_NAME}/{self.RESPO_AUTO_INPUT_HASH_FILE_NAME}"
+        )
+
     @property
     def path_python_file(self):
         """Get pathlib path to respo python file"""
         return pathlib.Path(self.RESPO_FILE_NAME_RESPO_MODEL)
 
+    @property
+    def path_compiled_module_file(self):
+        """Get pathlib path to compiled python module"""
+        return pathlib.Path(self.RESPO_FILE_NAME_COMPILED_MODULE)
+
+    @property
+    def path_roles_ids_file(self):
+        """Get pathlib path to roles ids file"""
+        return pathlib.Path(self.RESPO_FILE_NAME_ROLES_IDS)
+
 
 config = Config()
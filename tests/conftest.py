@@ -12,6 +12,8 @@ from respo import cli
 def mock_env_variables_and_cleanup(tmpdir):
     respo.config.RESPO_AUTO_FOLDER_NAME = f"{tmpdir}/auto"
     respo.config.RESPO_FILE_NAME_RESPO_MODEL = f"{tmpdir}/respo_model.py"
+    respo.config.RESPO_FILE_NAME_COMPILED_MODULE = f"{tmpdir}/respo_compiled.py"
+    respo.config.RESPO_FILE_NAME_ROLES_IDS = f"{tmpdir}/respo_roles_ids.json"
 
 
 def get_model(name: str) -> respo.RespoModel:
@@ -0,0 +1,100 @@
+import os
+import struct
+
+import pytest
+
+import respo
+from respo import artifact
+from tests import conftest
+
+valid_files = [file for file in os.scandir("./tests/cases/valid")]
+
+
+@pytest.mark.parametrize("file", valid_files)
+def test_mapped_respo_model_matches_respo_model(file: os.DirEntry, tmpdir):
+    respo_model = conftest.get_model(file.path)
+    artifact_path = tmpdir / "model.map"
+    artifact_path.write_binary(artifact.dumps_artifact(respo_model))
+    mapped_model = artifact.MappedRespoModel(artifact_path)
+
+    assert mapped_model.fingerprint == respo_model.fingerprint
+    assert list(mapped_model.permissions) == respo_model.permissions
+    assert mapped_model.permissions_ids == respo_model.permissions_ids
+    assert list(mapped_model.ROLES) == list(respo_model.ROLES)
+    assert mapped_model.roles_ids == {
+        role: respo_model.roles_ids[role] for role in respo_model.ROLES
+    }
+    for name, label in [
+        *respo_model.PERMS.__dict__.items(),
+        *respo_model.ROLES.__dict__.items(),
+    ]:
+        if name.isupper():
+            container = mapped_model.PERMS if "." in label else mapped_model.ROLES
+            assert getattr(container, name) == label
+    for role in respo_model.ROLES:
+        assert role in mapped_model.ROLES
+        assert role not in mapped_model.PERMS
+        assert mapped_model.roles_bitmask([role]) == respo_model.ROLES.bitmask(role)
+        assert mapped_model.effective_permissions(
+            [role]
+        ) == respo_model.effective_permissions([role])
+        for permission in list(respo_model.PERMS) + ["x.not_exists"]:
+            assert mapped_model.has_permission([role], permission) == respo.RespoClient(
+                role
+            ).has_permission(permission, respo_model)
+    mapped_model.close()
+
+
+def test_mapped_respo_model_with_client_and_saved_file(get_general_model):
+    mapped_model = artifact.MappedRespoModel(respo.config.path_artifact_file)
+    client = respo.RespoClient("default")
+    assert client.add_role("pro_user", mapped_model)  # type: ignore
+    assert client.has_permission("book.sell", mapped_model)  # type: ignore
+    assert not client.has_permission("book.buy", mapped_model)  # type: ignore
+    assert client.check_many(
+        ["book.sell", "book.buy"], mapped_model  # type: ignore
+    ) == {"book.sell": True, "book.buy": False}
+
+    with pytest.raises(respo.RespoClientError):
+        client.add_role("not_exists", mapped_model)  # type: ignore
+    with pytest.raises(respo.RespoModelError):
+        mapped_model.has_permission(["not_exists"], "book.sell")
+    with pytest.raises(respo.RespoModelError):
+        mapped_model.effective_permissions(["default", "not_exists"])
+
+
+def test_mapped_respo_model_labels_lookup(get_general_model):
+    mapped_model = artifact.MappedRespoModel(respo.config.path_artifact_file)
+    assert mapped_model.PERMS.USER__READ_ALL == "user.read_all"
+    assert mapped_model.permissions_ids["user.read_all"] == 6
+    assert mapped_model.permissions[6] == "user.read_all"
+    assert mapped_model.permissions[-1] == get_general_model.permissions[-1]
+    assert mapped_model.permissions[:2] == get_general_model.permissions[:2]
+    assert mapped_model.ROLES.PRO_USER == "pro_user"
+    assert mapped_model.roles_ids["pro_user"] == get_general_model.roles_ids["pro_user"]
+    for not_exists in ["", "user.read", "user.read_all_", "zzz", "\ud800", None]:
+        assert not_exists not in mapped_model.PERMS
+        assert not_exists not in mapped_model.ROLES
+    with pytest.raises(KeyError):
+        mapped_model.permissions_ids["x.not_exists"]
+    with pytest.raises(AttributeError):
+        mapped_model.PERMS.USER__NOT_EXISTS
+    with pytest.raises(AttributeError):
+        mapped_model.PERMS.USER_READ_ALL
+    mapped_model.close()
+
+
+def test_mapped_respo_model_invalid_files(get_general_model, tmpdir):
+    data = artifact.dumps_artifact(get_general_model)
+    invalid_files = [
+        b"",
+        b"RESPOMAP",
+        b"x" + data[1:],
+        data[:8] + struct.pack("<H", artifact.ARTIFACT_VERSION - 1) + data[10:],
+        data[:-1],
+    ]
+    for invalid_data in invalid_files:
+        artifact_path = tmpdir / "invalid.map"
+        artifact_path.write_binary(invalid_data)
+        with pytest.raises(respo.RespoModelError):
+            artifact.MappedRespoModel(artifact_path)
@@ -1,10 +1,16 @@
+import importlib.util
+import json
+import os
+import pathlib
+import shutil
 from typing import Tuple
 
 import pytest
+import yaml
 from click import testing
 
 import respo
-from respo import cli
+from respo import cli, fixture
 from tests import conftest
 
 
@@ -54,19 +60,152 @@ def test_generate_respo_model_file(
 def test_respo_create_fail_with_no_file(runner: testing.CliRunner):
     result = runner.invoke(cli.app, ["create"])
     assert result.exit_code == 2
-    assert "Missing argument 'FILE'" in result.stdout
+    assert "Missing argument 'FILES...'" in result.stdout
 
 
-def test_respo_create_fail_when_dir(runner: testing.CliRunner):
-    result = runner.invoke(cli.app, ["create", "tests"])
-    assert result.exit_code == 2
-    assert "Is a directory" in result.stdout
+def test_respo_create_fail_when_dir_without_policy_files(
+    runner: testing.CliRunner, tmpdir
+):
+    pathlib.Path(tmpdir, "policy.txt").write_text("permissions: []")
+    result = runner.invoke(cli.app, ["create", str(tmpdir)])
+    assert result.exit_code == 1
+    assert "does not contain any .yml, .yaml, .json, .toml file" in result.stdout
 
 
 def test_respo_create_fail_when_no_file(runner: testing.CliRunner):
     result = runner.invoke(cli.app, ["create", "some NoT ExisTing File!"])
     assert result.exit_code == 2
-    assert "No such file or directory" in result.stdout
+    assert "Path 'some NoT ExisTing File!' does not exist" in result.stdout
+
+
+def split_general_policy(directory: pathlib.Path) -> None:
+    data = yaml.safe_load(pathlib.Path("tests/cases/general.yml").read_text())
+    pathlib.Path(directory, "teams").mkdir(parents=True)
+    pathlib.Path(directory, "permissions.yml").write_text(
+        yaml.safe_dump({"permissions": data["permissions"]})
+    )
+    pathlib.Path(directory, "teams", "a.yaml").write_text(
+        yaml.safe_dump(
+            {"principles": data["principles"][:1], "roles": data["roles"][:2]}
+        )
+    )
+    pathlib.Path(directory, "teams", "b.yml").write_text(
+        yaml.safe_dump(
+            {"principles": data["principles"][1:], "roles": data["roles"][2:]}
+        )
+    )
+    pathlib.Path(directory, "teams", "README.md").write_text("not a policy")
+
+
+def test_respo_create_merges_directory_and_files(runner: testing.CliRunner, tmpdir):
+    split_general_policy(pathlib.Path(tmpdir, "policy"))
+    general_model = conftest.get_model("tests/cases/general.yml")
+
+    result = runner.invoke(cli.app, ["create", f"{tmpdir}/policy"])
+    assert result.exit_code == 0, result.stdout
+    assert "Validating respo model from 3 files" in result.stdout
+    assert respo.RespoModel.get_respo_model() == general_model
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "create",
+            f"{tmpdir}/policy/permissions.yml",
+            f"{tmpdir}/policy/teams",
+            "--force",
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    assert respo.RespoModel.get_respo_model() == general_model
+
+
+def test_respo_create_merge_policy_files_errors(runner: testing.CliRunner, tmpdir):
+    split_general_policy(pathlib.Path(tmpdir, "policy"))
+    result = runner.invoke(
+        cli.app, ["create", f"{tmpdir}/policy", "tests/cases/general.yml"]
+    )
+    assert result.exit_code == 1
+    assert "Could not merge policy files" in result.stdout
+    assert "Error in permissions section:" in result.stdout
+    assert (
+        f"is declared in {tmpdir}/policy/permissions.yml and tests/cases/general.yml"
+    ) in result.stdout
+
+    pathlib.Path(tmpdir, "policy", "teams", "c.yml").write_text("- a\n- b\n")
+    result = runner.invoke(cli.app, ["create", f"{tmpdir}/policy"])
+    assert result.exit_code == 1
+    assert "c.yml must contain mapping" in result.stdout
+
+    pathlib.Path(tmpdir, "policy", "teams", "c.yml").write_text("roles: {}")
+    result = runner.invoke(cli.app, ["create", f"{tmpdir}/policy"])
+    assert result.exit_code == 1
+    assert "Error in roles section" in result.stdout
+
+    pathlib.Path(tmpdir, "policy", "teams", "c.yml").write_text("roles: [a")
+    result = runner.invoke(cli.app, ["create", f"{tmpdir}/policy"])
+    assert result.exit_code == 1
+    assert "Could not process file, syntax is invalid" in result.stdout
+    assert "c.yml" in result.stdout
+
+
+def test_merge_policy_files_in_parallel(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    contents = ["permissions: [a.b]", "permissions: [a.c]\nroles: []"]
+    policies = cli.parse_policy_files(["a.yml", "b.yml"], contents)
+    assert cli.merge_policy_files(["a.yml", "b.yml", "c.yml"], [*policies, None]) == {
+        "permissions": ["a.b", "a.c"],
+        "principles": [],
+        "roles": [],
+    }
+    with pytest.raises(cli.PolicyFileError):
+        cli.merge_policy_files(["a.yml", "b.yml"], [{"x": 1}, {"x": 1}])
+
+
+def test_respo_create_json_and_toml_policy_files(runner: testing.CliRunner, tmpdir):
+    data = yaml.safe_load(pathlib.Path("tests/cases/general.yml").read_text())
+    pathlib.Path(tmpdir, "permissions.json").write_text(
+        json.dumps({"permissions": data["permissions"]})
+    )
+    pathlib.Path(tmpdir, "roles.toml").write_text(
+        "".join(
+            "[[roles]]\n"
+            + "".join(f"{key} = {json.dumps(value)}\n" for key, value in role.items())
+            for role in data["roles"]
+        )
+    )
+    pathlib.Path(tmpdir, "principles.yml").write_text(
+        yaml.safe_dump({"principles": data["principles"]})
+    )
+
+    result = runner.invoke(cli.app, ["create", str(tmpdir)])
+    assert result.exit_code == 0, result.stdout
+    assert "Parsed in" in result.stdout
+    assert "validated in" in result.stdout
+    assert "serialized in" in result.stdout
+    assert respo.RespoModel.get_respo_model() == conftest.get_model(
+        "tests/cases/general.yml"
+    )
+
+    pathlib.Path(tmpdir, "permissions.json").write_text('{"permissions": [')
+    result = runner.invoke(cli.app, ["create", str(tmpdir)])
+    assert result.exit_code == 1
+    assert "Could not process file, syntax is invalid" in result.stdout
+    assert "permissions.json" in result.stdout
+
+
+def test_parse_toml_policy_file_without_tomllib(monkeypatch):
+    content = '[[roles]]\nname = "default"\npermissions = ["user.read"]\n'
+    expected = {"roles": [{"name": "default", "permissions": ["user.read"]}]}
+    assert cli.parse_policy_file("roles.toml", content) == expected
+
+    monkeypatch.setattr(cli, "tomllib", None)
+    assert cli.parse_policy_file("roles.toml", content) == expected
+    with pytest.raises(cli.PolicyFileError, match="roles.toml"):
+        cli.parse_policy_file("roles.toml", "[[roles]\n")
+
+    monkeypatch.setattr(cli, "toml", None)
+    with pytest.raises(cli.PolicyFileError, match="tomli or toml package"):
+        cli.parse_policy_file("roles.toml", content)
 
 
 def test_respo_create_fail_when_yaml_sytax_invalid(runner: testing.CliRunner):
@@ -100,6 +239,16 @@ def test_respo_create_success_valid_yml_file(
     assert "Success!" in result.stdout
 
 
+def test_respo_create_success_valid_yml_from_stdin(runner: testing.CliRunner):
+    with open("tests/cases/general.yml") as file:
+        result = runner.invoke(cli.app, ["create", "-"], input=file.read())
+    assert result.exit_code == 0
+    assert "Success!" in result.stdout
+    assert respo.RespoModel.get_respo_model() == conftest.get_model(
+        "tests/cases/general.yml"
+    )
+
+
 def test_respo_create_success_valid_yml_file_2x_modify_ok(runner: testing.CliRunner):
     result = runner.invoke(cli.app, ["create", "tests/cases/general.yml"])
     respo.RespoModel.get_respo_model()
@@ -107,3 +256,218 @@ def test_respo_create_success_valid_yml_file_2x_modify_ok(runner: testing.CliRun
     respo.RespoModel.get_respo_model()
     assert result.exit_code == 0
     assert "Success!" in result.stdout
+
+
+def test_respo_create_keeps_roles_ids_stable(runner: testing.CliRunner, tmpdir):
+    result = runner.invoke(cli.app, ["create", "tests/cases/general.yml"])
+    assert result.exit_code == 0
+    roles_ids = respo.RespoModel.get_respo_model().roles_ids
+    assert roles_ids == {"admin": 0, "default": 1, "pro_user": 2, "superadmin": 3}
+
+    data = yaml.safe_load(pathlib.Path("tests/cases/general.yml").read_text())
+    data["roles"] = [role for role in data["roles"] if role["name"] != "pro_user"]
+    data["roles"][-1]["include"] = ["admin"]
+    data["roles"].append({"name": "aaa_first", "permissions": ["book.buy"]})
+    changed_file = pathlib.Path(tmpdir, "changed.yml")
+    changed_file.write_text(yaml.safe_dump(data))
+
+    # fresh checkout, only committed roles ids file is left
+    shutil.rmtree(respo.config.RESPO_AUTO_FOLDER_NAME)
+    result = runner.invoke(cli.app, ["create", str(changed_file)])
+    assert result.exit_code == 0
+    respo_model = respo.RespoModel.get_respo_model()
+    assert respo_model.roles_ids == {**roles_ids, "aaa_first": 4}
+    assert respo_model.roles_from_ids_bitmask(0b10011) == [
+        "admin",
+        "default",
+        "aaa_first",
+    ]
+    assert json.loads(respo.config.path_roles_ids_file.read_text()) == {
+        **roles_ids,
+        "aaa_first": 4,
+    }
+
+
+@pytest.mark.parametrize(
+    "content,error",
+    [
+        ("{", "Could not read roles ids file"),
+        ("[1, 2]", "must contain mapping of role names to non-negative"),
+        ('{"admin": -1}', "must contain mapping of role names to non-negative"),
+        ('{"admin": "1"}', "must contain mapping of role names to non-negative"),
+        ('{"admin": 1, "default": 1}', "contains duplicated ids"),
+    ],
+)
+def test_respo_create_fail_when_roles_ids_file_invalid(
+    runner: testing.CliRunner, content: str, error: str
+):
+    respo.config.path_roles_ids_file.write_text(content)
+    result = runner.invoke(cli.app, ["create", "tests/cases/general.yml"])
+    assert result.exit_code == 1
+    assert error in result.stdout
+    assert not respo.config.path_bin_file.exists()
+
+
+def test_respo_create_warns_about_roles_ids_over_bigint_limit(
+    runner: testing.CliRunner,
+):
+    respo.config.path_roles_ids_file.write_text('{"retired": 62}')
+    result = runner.invoke(cli.app, ["create", "tests/cases/general.yml"])
+    assert result.exit_code == 0
+    assert "WARNING: Roles admin, default, pro_user, superadmin have ids 63" in (
+        result.stdout
+    )
+
+
+@pytest.mark.parametrize("file", list(os.scandir("./tests/cases/valid")))
+def test_respo_create_compile_module(
+    runner: testing.CliRunner, file: os.DirEntry, monkeypatch, tmpdir
+):
+    monkeypatch.setattr(
+        respo.config, "RESPO_FILE_NAME_COMPILED_MODULE", f"{tmpdir}/compiled.py"
+    )
+    result = runner.invoke(cli.app, ["create", file.path, "--compile-module"])
+    assert result.exit_code == 0
+    assert "Saved compiled module to" in result.stdout
+
+    spec = importlib.util.spec_from_file_location(
+        "compiled", respo.config.path_compiled_module_file
+    )
+    compiled_module = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(compiled_module)  # type: ignore
+    compiled_model = compiled_module.get_respo_model()
+    respo_model = respo.RespoModel.get_respo_model()
+
+    assert compiled_model.fingerprint == respo_model.fingerprint
+    assert compiled_model.permissions_ids == respo_model.permissions_ids
+    for name, label in respo_model.ROLES.__dict__.items():
+        if name.isupper():
+            assert getattr(compiled_module.ROLES, name) == label
+    for name, label in respo_model.PERMS.__dict__.items():
+        if name.isupper():
+            assert getattr(compiled_module.PERMS, name) == label
+            assert getattr(compiled_model.PERMS, name) == label
+    for name, label in respo_model.ROLES.__dict__.items():
+        if name.isupper():
+            assert getattr(compiled_model.ROLES, name) == label
+    assert list(compiled_model.PERMS) == list(respo_model.PERMS)
+    assert list(compiled_model.ROLES) == list(respo_model.ROLES)
+    assert len(compiled_model.ROLES) == len(respo_model.ROLES)
+    assert "x.not_exists" not in compiled_model.PERMS
+    assert {name for name in respo_model.PERMS.__dict__ if name.isupper()} <= set(
+        dir(compiled_model.PERMS)
+    )
+    with pytest.raises(AttributeError):
+        compiled_model.PERMS.NOT_EXISTS
+    for permission in respo_model.PERMS:
+        assert compiled_model.PERMS.roles(permission) == respo_model.PERMS.roles(
+            permission
+        )
+        assert compiled_model.PERMS.bitmask(permission) == respo_model.PERMS.bitmask(
+            permission
+        )
+    with pytest.raises(respo.RespoModelError):
+        compiled_model.PERMS.roles("x.not_exists")
+    with pytest.raises(respo.RespoModelError):
+        compiled_model.ROLES.bitmask("not_exists")
+    for role in respo_model.ROLES:
+        assert compiled_model.ROLES.permissions(role) == sorted(
+            respo_model.ROLES.permissions(role)
+        )
+        assert compiled_model.roles_ids[role] == respo_model.roles_ids[role]
+        assert compiled_model.roles_bitmask([role]) == respo_model.ROLES.bitmask(role)
+        for permission in list(respo_model.PERMS) + ["x.not_exists"]:
+            client = respo.RespoClient(role)
+            assert compiled_model.has_permission(
+                [role], permission
+            ) == client.has_permission(permission, respo_model)
+            assert client.has_permission(
+                permission, compiled_model
+            ) == client.has_permission(permission, respo_model)
+
+    with pytest.raises(respo.RespoModelError):
+        compiled_model.effective_permissions(["not_exists"])
+
+
+def test_respo_create_skips_unchanged_input(runner: testing.CliRunner, tmpdir):
+    policy_file = pathlib.Path(tmpdir, "policy.yml")
+    policy_file.write_text(pathlib.Path("tests/cases/general.yml").read_text())
+
+    result = runner.invoke(cli.app, ["create", str(policy_file)])
+    assert result.exit_code == 0
+    assert "Cache hit" not in result.stdout
+    assert respo.config.path_input_hash_file.exists()
+
+    result = runner.invoke(cli.app, ["create", str(policy_file)])
+    assert result.exit_code == 0
+    assert "Cache hit" in result.stdout
+    assert "Success!" in result.stdout
+
+    for args in [
+        ["--force"],
+        ["--compile-module"],
+        ["--no-python-file"],
+    ]:
+        result = runner.invoke(cli.app, ["create", str(policy_file), *args])
+        assert result.exit_code == 0
+        assert "Cache hit" not in result.stdout
+
+    os.remove(respo.config.path_artifact_file)
+    result = runner.invoke(cli.app, ["create", str(policy_file), "--no-python-file"])
+    assert "Cache hit" not in result.stdout
+    assert respo.config.path_artifact_file.exists()
+
+    policy_file.write_text(policy_file.read_text() + "\n# changed\n")
+    result = runner.invoke(cli.app, ["create", str(policy_file), "--no-python-file"])
+    assert "Cache hit" not in result.stdout
+    result = runner.invoke(cli.app, ["create", str(policy_file), "--no-python-file"])
+    assert "Cache hit" in result.stdout
+
+    os.remove(respo.config.path_roles_ids_file)
+    result = runner.invoke(cli.app, ["create", str(policy_file), "--no-python-file"])
+    assert "Cache hit" not in result.stdout
+    assert respo.config.path_roles_ids_file.exists()
+
+
+def test_respo_create_interrupted_is_not_cache_hit(
+    runner: testing.CliRunner, tmpdir, monkeypatch
+):
+    policy_file = pathlib.Path(tmpdir, "policy.yml")
+    policy = pathlib.Path("tests/cases/general.yml").read_text()
+    policy_file.write_text(policy)
+    result = runner.invoke(cli.app, ["create", str(policy_file)])
+    assert result.exit_code == 0
+
+    def generate_respo_model_file(respo_model):
+        raise KeyboardInterrupt()
+
+    policy_file.write_text(policy + "\n# changed\n")
+    with monkeypatch.context() as patch:
+        patch.setattr(cli, "generate_respo_model_file", generate_respo_model_file)
+        result = runner.invoke(cli.app, ["create", str(policy_file)])
+    assert result.exit_code != 0
+    assert not respo.config.path_input_hash_file.exists()
+
+    policy_file.write_text(policy)
+    result = runner.invoke(cli.app, ["create", str(policy_file)])
+    assert result.exit_code == 0
+    assert "Cache hit" not in result.stdout
+    assert respo.config.path_input_hash_file.exists()
+
+
+@pytest.mark.parametrize("name", ["policy.yml", "policy.json"])
+def test_respo_generate_fixture(runner: testing.CliRunner, tmpdir, name: str):
+    policy_file = pathlib.Path(tmpdir, name)
+    options = ["--permissions", "300", "--roles", "20", "--include-depth", "3"]
+    result = runner.invoke(cli.app, ["generate-fixture", str(policy_file), *options])
+    assert result.exit_code == 0, result.stdout
+    assert "Saved policy with 300 permissions, 30 principles and 20 roles" in (
+        result.stdout
+    )
+    assert cli.parse_policy_file(
+        name, policy_file.read_text()
+    ) == fixture.generate_policy(permissions=300, roles=20, include_depth=3)
+
+    result = runner.invoke(cli.app, ["create", str(policy_file)])
+    assert result.exit_code == 0, result.stdout
+    assert len(respo.RespoModel.get_respo_model().ROLES) == 20
@@ -1,8 +1,11 @@
+import copy
+import pickle
 from typing import Optional
 
 import pytest
 
 import respo
+from respo import core
 
 
 @pytest.fixture(scope="function")
@@ -35,6 +38,82 @@ def test_create_respo_client_init():
     assert str(client) == "xxx,yyy,123_123"
 
 
+def test_respo_client_parses_roles_lazily():
+    raw_roles = "xxx,yyy"
+    client = respo.RespoClient(raw_roles)
+    assert str(client) is raw_roles
+    assert client._roles is None
+
+    assert client.roles == ["xxx", "yyy"]
+    client.roles.append("zzz")
+    assert str(client) == "xxx,yyy,zzz"
+
+    client.roles = ["abc"]
+    assert client.roles == ["abc"]
+    assert str(client) == "abc"
+
+
+def test_respo_client_slotted_ordered_set_roles():
+    client = respo.RespoClient("xxx,yyy,xxx")
+    assert not hasattr(client, "__dict__")
+    assert client.roles == ["xxx", "yyy"]
+    assert str(client) == "xxx,yyy,xxx"
+    assert "yyy" in client
+    assert "zzz" not in client
+
+    assert client.add_role_unchecked("zzz")
+    assert client.remove_role_unchecked("xxx")
+    assert not client.remove_role_unchecked("xxx")
+    assert client.add_role_unchecked("xxx")
+    assert client.roles == ["yyy", "zzz", "xxx"]
+    assert str(client) == "yyy,zzz,xxx"
+
+
+def test_respo_client_from_cached_shares_roles_copy_on_write():
+    raw_roles = ",".join(["admin", "default"])
+    first = respo.RespoClient.from_cached(raw_roles)
+    second = respo.RespoClient.from_cached("admin,default")
+    assert first._roles is second._roles
+    assert str(first) is str(second)
+    assert first.roles == ["admin", "default"]
+    assert "default" in second
+
+    assert not second.add_role_unchecked("admin")
+    assert first._roles is second._roles
+    assert second.remove_role_unchecked("admin")
+    assert second.add_role_unchecked("pro_user")
+    assert first._roles is not second._roles
+    assert str(first) == "admin,default"
+    assert str(second) == "default,pro_user"
+    assert respo.RespoClient.from_cached("admin,default").roles == [
+        "admin",
+        "default",
+    ]
+    assert str(respo.RespoClient.from_cached(None)) == ""
+
+
+def test_respo_client_roles_is_live_view():
+    client = respo.RespoClient.from_cached("xxx,yyy")
+    roles = client.roles
+    roles.append("zzz")
+    roles.append("xxx")
+    assert client.roles == ["xxx", "yyy", "zzz"]
+    assert client.roles == ("xxx", "yyy", "zzz")
+    assert respo.RespoClient.from_cached("xxx,yyy").roles == ["xxx", "yyy"]
+
+    roles.remove("xxx")
+    with pytest.raises(ValueError):
+        roles.remove("xxx")
+    roles.insert(0, "abc")
+    roles[1] = "def"
+    del roles[-1]
+    assert str(client) == "abc,def"
+    assert roles[0] == "abc" and len(roles) == 2 and "def" in roles
+    assert roles.copy() == ["abc", "def"] and isinstance(roles.copy(), list)
+    roles.clear()
+    assert str(client) == "" and client.roles == []
+
+
 add_remove_role_exc_cases = [
     ("book123_UpPeR", None, False, ValueError),
     ("śćżźć_not_ascii", None, False, ValueError),
@@ -200,3 +279,132 @@ def test_client_permissions_superadmin(get_general_model: respo.RespoModel):
     assert client.has_permission("book.read", respo_model)
     assert client.has_permission("book.sell", respo_model)
     assert not client.has_permission("book.buy", respo_model)
+
+
+def test_client_effective_permissions_cached_and_invalidated(
+    get_general_model: respo.RespoModel,
+):
+    respo_model = get_general_model
+    client = respo.RespoClient()
+    assert client.effective_permissions(respo_model) == frozenset()
+
+    assert client.add_role("default", respo_model)
+    permissions = client.effective_permissions(respo_model)
+    assert permissions == frozenset(respo_model.ROLES.permissions("default"))
+    assert client.effective_permissions(respo_model) is permissions
+
+    assert client.add_role("pro_user", respo_model)
+    assert "book.sell" in client.effective_permissions(respo_model)
+    assert client.has_permission("book.sell", respo_model)
+
+    assert client.remove_role("pro_user", respo_model)
+    assert "book.sell" not in client.effective_permissions(respo_model)
+    assert not client.has_permission("book.sell", respo_model)
+
+    core.respo_model_cache.invalidate()
+    other_model = respo.RespoModel.get_respo_model()
+    assert other_model is not respo_model
+    # the same fingerprint, so cached permissions are still valid
+    assert client.effective_permissions(other_model) is permissions
+
+
+def test_client_pickle_and_deepcopy_skip_respo_model(
+    get_general_model: respo.RespoModel,
+):
+    client = respo.RespoClient.from_cached("default,pro_user,default")
+    size = len(pickle.dumps(client))
+    assert client.has_permission("book.sell", get_general_model)
+    assert len(pickle.dumps(client)) == size
+
+    for copied in [pickle.loads(pickle.dumps(client)), copy.deepcopy(client)]:
+        assert copied._effective_permissions_cache is None
+        assert str(copied) == "default,pro_user,default"
+        assert copied.roles == ["default", "pro_user"]
+        assert copied.add_role_unchecked("admin")
+        assert client.roles == ["default", "pro_user"]
+        assert copied.has_permission("book.sell", get_general_model)
+
+
+def test_client_effective_permissions_raise_error_for_unknown_role(
+    get_general_model: respo.RespoModel,
+):
+    client = respo.RespoClient("default,not_existing_role")
+    with pytest.raises(respo.RespoModelError):
+        client.effective_permissions(get_general_model)
+
+
+def test_client_labels_from_model_skip_regex(
+    get_general_model: respo.RespoModel, monkeypatch: pytest.MonkeyPatch
+):
+    def label_init(*args, **kwargs):
+        raise AssertionError("regex validation should be skipped")
+
+    monkeypatch.setattr(core.RoleLabel, "__init__", label_init)
+    monkeypatch.setattr(core.PermissionLabel, "__init__", label_init)
+
+    respo_model = get_general_model
+    client = respo.RespoClient()
+    assert client.add_role(respo_model.ROLES.DEFAULT, respo_model)
+    assert client.add_role("admin", respo_model, validate_input=False)
+    assert client.has_permission(respo_model.PERMS.USER__READ_ALL_BETTER, respo_model)
+    assert client.remove_role("admin", respo_model)
+    assert not client.has_permission("user.read_all_better", respo_model)
+
+
+def test_client_has_permission_invalid_label(get_general_model: respo.RespoModel):
+    client = respo.RespoClient("default")
+    with pytest.raises(ValueError):
+        client.has_permission("user", get_general_model)
+    assert not client.has_permission("user.not_exists", get_general_model)
+
+
+def test_client_validate_permission(get_general_model: respo.RespoModel):
+    respo.RespoClient.validate_permission("user.read_all", get_general_model)
+    respo.RespoClient.validate_permission("user.not_exists", get_general_model)
+    with pytest.raises(ValueError):
+        respo.RespoClient.validate_permission("user", get_general_model)
+
+
+def test_client_unchecked_methods(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    client = respo.RespoClient()
+    assert client.add_role_unchecked(respo_model.ROLES.PRO_USER)
+    assert not client.add_role_unchecked(respo_model.ROLES.PRO_USER)
+    assert client.has_permission_unchecked(respo_model.PERMS.BOOK__SELL, respo_model)
+    assert not client.has_permission_unchecked("not valid!", respo_model)
+
+    assert client.remove_role_unchecked(respo_model.ROLES.PRO_USER)
+    assert not client.remove_role_unchecked(respo_model.ROLES.PRO_USER)
+    assert not client.has_permission_unchecked(
+        respo_model.PERMS.BOOK__SELL, respo_model
+    )
+    assert str(client) == ""
+
+
+def test_client_check_many_has_all_has_any(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    client = respo.RespoClient("pro_user")
+    assert client.check_many(
+        ["book.sell", "book.buy", respo_model.PERMS.USER__READ_BASIC, "x.not_exists"],
+        respo_model,
+    ) == {
+        "book.sell": True,
+        "book.buy": False,
+        "user.read_basic": True,
+        "x.not_exists": False,
+    }
+    assert client.check_many([], respo_model) == {}
+
+    assert client.has_all(["book.sell", "book.read"], respo_model)
+    assert not client.has_all(["book.sell", "book.buy"], respo_model)
+    assert client.has_all([], respo_model)
+
+    assert client.has_any(["book.buy", "book.read"], respo_model)
+    assert not client.has_any(["book.buy", "user.update"], respo_model)
+    assert not client.has_any([], respo_model)
+
+    for method_name in ["check_many", "has_all", "has_any"]:
+        with pytest.raises(ValueError):
+            getattr(client, method_name)(["book.sell", "invalid label"], respo_model)
+        with pytest.raises(respo.RespoModelError):
+            getattr(respo.RespoClient("xxx"), method_name)(["book.sell"], respo_model)
@@ -1,4 +1,6 @@
+import concurrent.futures
 import os
+import sys
 from typing import Tuple
 
 import pydantic
@@ -6,7 +8,7 @@ import pytest
 from click import testing
 
 import respo
-from respo import cli
+from respo import cli, core
 from tests import conftest
 
 
@@ -16,6 +18,35 @@ def test_respo_model_get_respo_model_throw_errors():
         respo.RespoModel.get_respo_model()
 
 
+def test_respo_model_cache_reloads_only_rebuilt_file(get_general_model, monkeypatch):
+    respo_model = get_general_model
+    assert respo.RespoModel.get_respo_model() is respo_model
+
+    core.respo_model_cache.invalidate()
+    respo_model = respo.RespoModel.get_respo_model()
+    assert respo_model is not get_general_model
+    assert respo.RespoModel.get_respo_model() is respo_model
+
+    cli.save_respo_model(conftest.get_model("tests/cases/general.yml"))
+    stat_result = os.stat(respo.config.path_bin_file)
+    os.utime(
+        respo.config.path_bin_file,
+        ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9),
+    )
+    rebuilt_model = respo.RespoModel.get_respo_model()
+    assert rebuilt_model is not respo_model
+    assert rebuilt_model == respo_model
+
+    monkeypatch.setattr(respo.config, "RESPO_MODEL_CHECK_INTERVAL", 3600)
+    assert respo.RespoModel.get_respo_model() is rebuilt_model
+    os.remove(respo.config.path_bin_file)
+    assert respo.RespoModel.get_respo_model() is rebuilt_model
+
+    monkeypatch.setattr(respo.config, "RESPO_MODEL_CHECK_INTERVAL", 0)
+    with pytest.raises(respo.RespoModelError):
+        respo.RespoModel.get_respo_model()
+
+
 valid_files = [file for file in os.scandir("./tests/cases/valid")]
 
 
@@ -46,6 +77,26 @@ def test_respo_model_for_invalid_cases(file: os.DirEntry, runner: testing.CliRun
     assert "Could not validate respo model" in result.stdout
 
 
+label_errors_cases = [
+    (
+        {"permissions": ["a" * 125 + ".all"], "roles": []},
+        "value_error.any_str.max_length",
+    ),
+    ({"permissions": [["a.all"]], "roles": []}, "type_error.str"),
+    (
+        {"permissions": ["a.all"], "roles": [{"name": "A", "permissions": []}]},
+        "value_error.str.regex",
+    ),
+]
+
+
+@pytest.mark.parametrize("data,error_type", label_errors_cases)
+def test_respo_model_label_errors(data: dict, error_type: str):
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        core.RespoModel.parse_obj(data)
+    assert exc_info.value.errors()[0]["type"] == error_type
+
+
 role_label_cases = [
     ("foobar.read", False),
     ("barread ", False),
@@ -145,3 +196,225 @@ def test_model_roles(get_general_model: respo.RespoModel):
 
     with pytest.raises(ValueError):
         get_general_model.ROLES.permissions("xxx")
+
+
+def test_model_bitmasks(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    assert len(respo_model.permissions_ids) == len(respo_model.permissions)
+    for perm, permission_id in respo_model.permissions_ids.items():
+        assert respo_model.permissions[permission_id] == perm
+        assert respo_model.PERMS.bitmask(perm) == 1 << permission_id
+
+    for role in respo_model.ROLES:
+        for perm in respo_model.PERMS:
+            granted = respo_model.ROLES.bitmask(role) & respo_model.PERMS.bitmask(perm)
+            assert bool(granted) == (perm in respo_model.ROLES.permissions(role))
+
+    assert respo_model.roles_bitmask([]) == 0
+    assert respo_model.roles_bitmask(["default", "admin"]) == (
+        respo_model.ROLES.bitmask("admin")
+    )
+
+    with pytest.raises(respo.RespoModelError):
+        respo_model.ROLES.bitmask("xxx")
+    with pytest.raises(respo.RespoModelError):
+        respo_model.PERMS.bitmask("xxx.yyy")
+    with pytest.raises(respo.RespoModelError):
+        respo_model.roles_bitmask(["default", "xxx"])
+
+
+def test_model_principles_with_cycles_and_chains():
+    respo_model = respo.RespoModel.parse_obj(
+        {
+            "permissions": ["a.a", "a.b", "a.c", "b.a", "b.b", "b.c"],
+            "principles": [
+                {"when": "a.a", "then": ["a.b"]},
+                {"when": "a.b", "then": ["a.a", "a.c"]},
+                {"when": "a.c", "then": ["b.a"]},
+                {"when": "b.b", "then": ["b.c", "a.c"]},
+            ],
+            "roles": [
+                {"name": "first", "permissions": ["a.a"]},
+                {"name": "second", "permissions": ["b.b", "a.c"]},
+                {"name": "third", "permissions": ["b.c"]},
+            ],
+        }
+    )
+    assert respo_model.ROLES.permissions("first") == ["a.a", "a.b", "a.c", "b.a"]
+    assert respo_model.ROLES.permissions("second") == ["a.c", "b.a", "b.b", "b.c"]
+    assert respo_model.ROLES.permissions("third") == ["b.c"]
+
+
+def test_model_roles_include_is_transitive_and_order_independent():
+    levels = 12
+    permissions = [f"level.perm_{level}" for level in range(levels)]
+    roles = [
+        {
+            "name": f"level_{level}",
+            "include": [f"level_{level + 1}"] if level + 1 < levels else [],
+            "permissions": [f"level.perm_{level}"],
+        }
+        for level in range(levels)
+    ]
+    for roles_order in [roles, list(reversed(roles))]:
+        respo_model = respo.RespoModel.parse_obj(
+            {"permissions": permissions, "roles": roles_order}
+        )
+        for level in range(levels):
+            assert respo_model.ROLES.permissions(f"level_{level}") == sorted(
+                permissions[level:]
+            )
+
+
+def test_model_roles_include_cycle_error_message():
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        conftest.get_model(
+            "tests/cases/invalid/roles_include_self_reffering_three_roles.yml"
+        )
+    error = exc_info.value.errors()[0]
+    assert error["type"] == "value_error.respomodel"
+    assert error["msg"].startswith("('roles','role','include','role1')|")
+    assert "in roles: role,role1,role2" in error["msg"]
+
+
+def test_model_all_permission_declared_explicitly_is_not_duplicated():
+    respo_model = respo.RespoModel.parse_obj(
+        {
+            "permissions": ["book.all", "book.read", "user.read"],
+            "roles": [{"name": "default", "permissions": ["book.all"]}],
+        }
+    )
+    assert respo_model.permissions == ["book.all", "book.read", "user.all", "user.read"]
+
+
+def test_model_effective_permissions_roles_cache(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    assert respo_model.roles_cache_info() == core.RolesCacheInfo(
+        hits=0, misses=0, evictions=0, maxsize=1024, currsize=0
+    )
+    permissions = respo_model.effective_permissions(["pro_user", "default"])
+    assert permissions == frozenset(respo_model.ROLES.permissions("pro_user"))
+    assert respo_model.effective_permissions(["default", "pro_user"]) is permissions
+    assert respo_model.effective_permissions(["pro_user", "default", "pro_user"]) is (
+        permissions
+    )
+    assert respo_model.roles_cache_info() == core.RolesCacheInfo(
+        hits=2, misses=1, evictions=0, maxsize=1024, currsize=1
+    )
+
+    with pytest.raises(respo.RespoModelError):
+        respo_model.effective_permissions(["xxx"])
+
+    # cache is not pickled with model
+    cli.save_respo_model(respo_model)
+    assert respo.RespoModel.get_respo_model().roles_cache_info().currsize == 0
+
+
+def test_roles_cache_evictions_and_disabled():
+    roles_cache = core.RolesCache(maxsize=2)
+    for key in [("a",), ("b",), ("a",), ("c",)]:
+        if roles_cache.get(key) is None:
+            roles_cache.put(key, frozenset(key))
+    assert roles_cache.get(("b",)) is None
+    assert roles_cache.get(("a",)) == frozenset({"a"})
+    assert roles_cache.info() == core.RolesCacheInfo(
+        hits=2, misses=4, evictions=1, maxsize=2, currsize=2
+    )
+    roles_cache.clear()
+    assert roles_cache.info() == core.RolesCacheInfo(
+        hits=0, misses=0, evictions=0, maxsize=2, currsize=0
+    )
+
+    roles_cache = core.RolesCache(maxsize=0)
+    roles_cache.put(("a",), frozenset({"a"}))
+    assert roles_cache.get(("a",)) is None
+    assert len(roles_cache) == 0
+
+
+def test_roles_cache_size_from_settings():
+    respo.config.RESPO_ROLES_CACHE_SIZE = 5
+    try:
+        assert core.RolesCache().maxsize == 5
+    finally:
+        respo.config.RESPO_ROLES_CACHE_SIZE = 1024
+
+
+def test_model_effective_permissions_from_many_threads(
+    get_general_model: respo.RespoModel,
+):
+    respo_model = get_general_model
+    roles_combinations = [["default"], ["admin"], ["pro_user"], ["admin", "pro_user"]]
+
+    def check_roles(_):
+        for roles in roles_combinations * 100:
+            assert respo_model.effective_permissions(roles) == frozenset().union(
+                *(respo_model.ROLES.permissions(role) for role in roles)
+            )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(check_roles, range(8)))
+    cache_info = respo_model.roles_cache_info()
+    assert cache_info.currsize == len(roles_combinations)
+    assert cache_info.hits + cache_info.misses == 8 * 400
+
+
+def test_model_labels_are_interned_after_loading(get_general_model: respo.RespoModel):
+    for label in get_general_model.ROLES:
+        assert label is sys.intern(f"{label}")
+        assert getattr(get_general_model.ROLES, label.upper()) is label
+    for label in get_general_model.permissions_ids:
+        assert label is sys.intern(f"{label}")
+
+
+def test_model_permissions_roles_reverse_index(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    for perm in respo_model.PERMS:
+        assert respo_model.PERMS.roles(perm) == [
+            role
+            for role in respo_model.ROLES
+            if perm in respo_model.ROLES.permissions(role)
+        ]
+    assert respo_model.PERMS.roles("book.sell") == ["pro_user", "superadmin"]
+    assert respo_model.PERMS.roles("book.buy") == []
+    with pytest.raises(respo.RespoModelError):
+        respo_model.PERMS.roles("xxx.yyy")
+
+
+def test_model_roles_ids():
+    data = {
+        "permissions": ["book.read"],
+        "roles": [
+            {"name": "default", "permissions": ["book.read"]},
+            {"name": "admin", "permissions": []},
+        ],
+    }
+    respo_model = respo.RespoModel.parse_obj(data)
+    assert respo_model.roles_ids == {"admin": 0, "default": 1}
+    assert respo_model.roles_ids_bitmask(["default"]) == 0b10
+    assert respo_model.roles_from_ids_bitmask(0b11) == ["admin", "default"]
+    with pytest.raises(respo.RespoModelError):
+        respo_model.roles_ids_bitmask(["xxx"])
+    with pytest.raises(respo.RespoModelError):
+        respo_model.roles_from_ids_bitmask(0b100)
+
+    respo_model = respo.RespoModel.parse_obj(
+        {**data, "roles_ids": {"removed": 0, "default": 5}}
+    )
+    assert respo_model.roles_ids == {"removed": 0, "default": 5, "admin": 6}
+
+    for roles_ids in [{"admin": 1, "default": 1}, {"admin": -1}]:
+        with pytest.raises(pydantic.ValidationError):
+            respo.RespoModel.parse_obj({**data, "roles_ids": roles_ids})
+
+
+def test_respo_model_fingerprint_changes_with_compiled_model():
+    respo_model = conftest.get_model("tests/cases/general.yml")
+    assert (
+        respo_model.fingerprint
+        == conftest.get_model("tests/cases/general.yml").fingerprint
+    )
+    assert len(respo_model.fingerprint) == 64
+
+    data = respo_model.dict()
+    data["roles"] = [role for role in data["roles"] if role["name"] != "superadmin"]
+    assert respo.RespoModel.parse_obj(data).fingerprint != respo_model.fingerprint
@@ -32,3 +32,43 @@ def test_field_query():
     assert model.respo_field.add_role("xxx123", validate_input=False)
     model.save()
     assert ExampleModel.objects.filter(respo_field__icontains="xx123").count()
+
+
+@pytest.mark.django_db
+def test_field_effective_permissions_after_role_change(get_general_model):
+    model = ExampleModel(respo_field=respo.RespoClient("default"))
+    model.save()
+    model = ExampleModel.objects.get(pk=model.pk)
+    assert not model.respo_field.has_permission("book.sell", get_general_model)
+
+    assert model.respo_field.add_role("pro_user", get_general_model)
+    assert model.respo_field.has_permission("book.sell", get_general_model)
+    model.save()
+
+    model = ExampleModel.objects.get(pk=model.pk)
+    assert model.respo_field.has_permission("book.sell", get_general_model)
+
+
+@pytest.mark.django_db
+def test_field_has_permission_lookup(get_general_model):
+    respo_model = get_general_model
+    roles_strings = ["", "default", "pro_user", "admin,default", "superadmin"]
+    for roles in roles_strings:
+        ExampleModel(respo_field=respo.RespoClient(roles)).save()
+    # "_" is a LIKE wildcard, "pro_user" must not match "proxuser"
+    ExampleModel(respo_field=respo.RespoClient("a,proxuser")).save()
+
+    for permission in list(respo_model.PERMS) + ["x.not_exists"]:
+        queryset = ExampleModel.objects.filter(respo_field__has_permission=permission)
+        assert sorted(str(model.respo_field) for model in queryset) == sorted(
+            roles
+            for roles in roles_strings
+            if respo.RespoClient(roles).has_permission(permission, respo_model)
+        )
+    assert (
+        ExampleModel.objects.exclude(respo_field__has_permission="book.buy").count()
+        == len(roles_strings) + 1
+    )
+
+    with pytest.raises(ValueError):
+        list(ExampleModel.objects.filter(respo_field__has_permission="invalid"))
@@ -0,0 +1,60 @@
+from typing import Dict, List
+
+import pytest
+
+import respo
+from respo import fixture
+
+
+def include_depth(roles: List[Dict]) -> int:
+    depths: Dict[str, int] = {}
+    for role in roles:
+        depths[role["name"]] = 1 + max(
+            (depths[name] for name in role.get("include", [])), default=-1
+        )
+    return max(depths.values())
+
+
+def test_generate_policy_is_deterministic():
+    assert fixture.generate_policy(seed=1) == fixture.generate_policy(seed=1)
+    assert fixture.generate_policy(seed=1) != fixture.generate_policy(seed=2)
+
+
+@pytest.mark.parametrize(
+    "permissions,roles,depth,principles,fan_out",
+    [
+        (1, 0, 0, 0, 0),
+        (1, 3, 5, None, 3),
+        (50, 5, 1, 10, 2),
+        (1000, 100, 4, None, 5),
+    ],
+)
+def test_generate_policy_is_valid(
+    permissions: int, roles: int, depth: int, principles, fan_out: int
+):
+    policy = fixture.generate_policy(
+        permissions=permissions,
+        roles=roles,
+        include_depth=depth,
+        principles=principles,
+        principle_fan_out=fan_out,
+    )
+    respo_model = respo.RespoModel.parse_obj(policy)
+
+    assert len(policy["permissions"]) == permissions
+    # respo model adds one collection.all permission per collection of 100
+    assert len(respo_model.permissions) == permissions + (permissions + 99) // 100
+    assert len(respo_model.ROLES) == roles
+    if roles:
+        assert include_depth(policy["roles"]) == min(depth, roles - 1)
+    if principles is not None:
+        assert len(policy["principles"]) == min(principles, permissions - 1)
+    for principle in policy["principles"]:
+        assert len(principle["then"]) <= fan_out
+
+
+def test_generate_policy_fail_when_invalid_counts():
+    with pytest.raises(ValueError):
+        fixture.generate_policy(permissions=0)
+    with pytest.raises(ValueError):
+        fixture.generate_policy(include_depth=-1)
@@ -0,0 +1,77 @@
+import pickle
+
+import pytest
+
+import respo
+
+numpy = pytest.importorskip("numpy")
+
+
+def test_matrix_matches_roles_permissions(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    matrix = respo_model.matrix()
+    assert matrix.dtype == bool
+    assert matrix.shape == (len(respo_model.ROLES), len(respo_model.PERMS))
+    for role_index, role in enumerate(respo_model.ROLES):
+        for permission, permission_id in respo_model.permissions_ids.items():
+            assert matrix[role_index, permission_id] == (
+                permission in respo_model.ROLES.permissions(role)
+            )
+
+    packed_matrix = respo_model.matrix(packed=True)
+    assert packed_matrix.dtype == numpy.uint8
+    assert packed_matrix.shape == (len(respo_model.ROLES), 2)
+    assert numpy.array_equal(
+        packed_matrix, numpy.packbits(matrix, axis=1, bitorder="little")
+    )
+
+
+def test_filter_clients(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    clients = [
+        respo.RespoClient("default"),
+        respo.RespoClient(),
+        respo.RespoClient("pro_user"),
+        respo.RespoClient("admin,default"),
+        respo.RespoClient("superadmin"),
+    ]
+    for permission in list(respo_model.PERMS) + ["x.not_exists"]:
+        mask = respo_model.filter_clients(clients, permission)
+        assert mask.tolist() == [
+            respo_client.has_permission(permission, respo_model)
+            for respo_client in clients
+        ]
+    assert respo_model.filter_clients([], "book.sell").tolist() == []
+
+    with pytest.raises(ValueError):
+        respo_model.filter_clients(clients, "invalid")
+    with pytest.raises(respo.RespoModelError):
+        respo_model.filter_clients([respo.RespoClient("xxx")], "book.sell")
+
+
+def test_matrix_is_cached_and_not_pickled(get_general_model: respo.RespoModel):
+    respo_model = get_general_model
+    packed_matrix = respo_model.matrix(packed=True)
+    assert respo_model.matrix(packed=True) is packed_matrix
+    assert not packed_matrix.flags.writeable
+    assert respo_model.matrix() is not respo_model.matrix()
+
+    unpickled_model = pickle.loads(pickle.dumps(respo_model))
+    assert unpickled_model._packed_matrix is None
+    assert numpy.array_equal(unpickled_model.matrix(packed=True), packed_matrix)
+
+
+def test_filter_clients_with_shared_roles_strings(
+    get_general_model: respo.RespoModel,
+):
+    respo_model = get_general_model
+    clients = [
+        respo.RespoClient.from_cached(roles)
+        for roles in ["admin", "default", "", "admin", "pro_user,default", ""] * 3
+    ]
+    clients[1].add_role("superadmin", validate_input=False)
+    for permission in respo_model.PERMS:
+        assert respo_model.filter_clients(clients, permission).tolist() == [
+            respo_client.has_permission(permission, respo_model)
+            for respo_client in clients
+        ]
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import respo
+from respo import cli, core, reload
+from tests import conftest
+
+
+def rebuild_respo_model() -> respo.RespoModel:
+    respo_model = conftest.get_model("tests/cases/general.yml")
+    cli.save_respo_model(respo_model)
+    return respo_model
+
+
+def test_save_respo_model_replaces_file_atomically(get_general_model):
+    old_inode = os.stat(respo.config.path_bin_file).st_ino
+    os.chmod(respo.config.path_bin_file, 0o640)
+    rebuild_respo_model()
+    stat_result = os.stat(respo.config.path_bin_file)
+    assert stat_result.st_ino != old_inode
+    assert stat_result.st_mode & 0o777 == 0o640
+    assert sorted(os.listdir(respo.config.path_bin_file.parent)) == [
+        respo.config.path_bin_file.name,
+        respo.config.path_artifact_file.name,
+    ]
+
+
+def test_respo_model_cache_pin_keeps_model_after_reload(get_general_model):
+    respo_model = get_general_model
+    with core.respo_model_cache.pin() as pinned_model:
+        assert pinned_model is respo_model
+        rebuild_respo_model()
+        assert core.respo_model_cache.reload()
+        assert not core.respo_model_cache.reload()
+        assert respo.RespoModel.get_respo_model() is respo_model
+    reloaded_model = respo.RespoModel.get_respo_model()
+    assert reloaded_model is not respo_model
+    assert reloaded_model == respo_model
+
+
+def test_respo_model_cache_check_does_not_restore_replaced_model(
+    get_general_model, monkeypatch
+):
+    monkeypatch.setattr(respo.config, "RESPO_MODEL_CHECK_INTERVAL", 3600)
+    cache = core.respo_model_cache
+    cached = cache._cached
+    stat = os.stat
+
+    def stat_then_reload(path, *args, **kwargs):
+        # model is reloaded by other thread right after this stat of old file
+        stat_result = stat(path, *args, **kwargs)
+        monkeypatch.setattr(os, "stat", stat)
+        rebuild_respo_model()
+        assert cache.reload()
+        return stat_result
+
+    monkeypatch.setattr(os, "stat", stat_then_reload)
+    assert cache._refresh(cached, time.monotonic()) is get_general_model
+    assert respo.RespoModel.get_respo_model() is not get_general_model
+
+
+def test_respo_model_watcher_check_keeps_model_on_error(get_general_model, monkeypatch):
+    monkeypatch.setattr(respo.config, "RESPO_MODEL_CHECK_INTERVAL", 3600)
+    watcher = reload.RespoModelWatcher()
+    assert not watcher.check()
+    assert watcher.last_error is None
+
+    respo.config.path_bin_file.write_bytes(b"not a pickle")
+    assert not watcher.check()
+    assert watcher.last_error is not None
+    assert respo.RespoModel.get_respo_model() is get_general_model
+
+    rebuild_respo_model()
+    assert watcher.check()
+    assert watcher.last_error is None
+    assert respo.RespoModel.get_respo_model() is not get_general_model
+
+
+def wait_for_new_model(old_model: respo.RespoModel) -> respo.RespoModel:
+    deadline = time.monotonic() + 5
+    while core.respo_model_cache._cached.respo_model is old_model:  # type: ignore
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return core.respo_model_cache._cached.respo_model  # type: ignore
+
+
+def test_respo_model_watcher_thread(get_general_model, monkeypatch):
+    monkeypatch.setattr(respo.config, "RESPO_MODEL_CHECK_INTERVAL", 3600)
+    with reload.RespoModelWatcher(interval=0.01) as watcher:
+        with pytest.raises(RuntimeError):
+            watcher.start()
+        rebuild_respo_model()
+        new_model = wait_for_new_model(get_general_model)
+    assert respo.RespoModel.get_respo_model() is new_model
+
+
+async def test_respo_model_watcher_async(get_general_model):
+    task = asyncio.create_task(reload.RespoModelWatcher(interval=0.01).watch_async())
+    rebuild_respo_model()
+    deadline = time.monotonic() + 5
+    while core.respo_model_cache._cached.respo_model is get_general_model:  # type: ignore
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
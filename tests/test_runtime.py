@@ -0,0 +1,101 @@
+import gc
+import subprocess
+import sys
+import weakref
+
+import pytest
+
+import respo
+from respo import cli, runtime, settings
+
+
+def test_runtime_does_not_import_pydantic():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, respo.runtime; "
+            "assert 'pydantic' not in sys.modules, 'pydantic'; "
+            "assert 'respo.core' not in sys.modules, 'respo.core'",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_runtime_defaults_match_settings():
+    config = settings.Config()
+    assert runtime.DEFAULT_AUTO_FOLDER_NAME == config.RESPO_AUTO_FOLDER_NAME
+    assert (
+        runtime.DEFAULT_AUTO_ARTIFACT_FILE_NAME == config.RESPO_AUTO_ARTIFACT_FILE_NAME
+    )
+    assert runtime.DEFAULT_COMPILED_MODULE_NAME == config.path_compiled_module_file.stem
+
+
+def test_runtime_has_permission(get_general_model, monkeypatch):
+    monkeypatch.setenv("RESPO_AUTO_FOLDER_NAME", respo.config.RESPO_AUTO_FOLDER_NAME)
+    assert runtime.path_artifact_file() == respo.config.path_artifact_file
+
+    respo_model = runtime.get_respo_model()
+    assert runtime.get_respo_model() is respo_model
+    assert respo_model.fingerprint == get_general_model.fingerprint
+    for roles in ["", "default", "pro_user,default", "superadmin"]:
+        for permission in list(get_general_model.PERMS) + ["x.not_exists"]:
+            assert runtime.has_permission(roles, permission) == respo.RespoClient(
+                roles
+            ).has_permission(permission, get_general_model)
+
+    with pytest.raises(respo.RespoModelError):
+        runtime.has_permission("not_exists", "book.sell", respo_model)
+    with pytest.raises(respo.RespoModelError):
+        runtime.get_respo_model(f"{respo.config.RESPO_AUTO_FOLDER_NAME}/not_exists")
+
+
+def test_runtime_keeps_only_latest_artifact(get_general_model):
+    path = respo.config.path_artifact_file
+    respo_model = runtime.get_respo_model(path)
+    old_model = weakref.ref(respo_model)
+    del respo_model
+
+    cli.save_respo_model(get_general_model)
+    respo_model = runtime.get_respo_model(path)
+    gc.collect()
+    assert old_model() is None
+    assert runtime.get_respo_model(path) is respo_model
+    assert runtime._artifacts[str(path)][1] is respo_model
+
+
+def test_respo_lazy_attributes():
+    assert "RespoModel" in dir(respo)
+    assert respo.RespoModel is respo.core.RespoModel
+    with pytest.raises(AttributeError):
+        respo.not_exists  # type: ignore
+
+
+def test_respo_lazy_submodules_and_star_import():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, respo; "
+            "assert 'respo.core' not in sys.modules, 'respo.core'; "
+            "assert respo.core.RespoModel is respo.RespoModel; "
+            "assert respo.client.RespoClient is respo.RespoClient; "
+            "assert respo.settings.config is respo.config; "
+            "namespace = {}; "
+            "exec('from respo import *', namespace); "
+            "assert set(respo.__all__) <= set(namespace), 'star import'; "
+            "assert namespace['RespoModel'] is respo.RespoModel; "
+            "assert namespace['RespoModelError'] is respo.RespoModelError",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert {"core", "client", "settings"} <= set(dir(respo))
+    assert set(respo.__all__) == {
+        *respo._LAZY_ATTRIBUTES,
+        "RespoClientError",
+        "RespoModelError",
+    }
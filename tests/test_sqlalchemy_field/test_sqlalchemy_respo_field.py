@@ -1,14 +1,36 @@
+import pickle
 from dataclasses import dataclass, field
 from typing import AsyncGenerator
 
 import pytest
-from sqlalchemy import Column, Integer, String, select
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    create_engine,
+    dialects,
+    select,
+    text,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import registry
+from sqlalchemy.orm import Session, registry
 from sqlalchemy.orm.session import sessionmaker
 
-from respo import RespoClient
-from respo.fields.sqlalchemy import SQLAlchemyRespoField
+from respo import RespoClient, RespoModel, RespoModelError, cli, core, fixture
+from respo.fields.sqlalchemy import (
+    BIGINTRespoField,
+    BLOBPermissionsField,
+    MutableRespoClient,
+    SQLAlchemyBitmaskRespoField,
+    SQLAlchemyRespoField,
+    materialize_permissions,
+    migrate_text_to_bitmask,
+    permissions_to_bytes,
+    rematerialize_permissions,
+    roles_to_bitmask,
+)
 
 mapper_registry = registry()
 
@@ -136,3 +158,443 @@ async def test_respo_field_bind_none(session: AsyncSession):
 
     obj: ExampleModel = result.scalars().one()
     obj.respo_test_field = RespoClient()
+
+
+def test_mutable_respo_client_invalidates_effective_permissions(get_general_model):
+    respo_client = MutableRespoClient("default")
+    permissions = respo_client.effective_permissions(get_general_model)
+    assert "book.sell" not in permissions
+
+    assert respo_client.add_role("pro_user", get_general_model)
+    assert "book.sell" in respo_client.effective_permissions(get_general_model)
+
+    assert respo_client.remove_role("pro_user", get_general_model)
+    assert respo_client.effective_permissions(get_general_model) == permissions
+
+
+def test_mutable_respo_client_pickle_with_parents(sync_session: Session):
+    obj = ExampleMaterializedModel(respo_test_field=RespoClient("default"))
+    sync_session.add(obj)
+    sync_session.commit()
+    assert obj.respo_test_field._parents
+
+    loaded = pickle.loads(pickle.dumps(obj))
+    assert loaded.respo_test_field.roles == ["default"]
+    assert pickle.loads(pickle.dumps(obj.respo_test_field)).roles == ["default"]
+
+
+def test_mutable_respo_client_unchecked_methods_trigger_changed(monkeypatch):
+    changed_calls = []
+    respo_client = MutableRespoClient()
+    monkeypatch.setattr(respo_client, "changed", lambda: changed_calls.append(1))
+
+    assert respo_client.add_role_unchecked("test_role")
+    assert respo_client.add_role("test_role_2", validate_input=False)
+    assert respo_client.remove_role_unchecked("test_role")
+    assert respo_client.remove_role("test_role_2", validate_input=False)
+    assert len(changed_calls) == 4
+
+
+async def test_respo_field_has_permission_expr(
+    session: AsyncSession, get_general_model
+):
+    respo_model = get_general_model
+    roles_strings = ["", "default", "pro_user", "admin,default", "superadmin", "xx_x"]
+    for index, roles in enumerate(roles_strings):
+        session.add(ExampleModel(respo_test_field=RespoClient(roles), name=str(index)))
+    await session.commit()
+
+    for permission in list(respo_model.PERMS) + ["x.not_exists"]:
+        stmt = (
+            select(ExampleModel.name)
+            .where(
+                ExampleModel.respo_test_field.has_permission_expr(
+                    permission, respo_model
+                )
+            )
+            .order_by(ExampleModel.name)
+        )
+        names = (await session.execute(stmt)).scalars().all()
+        assert names == [
+            str(index)
+            for index, roles in enumerate(roles_strings)
+            if roles != "xx_x"
+            and RespoClient(roles).has_permission(permission, respo_model)
+        ]
+
+    with pytest.raises(ValueError):
+        ExampleModel.respo_test_field.has_permission_expr("invalid", respo_model)
+
+
+async def test_respo_field_has_permission_expr_escapes_like_wildcards(
+    session: AsyncSession, get_general_model
+):
+    # "_" is a LIKE wildcard, "pro_user" must not match "proxuser"
+    session.add(ExampleModel(respo_test_field=RespoClient("a,proxuser"), name="1"))
+    session.add(ExampleModel(respo_test_field=RespoClient("a,pro_user"), name="2"))
+    await session.commit()
+
+    stmt = select(ExampleModel.name).where(
+        ExampleModel.respo_test_field.has_permission_expr(
+            "book.sell", get_general_model
+        )
+    )
+    assert (await session.execute(stmt)).scalars().all() == ["2"]
+
+
+@mapper_registry.mapped
+@dataclass
+class ExampleBitmaskModel:
+    __tablename__ = "example_bitmask_model"
+    __sa_dataclass_metadata_key__ = "sa"
+
+    id: int = field(init=False, metadata={"sa": Column(Integer, primary_key=True)})
+    respo_test_field: RespoClient = field(
+        default_factory=RespoClient,
+        metadata={
+            "sa": Column(
+                SQLAlchemyBitmaskRespoField, nullable=False, server_default="0"
+            )
+        },
+    )
+    roles_text: str = field(
+        default="", metadata={"sa": Column(Text, nullable=False, server_default="")}
+    )
+
+
+@pytest.fixture
+def sync_session(get_general_model):
+    engine = create_engine("sqlite://")
+    mapper_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_bitmask_respo_field_round_trip_and_has_permission_expr(
+    sync_session: Session, get_general_model
+):
+    respo_model = get_general_model
+    roles_strings = ["", "default", "pro_user", "admin,default", "superadmin"]
+    for roles in roles_strings:
+        sync_session.add(ExampleBitmaskModel(respo_test_field=RespoClient(roles)))
+    sync_session.commit()
+
+    raw_values = sync_session.execute(
+        text("SELECT respo_test_field FROM example_bitmask_model ORDER BY id")
+    ).scalars()
+    assert list(raw_values) == [
+        respo_model.roles_ids_bitmask(RespoClient(roles).roles)
+        for roles in roles_strings
+    ]
+
+    objs = sync_session.execute(select(ExampleBitmaskModel)).scalars().all()
+    assert [sorted(obj.respo_test_field.roles) for obj in objs] == [
+        sorted(RespoClient(roles).roles) for roles in roles_strings
+    ]
+    assert objs[1].respo_test_field.add_role("pro_user", respo_model)
+    sync_session.commit()
+    sync_session.expire_all()
+    assert objs[1].respo_test_field.has_permission("book.sell", respo_model)
+
+    for permission in list(respo_model.PERMS) + ["x.not_exists"]:
+        stmt = select(ExampleBitmaskModel.id).where(
+            ExampleBitmaskModel.respo_test_field.has_permission_expr(
+                permission, respo_model
+            )
+        )
+        assert set(sync_session.execute(stmt).scalars()) == {
+            obj.id
+            for obj in objs
+            if obj.respo_test_field.has_permission(permission, respo_model)
+        }
+
+
+def test_bitmask_respo_field_with_respo_model_does_not_load_model(
+    get_general_model, monkeypatch
+):
+    respo_model = get_general_model
+    bitmask_type = BIGINTRespoField(respo_model)
+    value = bitmask_type.process_bind_param(RespoClient("admin,default"), None)
+    assert value == respo_model.roles_ids_bitmask(["admin", "default"])
+
+    def get_respo_model():
+        raise AssertionError("respo model should not be loaded")
+
+    monkeypatch.setattr(core.respo_model_cache, "get", get_respo_model)
+    assert bitmask_type.process_bind_param(RespoClient("default"), None) == (
+        respo_model.roles_ids_bitmask(["default"])
+    )
+    assert sorted(bitmask_type.process_result_value(value, None).roles) == [
+        "admin",
+        "default",
+    ]
+    with pytest.raises(AssertionError):
+        BIGINTRespoField().process_result_value(value, None)
+
+
+def test_bitmask_respo_field_too_big_role_id(get_general_model):
+    respo_model = get_general_model
+    respo_model.roles_ids["default"] = 63
+    with pytest.raises(RespoModelError):
+        roles_to_bitmask(["default"], respo_model)
+
+
+def test_bitmask_respo_field_has_permission_expr_with_over_63_roles(
+    sync_session: Session,
+):
+    cli.save_respo_model(
+        RespoModel.parse_obj(fixture.generate_policy(permissions=20, roles=70))
+    )
+    core.respo_model_cache.invalidate()
+    respo_model = RespoModel.get_respo_model()
+    roles = list(respo_model.ROLES)
+    assert max(respo_model.roles_ids.values()) > 63
+    for index in range(63):
+        sync_session.add(
+            ExampleBitmaskModel(respo_test_field=RespoClient(roles[index]))
+        )
+    sync_session.commit()
+
+    for permission in respo_model.PERMS:
+        stmt = select(ExampleBitmaskModel.respo_test_field).where(
+            ExampleBitmaskModel.respo_test_field.has_permission_expr(
+                permission, respo_model
+            )
+        )
+        assert sorted(str(row) for row in sync_session.execute(stmt).scalars()) == (
+            sorted(
+                role
+                for role in roles[:63]
+                if RespoClient(role).has_permission(permission, respo_model)
+            )
+        )
+
+
+def test_migrate_text_to_bitmask(sync_session: Session, get_general_model):
+    respo_model = get_general_model
+    roles_strings = ["", "default", "pro_user", "admin,default", "superadmin"] * 3
+    for roles in roles_strings:
+        sync_session.add(ExampleBitmaskModel(roles_text=roles))
+    sync_session.commit()
+
+    table = ExampleBitmaskModel.__table__  # type: ignore
+    migrated = migrate_text_to_bitmask(
+        sync_session.connection(),
+        table.c.roles_text,
+        table.c.respo_test_field,
+        respo_model,
+        batch_size=4,
+    )
+    sync_session.commit()
+    assert migrated == len(roles_strings)
+
+    objs = sync_session.execute(
+        select(ExampleBitmaskModel).order_by(ExampleBitmaskModel.id)
+    ).scalars()
+    for obj, roles in zip(objs, roles_strings):
+        assert sorted(obj.respo_test_field.roles) == sorted(RespoClient(roles).roles)
+
+
+@mapper_registry.mapped
+@dataclass
+class ExampleMaterializedModel:
+    __tablename__ = "example_materialized_model"
+    __sa_dataclass_metadata_key__ = "sa"
+
+    id: int = field(init=False, metadata={"sa": Column(Integer, primary_key=True)})
+    respo_test_field: RespoClient = field(
+        default_factory=RespoClient,
+        metadata={
+            "sa": Column(SQLAlchemyRespoField, nullable=False, server_default="")
+        },
+    )
+    permissions: bytes = field(
+        init=False, default=None, metadata={"sa": Column(BLOBPermissionsField)}
+    )
+    permissions_fingerprint: str = field(
+        init=False, default=None, metadata={"sa": Column(String(64))}
+    )
+
+
+materialize_permissions(
+    ExampleMaterializedModel.respo_test_field,  # type: ignore
+    ExampleMaterializedModel.permissions,  # type: ignore
+    ExampleMaterializedModel.permissions_fingerprint,  # type: ignore
+)
+
+
+def test_materialized_permissions_synced_on_write(
+    sync_session: Session, get_general_model
+):
+    respo_model = get_general_model
+    roles_strings = ["", "default", "pro_user", "admin,default", "superadmin"]
+    objs = [
+        ExampleMaterializedModel(respo_test_field=RespoClient(roles))
+        for roles in roles_strings
+    ]
+    sync_session.add_all(objs)
+    sync_session.commit()
+    for obj in objs:
+        assert obj.permissions == permissions_to_bytes(
+            obj.respo_test_field.roles, respo_model
+        )
+        assert obj.permissions_fingerprint == respo_model.fingerprint
+
+    assert objs[1].respo_test_field.add_role("pro_user", respo_model)
+    assert objs[3].respo_test_field.remove_role("admin", respo_model)
+    objs[2].respo_test_field.roles.append("admin")
+    objs[0].respo_test_field.roles.insert(0, "pro_user")
+    objs[4].respo_test_field = RespoClient("default")
+    sync_session.commit()
+    sync_session.expire_all()
+
+    for obj in objs:
+        assert obj.permissions == permissions_to_bytes(
+            obj.respo_test_field.roles, respo_model
+        )
+    for permission in list(respo_model.PERMS) + ["x.not_exists"]:
+        stmt = select(ExampleMaterializedModel.id).where(
+            ExampleMaterializedModel.permissions.has_permission_expr(
+                permission, respo_model
+            )
+        )
+        assert set(sync_session.execute(stmt).scalars()) == {
+            obj.id
+            for obj in objs
+            if obj.respo_test_field.has_permission(permission, respo_model)
+        }
+
+
+def test_rematerialize_permissions(sync_session: Session, get_general_model):
+    respo_model = get_general_model
+    roles_strings = ["", "default", "pro_user", "admin,default", "superadmin"] * 3
+    for roles in roles_strings:
+        sync_session.add(ExampleMaterializedModel(respo_test_field=RespoClient(roles)))
+    sync_session.commit()
+
+    table = ExampleMaterializedModel.__table__  # type: ignore
+    sync_session.execute(
+        update(table)
+        .where(table.c.id % 2 == 0)
+        .values(permissions=None, permissions_fingerprint="stale")
+    )
+    rewritten = rematerialize_permissions(
+        sync_session.connection(),
+        table.c.respo_test_field,
+        table.c.permissions,
+        respo_model,
+        table.c.permissions_fingerprint,
+        chunk_size=2,
+    )
+    sync_session.commit()
+    assert rewritten == len(roles_strings) // 2
+
+    objs = sync_session.execute(
+        select(ExampleMaterializedModel).order_by(ExampleMaterializedModel.id)
+    ).scalars()
+    for obj, roles in zip(objs, roles_strings):
+        assert obj.permissions == permissions_to_bytes(
+            RespoClient(roles).roles, respo_model
+        )
+        assert obj.permissions_fingerprint == respo_model.fingerprint
+
+    assert rematerialize_permissions(
+        sync_session.connection(),
+        table.c.respo_test_field,
+        table.c.permissions,
+        respo_model,
+    ) == len(roles_strings)
+
+
+@mapper_registry.mapped
+class ExampleMaterializedDefaultModel:
+    __tablename__ = "example_materialized_default_model"
+
+    id = Column(Integer, primary_key=True)
+    respo_test_field = Column(SQLAlchemyRespoField, nullable=False, default=RespoClient)
+    permissions = Column(BLOBPermissionsField)
+
+
+materialize_permissions(
+    ExampleMaterializedDefaultModel.respo_test_field,  # type: ignore
+    ExampleMaterializedDefaultModel.permissions,  # type: ignore
+)
+
+
+def test_materialized_permissions_with_column_default(
+    sync_session: Session, get_general_model
+):
+    respo_model = get_general_model
+    obj = ExampleMaterializedDefaultModel()
+    sync_session.add(obj)
+    sync_session.commit()
+    assert obj.respo_test_field.roles == []
+    assert obj.permissions == permissions_to_bytes([], respo_model)
+
+    sync_session.execute(
+        update(ExampleMaterializedDefaultModel.__table__).values(  # type: ignore
+            respo_test_field="default", permissions=None
+        )
+    )
+    sync_session.expire_all()
+    obj.respo_test_field = RespoClient("default")
+    sync_session.commit()
+    assert obj.permissions == permissions_to_bytes(["default"], respo_model)
+
+
+def test_materialized_permissions_unchanged_when_role_not_exists(
+    sync_session: Session, get_general_model
+):
+    respo_model = get_general_model
+    obj = ExampleMaterializedModel(respo_test_field=RespoClient("default"))
+    sync_session.add(obj)
+    sync_session.commit()
+    permissions = obj.permissions
+
+    for change in [
+        lambda roles: roles.add_role_unchecked("not_exists"),
+        lambda roles: roles.roles.append("not_exists"),
+        lambda roles: roles.roles.insert(0, "not_exists"),
+        lambda roles: roles.roles.__setitem__(0, "not_exists"),
+        lambda roles: roles.roles.extend(["admin", "not_exists"]),
+    ]:
+        with pytest.raises(RespoModelError):
+            change(obj.respo_test_field)
+        assert obj.respo_test_field.roles == ["default"]
+        assert obj.permissions == permissions
+    assert obj in sync_session and obj not in sync_session.dirty
+    assert permissions == permissions_to_bytes(["default"], respo_model)
+
+
+@pytest.mark.parametrize(
+    "dialect_name,sql",
+    [
+        (
+            "sqlite",
+            "substr(example_materialized_model.permissions, 2, 1)) - 1) & 2) != 0)",
+        ),
+        (
+            "postgresql",
+            "(CASE WHEN length(example_materialized_model.permissions) > 1 "
+            "THEN get_bit(example_materialized_model.permissions, 9) = 1 "
+            "ELSE false END)",
+        ),
+        (
+            "mysql",
+            "((ASCII(SUBSTRING(example_materialized_model.permissions, 2, 1)) & 2)"
+            " != 0)",
+        ),
+    ],
+)
+def test_materialized_has_permission_expr_compiles_to_bit_test(
+    get_general_model, dialect_name: str, sql: str
+):
+    respo_model = get_general_model
+    assert respo_model.permissions_ids["user.update"] == 9
+    compiled = str(
+        ExampleMaterializedModel.permissions.has_permission_expr(  # type: ignore
+            "user.update", respo_model
+        ).compile(dialect=dialects.registry.load(dialect_name)())
+    )
+    assert compiled.endswith(sql)
+    assert " IN " not in compiled